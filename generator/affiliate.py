@@ -1,8 +1,17 @@
-from .config import cfg
-from .utils import slugify
+from __future__ import annotations
+
+import csv
+import re
 import urllib.parse
+from functools import lru_cache
+from typing import NamedTuple
+
+from unidecode import unidecode
+
+from .config import cfg
 
 
+@lru_cache(maxsize=4096)
 def amazon_search_url_br(query: str) -> str:
     tag = cfg.AMAZON_TAG_BR or "SEU_TAG-20"
     params = {
@@ -13,26 +22,124 @@ def amazon_search_url_br(query: str) -> str:
     return f"https://www.amazon.com.br/s?{urllib.parse.urlencode(params)}"
 
 
+def _link(term: str) -> dict:
+    return {"label": term.capitalize(), "url": amazon_search_url_br(term)}
+
+
+class CtaRule(NamedTuple):
+    """Uma linha de data/cta_rules.csv: gatilhos (prefixos de palavra) → termos de busca do CTA."""
+    priority: int
+    hub: str          # slug do hub (vazio = a regra só escolhe o CTA, não o tema)
+    category: str
+    triggers: tuple[str, ...]
+    terms: tuple[str, ...]
+
+
+DEFAULT_CTA_TERMS = ["cafeteira", "moedor de café", "balança de café"]
+
+
+def normalize(text: str) -> str:
+    """Forma usada no casamento: sem acentos e em minúsculas ("Balança" → "balanca")."""
+    return unidecode(text or "").lower()
+
+
+def load_cta_rules(path: str | None = None) -> list[CtaRule]:
+    """Lê o CSV de regras (`priority,hub,category,triggers,terms`; listas separadas por `|`)."""
+    rules = []
+    with open(path or cfg.CTA_RULES_FILE, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            triggers = tuple(t.strip() for t in row["triggers"].split("|") if t.strip())
+            terms = tuple(t.strip() for t in row["terms"].split("|") if t.strip())
+            if not triggers or not terms:
+                continue
+            rules.append(CtaRule(int(row["priority"] or 0), row["hub"].strip(), row["category"].strip(), triggers, terms))
+    return rules
+
+
+def _trie_pattern(words: list[str]) -> str:
+    """Regex de uma trie: prefixos comuns fatorados, então o custo por posição não cresce com o nº de gatilhos."""
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def walk(node: dict) -> str:
+        end = "" in node
+        alts = [re.escape(ch) + walk(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        # Gatilho termina aqui, mas um mais longo pode continuar (gulosa: tenta o mais longo antes)
+        return "(?:" + body + ")?" if end else body
+
+    return walk(trie)
+
+
+class CtaMatcher:
+    """Todas as regras compiladas numa única regex sobre a palavra-chave normalizada.
+
+    Um gatilho casa no início de uma palavra e vale como prefixo ("filtro" pega "filtros").
+    Em cada posição a trie devolve o gatilho mais longo; o fecho de prefixos (`_closure`) soma
+    as regras dos gatilhos mais curtos que também casariam ali. As regras ficam ordenadas por
+    prioridade (desempate: ordem no arquivo), e o resultado é uma lista de índices nessa ordem.
+    """
+
+    def __init__(self, rules: list[CtaRule]):
+        self.rules = sorted(rules, key=lambda r: -r.priority)  # sort estável: mantém a ordem do arquivo
+        owners: dict[str, set[int]] = {}
+        for rank, rule in enumerate(self.rules):
+            for t in rule.triggers:
+                owners.setdefault(normalize(t), set()).add(rank)
+        words = sorted(owners)
+        # Fecho de prefixos: gatilho → regras de todos os gatilhos que são prefixo dele
+        self._closure: dict[str, frozenset[int]] = {}
+        for w in words:
+            ranks = set(owners[w])
+            for i in range(1, len(w)):
+                ranks.update(owners.get(w[:i], ()))
+            self._closure[w] = frozenset(ranks)
+        pattern = _trie_pattern(words) if words else r"(?!)"
+        self._regex = re.compile(r"(?<![a-z0-9])(?=(" + pattern + "))")
+        self._links: dict[int, tuple[dict, ...]] = {}
+
+    def ranks(self, keyword: str) -> list[int]:
+        """Índices (em `self.rules`) das regras que casam com `keyword`, da mais prioritária à menos."""
+        found: set[int] = set()
+        closure = self._closure
+        for m in self._regex.finditer(normalize(keyword)):
+            found |= closure[m.group(1)]
+        return sorted(found)
+
+    def match(self, keyword: str) -> list[CtaRule]:
+        return [self.rules[i] for i in self.ranks(keyword)]
+
+    def links(self, rank: int) -> tuple[dict, ...]:
+        """Links do CTA de uma regra, montados uma vez por regra."""
+        links = self._links.get(rank)
+        if links is None:
+            links = self._links[rank] = tuple(_link(t) for t in self.rules[rank].terms)
+        return links
+
+
+@lru_cache(maxsize=1)
+def cta_matcher() -> CtaMatcher:
+    """Matcher das regras de `cfg.CTA_RULES_FILE`, compilado uma vez por processo."""
+    return CtaMatcher(load_cta_rules())
+
+
 def pick_cta_terms(keyword: str) -> list[str]:
-    k = (keyword or "").lower()
-    if any(w in k for w in ["moedor", "moer", "grão", "grao", "moinho"]):
-        return ["moedor de café", "moedor elétrico", "moedor manual"]
-    if any(w in k for w in ["cafeteira", "método", "metodo", "preparo", "espresso", "expresso"]):
-        return ["cafeteira italiana", "prensa francesa", "aeropress"]
-    if "filtro" in k:
-        return ["filtro de papel", "filtro de metal", "coador de café"]
-    if any(w in k for w in ["balança", "balanca", "escala"]):
-        return ["balança de café", "balança de precisão"]
-    return ["cafeteira", "moedor de café", "balança de café"]
+    matcher = cta_matcher()
+    ranks = matcher.ranks(keyword)
+    if ranks:
+        return list(matcher.rules[ranks[0]].terms)
+    return DEFAULT_CTA_TERMS
 
 
 def render_cta_links(keyword: str) -> list[dict]:
-    terms = pick_cta_terms(keyword)
-    items = []
-    for t in terms:
-        items.append({
-            "label": t.capitalize(),
-            "url": amazon_search_url_br(t)
-        })
-    return items
-
+    matcher = cta_matcher()
+    ranks = matcher.ranks(keyword)
+    if ranks:
+        return [dict(item) for item in matcher.links(ranks[0])]
+    return [_link(t) for t in DEFAULT_CTA_TERMS]
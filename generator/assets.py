@@ -0,0 +1,93 @@
+from __future__ import annotations
+import glob
+import hashlib
+import json
+import os
+import re
+
+from .config import cfg
+from .output_store import COMPRESSIBLE, gzip_bytes, output_store
+from .utils import read_text, write_text
+
+
+ASSET_MAP_NAME = "assets.json"
+
+_PRESERVE_RE = re.compile(r"(<(pre|script|style|textarea)\b.*?</\2>)", re.IGNORECASE | re.DOTALL)
+_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+_WS_RE = re.compile(r"\s+")
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_WS_RE = re.compile(r"\s*([{}:;,>])\s*")
+
+
+def minify_html(html: str) -> str:
+    """Remove comentários e colapsa espaços em branco, preservando <pre>, <script>, <style> e <textarea>."""
+    parts = _PRESERVE_RE.split(html)
+    out = []
+    # split com 2 grupos: [texto, bloco, tag, texto, bloco, tag, ...]
+    for i in range(0, len(parts), 3):
+        text = _COMMENT_RE.sub("", parts[i])
+        out.append(_WS_RE.sub(" ", text))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out).strip() + "\n"
+
+
+def minify_css(css: str) -> str:
+    css = _CSS_COMMENT_RE.sub("", css)
+    css = _WS_RE.sub(" ", css)
+    css = _CSS_WS_RE.sub(r"\1", css)
+    return css.replace(";}", "}").strip() + "\n"
+
+
+def precompress_tree(root: str) -> int:
+    """Cria/atualiza sidecars .gz dos arquivos de texto publicados em `root` que ainda não têm um.
+
+    Incremental: pula arquivos cujo .gz já é mais novo que a origem. O que passa pelo output store
+    neste build já ganha o sidecar na escrita. Retorna quantos foram gravados.
+    """
+    written = 0
+    for dirpath, _dirs, files in os.walk(root):
+        names = set(files)
+        for name in files:
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            src = os.path.join(dirpath, name)
+            if name + ".gz" in names and os.path.getmtime(src + ".gz") >= os.path.getmtime(src):
+                continue
+            with open(src, "rb") as f:
+                output_store.write(src + ".gz", gzip_bytes(f.read()))
+            written += 1
+    return written
+
+
+def load_asset_map() -> dict[str, str]:
+    raw = read_text(os.path.join(cfg.CACHE_DIR, ASSET_MAP_NAME))
+    try:
+        return json.loads(raw) if raw else {}
+    except Exception:
+        return {}
+
+
+def build_css(src: str | None = None) -> dict[str, str]:
+    """Minifica `styles.css`, grava `styles.<hash>.css` em OUTPUT_DIR e atualiza o mapa de assets.
+
+    O nome deriva do conteúdo da origem; se o arquivo já existe, nada é refeito.
+    Versões antigas (e a cópia sem hash) são removidas.
+    """
+    src = src or os.path.join(cfg.TEMPLATES_DIR, "styles.css")
+    asset_map = load_asset_map()
+    if not os.path.exists(src):
+        return asset_map
+    with open(src, "rb") as f:
+        raw = f.read()
+    name = f"styles.{hashlib.sha256(raw).hexdigest()[:10]}.css"
+    dst = os.path.join(cfg.OUTPUT_DIR, name)
+    if not output_store.exists(dst):
+        output_store.write_text(dst, minify_css(raw.decode("utf-8")))
+    for old in glob.glob(os.path.join(cfg.OUTPUT_DIR, "styles*.css")) + glob.glob(os.path.join(cfg.OUTPUT_DIR, "styles*.css.gz")):
+        if os.path.basename(old) not in (name, name + ".gz"):
+            output_store.remove(old)
+    if asset_map.get("styles.css") != name:
+        asset_map["styles.css"] = name
+        write_text(os.path.join(cfg.CACHE_DIR, ASSET_MAP_NAME), json.dumps(asset_map, indent=0, sort_keys=True))
+    return asset_map
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Iterator
+
+from .config import cfg
+
+
+class TokenBucket:
+    """Limitador de taxa (requisições por minuto) compartilhado entre threads.
+
+    `rate_per_minute <= 0` desativa o limite.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int | None = None):
+        self.rate = rate_per_minute / 60.0 if rate_per_minute > 0 else 0.0
+        self.capacity = float(burst if burst is not None else max(1, int(rate_per_minute // 6) or 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CallBudget:
+    """Orçamento de chamadas por execução, seguro para uso concorrente.
+
+    Uma vaga é reservada antes da chamada (`try_spend`) e devolvida (`refund`)
+    se nada foi gerado, de modo que o limite nunca é ultrapassado.
+    """
+
+    def __init__(self, limits: dict[str, int]):
+        self.limits = dict(limits)
+        self.used: dict[str, int] = {k: 0 for k in limits}
+        self._lock = threading.Lock()
+
+    def try_spend(self, kind: str) -> bool:
+        with self._lock:
+            if self.used.get(kind, 0) >= self.limits.get(kind, 0):
+                return False
+            self.used[kind] = self.used.get(kind, 0) + 1
+            return True
+
+    def refund(self, kind: str) -> None:
+        with self._lock:
+            self.used[kind] = max(0, self.used.get(kind, 0) - 1)
+
+    def get(self, kind: str, default: int = 0) -> int:
+        with self._lock:
+            return self.used.get(kind, default)
+
+
+def bounded_map(executor: Executor, fn: Callable, items: Iterable, window: int) -> Iterator:
+    """Como `executor.map`, mas consome `items` aos poucos: no máximo `window` tarefas em voo.
+
+    Resultados saem na ordem de entrada.
+    """
+    pending: deque = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# Limitador global para todas as chamadas à OpenRouter (texto e imagem)
+api_limiter = TokenBucket(cfg.API_REQUESTS_PER_MINUTE)
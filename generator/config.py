@@ -22,16 +22,73 @@ class Config:
     OUTPUT_DIR: str = os.getenv("OUTPUT_DIR", "public")
     CACHE_DIR: str = os.getenv("CACHE_DIR", "cache")
     ASSETS_DIR: str = os.getenv("ASSETS_DIR", "public/assets")
+    TEMPLATES_DIR: str = os.getenv("TEMPLATES_DIR", "templates")
+    KEYWORDS_FILE: str = os.getenv("KEYWORDS_FILE", "data/keywords.txt")
 
     # LLM/OpenRouter
     OPENROUTER_API_KEY: str | None = os.getenv("OPENROUTER_API_KEY")
+    OPENROUTER_BASE_URL: str = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1").rstrip("/")
     OPENROUTER_MODEL: str = os.getenv("OPENROUTER_MODEL", "deepseek/deepseek-chat-v3.1:free")
     LLM_MAX_CALLS_PER_RUN: int = int(os.getenv("LLM_MAX_CALLS_PER_RUN", "3"))
+    # Cache de respostas (SQLite em CACHE_DIR); 0 = sem limite
+    LLM_CACHE_MAX_MB: int = int(os.getenv("LLM_CACHE_MAX_MB", "200"))
+    LLM_CACHE_MAX_AGE_DAYS: float = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "0"))
     GENERATE_WITH_LLM: bool = os.getenv("GENERATE_WITH_LLM", "true").lower() in {"1", "true", "yes"}
+    # Título, description e corpo numa chamada só (JSON); false = duas chamadas por artigo
+    LLM_STRUCTURED: bool = os.getenv("LLM_STRUCTURED", "true").lower() in {"1", "true", "yes"}
+    # Palavras-chave por requisição de títulos/descriptions em lote (0/1 = sem lote)
+    LLM_META_BATCH: int = int(os.getenv("LLM_META_BATCH", "25"))
+    # Respostas via SSE: limite de inatividade entre tokens (s) em vez de tempo total; o parcial vira checkpoint
+    LLM_STREAM: bool = os.getenv("LLM_STREAM", "true").lower() in {"1", "true", "yes"}
+    LLM_IDLE_TIMEOUT: float = float(os.getenv("LLM_IDLE_TIMEOUT", "30"))
     # Imagens via OpenRouter (opcional)
     GENERATE_IMAGES: bool = os.getenv("GENERATE_IMAGES", "true").lower() in {"1", "true", "yes"}
     IMAGE_MODEL: str = os.getenv("IMAGE_MODEL", "google/gemini-2.5-flash-image-preview:free")
     IMG_MAX_CALLS_PER_RUN: int = int(os.getenv("IMG_MAX_CALLS_PER_RUN", "3"))
+    # Derivados responsivos (larguras em px, separadas por vírgula) e qualidade WebP/JPEG
+    IMAGE_WIDTHS: str = os.getenv("IMAGE_WIDTHS", "480,800,1200")
+    IMAGE_QUALITY: int = int(os.getenv("IMAGE_QUALITY", "78"))
+    # Fila de trabalho (cache/work-queue.sqlite3): ordem de prioridade das classes de item e backoff
+    # de itens que falharam (horas; dobra a cada falha até o máximo)
+    QUEUE_PRIORITY: str = os.getenv("QUEUE_PRIORITY", "new,body,metadata,retry,image")
+    QUEUE_BACKOFF_HOURS: float = float(os.getenv("QUEUE_BACKOFF_HOURS", "6"))
+    QUEUE_BACKOFF_MAX_HOURS: float = float(os.getenv("QUEUE_BACKOFF_MAX_HOURS", "168"))
+    # Concorrência das chamadas de geração (texto + imagem)
+    GEN_CONCURRENCY: int = int(os.getenv("GEN_CONCURRENCY", "4"))
+    API_REQUESTS_PER_MINUTE: float = float(os.getenv("API_REQUESTS_PER_MINUTE", "20"))
+    # Cliente HTTP (retries, backoff e circuit breaker)
+    HTTP_MAX_RETRIES: int = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    HTTP_BACKOFF_BASE: float = float(os.getenv("HTTP_BACKOFF_BASE", "1.0"))
+    HTTP_BACKOFF_MAX: float = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+    HTTP_BREAKER_THRESHOLD: int = int(os.getenv("HTTP_BREAKER_THRESHOLD", "5"))
+    HTTP_BREAKER_COOLDOWN: float = float(os.getenv("HTTP_BREAKER_COOLDOWN", "60"))
+
+    # Seeds repetidas: "merge" descarta, "flag" só reporta, "off" desliga; limiar de Jaccard dos termos
+    DEDUP_MODE: str = os.getenv("DEDUP_MODE", "merge").lower()
+    DEDUP_THRESHOLD: float = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+
+    # Links internos: quantos "guias relacionados" por post
+    RELATED_POSTS: int = int(os.getenv("RELATED_POSTS", "5"))
+
+    # Busca no navegador: índice invertido pré-montado em OUTPUT_DIR/search (termos por post,
+    # postings servidas por termo e postings por arquivo de shard antes de dividir pelo prefixo)
+    SEARCH_ENABLED: bool = os.getenv("SEARCH_ENABLED", "true").lower() in {"1", "true", "yes"}
+    SEARCH_TERMS_PER_POST: int = int(os.getenv("SEARCH_TERMS_PER_POST", "64"))
+    SEARCH_MAX_POSTINGS: int = int(os.getenv("SEARCH_MAX_POSTINGS", "500"))
+    SEARCH_SHARD_POSTINGS: int = int(os.getenv("SEARCH_SHARD_POSTINGS", "4000"))
+
+    # Renderização: processos do pool (0 = um por núcleo, 1 = serial)
+    RENDER_WORKERS: int = int(os.getenv("RENDER_WORKERS", "0"))
+
+    # Listagens: posts por página na home e nos hubs
+    INDEX_PAGE_SIZE: int = int(os.getenv("INDEX_PAGE_SIZE", "50"))
+
+    # Pós-build: HTML minificado e sidecars .gz pré-comprimidos
+    MINIFY_HTML: bool = os.getenv("MINIFY_HTML", "true").lower() in {"1", "true", "yes"}
+    PRECOMPRESS: bool = os.getenv("PRECOMPRESS", "true").lower() in {"1", "true", "yes"}
+
+    # Sitemaps: URLs por fragmento (limite do protocolo: 50.000)
+    SITEMAP_MAX_URLS: int = int(os.getenv("SITEMAP_MAX_URLS", "50000"))
 
     # Limites de geração
     MAX_POSTS_TOTAL: int = int(os.getenv("MAX_POSTS_TOTAL", "200"))
@@ -39,6 +96,8 @@ class Config:
 
     # Afiliados
     AMAZON_TAG_BR: str = os.getenv("AMAZON_TAG_BR", "SEU_TAG-20")
+    # Regras de CTA (categoria → termos de busca), com prioridade
+    CTA_RULES_FILE: str = os.getenv("CTA_RULES_FILE", "data/cta_rules.csv")
 
     # Analytics
     GA_MEASUREMENT_ID: str | None = os.getenv("GA_MEASUREMENT_ID")
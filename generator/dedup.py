@@ -0,0 +1,263 @@
+from __future__ import annotations
+import re
+from itertools import chain
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+from .utils import slugify
+
+
+# Palavras que não distinguem um artigo de outro neste nicho ("café" está em quase toda seed)
+STOPWORDS = frozenset(
+    "a o as os ao aos de da do das dos e em no na nos nas num numa para pra pro por pelo pela "
+    "com sem um uma uns umas que vs x cafe cafes".split()
+)
+_TERM_RE = re.compile(r"[a-z0-9]+")
+
+# MinHash com BANDS * ROWS permutações; a chance de dois conjuntos com Jaccard J caírem no mesmo
+# balde é 1 - (1 - J**ROWS) ** BANDS (≈0,98 para J=0,8 e ≈0,06 para J=0,3)
+BANDS = 8
+ROWS = 4
+_SEED = 20240601
+# Pares candidatos verificados por vez (limita a memória da comparação exata)
+_CHUNK = 1 << 18
+
+
+class Duplicate(NamedTuple):
+    keyword: str
+    kept: str
+    reason: str  # "slug", "exact" ou "near"
+    similarity: float
+
+
+class DedupResult(NamedTuple):
+    keywords: list[str]  # seeds a gerar, na ordem original
+    duplicates: list[Duplicate]
+
+    def report(self, threshold: float) -> dict:
+        counts: dict[str, int] = {}
+        for dup in self.duplicates:
+            counts[dup.reason] = counts.get(dup.reason, 0) + 1
+        return {
+            "threshold": threshold,
+            "kept": len(self.keywords),
+            "duplicates": counts,
+            "pairs": [dup._asdict() for dup in self.duplicates],
+        }
+
+
+def stem(token: str) -> str:
+    # Plural simples do português: moedores → moedor, filtros → filtro
+    if len(token) > 4 and token.endswith(("res", "zes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def shingles(keyword: str) -> frozenset[str]:
+    """Termos normalizados de uma palavra-chave: sem acento, stopwords e plural; sem termos úteis, o slug."""
+    found = frozenset(stem(t) for t in _TERM_RE.findall(slugify(keyword)) if t not in STOPWORDS)
+    return found or frozenset([slugify(keyword)])
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _minhash(rows: np.ndarray, vals: np.ndarray, n: int, vocab_size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Matriz de ids (preenchida com `vocab_size`), tamanhos dos conjuntos e assinaturas MinHash.
+
+    `rows`/`vals` são os pares (conjunto, termo) ordenados por conjunto. Cada termo recebe um valor
+    aleatório por permutação; a assinatura de um conjunto é o mínimo coluna a coluna sobre seus termos.
+    """
+    lens = np.bincount(rows, minlength=n).astype(np.int32)
+    ids = np.full((n, int(lens.max())), vocab_size, dtype=np.int32)
+    cols = np.arange(rows.size) - np.repeat(np.cumsum(lens) - lens, lens)
+    ids[rows, cols] = vals
+
+    perms = np.random.default_rng(_SEED).integers(0, 2**32 - 1, size=(vocab_size + 1, BANDS * ROWS), dtype=np.uint32)
+    perms[vocab_size] = np.iinfo(np.uint32).max  # o preenchimento nunca é o mínimo
+    sig = perms[ids[:, 0]]
+    for c in range(1, ids.shape[1]):
+        np.minimum(sig, perms[ids[:, c]], out=sig)
+    return ids, lens, sig
+
+
+def _candidates(sig: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Pares (seed, líder) que caem no mesmo balde em alguma banda; o líder é a seed mais antiga do balde."""
+    n = sig.shape[0]
+    wide = sig.astype(np.uint64)
+    found = []
+    for b in range(BANDS):
+        key = np.zeros(n, dtype=np.uint64)
+        for r in range(b * ROWS, (b + 1) * ROWS):
+            key = key * np.uint64(0x9E3779B97F4A7C15) + wide[:, r]
+        order, leader = _leaders(key)
+        mask = leader != order
+        found.append(order[mask].astype(np.int64) * n + leader[mask])
+    pairs = np.sort(np.concatenate(found))
+    if pairs.size == 0:
+        return pairs, pairs
+    pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+    return pairs // n, pairs % n
+
+
+def _similarity(ids: np.ndarray, lens: np.ndarray, a: np.ndarray, b: np.ndarray, pad: int) -> np.ndarray:
+    """Jaccard exato dos pares (a[k], b[k]); os ids de cada linha são distintos.
+
+    As duas linhas de cada par são juntadas e ordenadas: cada termo em comum vira um par de vizinhos iguais.
+    """
+    out = np.empty(a.size, dtype=np.float64)
+    for lo in range(0, a.size, _CHUNK):
+        ia, ib = a[lo:lo + _CHUNK], b[lo:lo + _CHUNK]
+        both = np.sort(np.concatenate([ids[ia], ids[ib]], axis=1), axis=1)
+        inter = ((both[:, 1:] == both[:, :-1]) & (both[:, 1:] != pad)).sum(axis=1)
+        out[lo:lo + _CHUNK] = inter / (lens[ia] + lens[ib] - inter)
+    return out
+
+
+def _near_leaders(rows: np.ndarray, vals: np.ndarray, n: int, vocab_size: int, threshold: float) -> dict[int, tuple[int, float]]:
+    """Para cada conjunto com uma quase-duplicata anterior: (índice do líder, Jaccard)."""
+    ids, lens, sig = _minhash(rows, vals, n, vocab_size)
+    a, b = _candidates(sig)
+    # Jaccard >= t exige razão de tamanhos >= t
+    ok = np.minimum(lens[a], lens[b]) >= threshold * np.maximum(lens[a], lens[b])
+    a, b = a[ok], b[ok]
+    sim = _similarity(ids, lens, a, b, vocab_size)
+    hit = sim >= threshold
+    a, b, sim = a[hit], b[hit], sim[hit]
+    # Fica o líder mais parecido (e o mais antigo, no empate)
+    best = np.lexsort((b, -sim, a))
+    a, b, sim = a[best], b[best], sim[best]
+    first = np.r_[True, a[1:] != a[:-1]] if a.size else np.empty(0, dtype=bool)
+    return {int(i): (int(j), float(s)) for i, j, s in zip(a[first], b[first], sim[first])}
+
+
+def _mix(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Hash de 64 bits de cada valor combinado com um peso aleatório da sua posição."""
+    weights = np.random.default_rng(_SEED + 1).integers(1, 2**63 - 1, size=int(positions.max(initial=0)) + 1, dtype=np.uint64)
+    mixed = (values.astype(np.uint64) + np.uint64(1)) * np.uint64(0x9E3779B97F4A7C15) * weights[positions]
+    return mixed ^ (mixed >> np.uint64(29))
+
+
+def _sum_by_row(values: np.ndarray, rows: np.ndarray, n: int) -> np.ndarray:
+    """Soma (módulo 2**64) dos hashes de cada linha: chave de uma sequência ou de um conjunto."""
+    out = np.zeros(n, dtype=np.uint64)
+    np.add.at(out, rows, values)
+    return out
+
+
+def _leaders(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Ordena `keys` e devolve (ordem, primeira posição com a mesma chave para cada item da ordem).
+
+    A ordenação não precisa ser estável (a estável custa ~2× mais): o líder é o menor índice do grupo.
+    """
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    group = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, keys.size]))
+    return order, np.minimum.reduceat(order, starts)[group]
+
+
+def _first_of_group(keys: np.ndarray) -> np.ndarray:
+    """Índice da primeira linha com a mesma chave, para cada linha."""
+    order, leader = _leaders(keys)
+    first = np.empty_like(order)
+    first[order] = leader
+    return first
+
+
+def _expand(lists: list[list[int]], token_word: np.ndarray, token_row: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Troca cada token pela lista de valores da sua palavra: pares (linha, valor), na ordem."""
+    counts = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+    flat = np.fromiter(chain.from_iterable(lists), dtype=np.int64, count=int(counts.sum()))
+    per_token = counts[token_word]
+    total = int(per_token.sum())
+    within = np.arange(total) - np.repeat(np.cumsum(per_token) - per_token, per_token)
+    offsets = (np.cumsum(counts) - counts)[token_word]
+    return np.repeat(token_row, per_token), flat[np.repeat(offsets, per_token) + within]
+
+
+def dedupe_keywords(keywords: Iterable[str], threshold: float = 0.8, merge: bool = True) -> DedupResult:
+    """Detecta seeds repetidas antes da geração, com um índice MinHash-LSH sobre termos normalizados.
+
+    - "slug": mesmo slug de uma seed anterior (gravaria no mesmo diretório) — sempre descartada;
+    - "exact": mesmo conjunto de termos ("moagem para aeropress" × "moagem café aeropress");
+    - "near": Jaccard dos termos >= `threshold` com uma seed anterior.
+
+    A primeira seed de cada grupo é a mantida. Com `merge=False` as repetidas (exceto colisões
+    de slug) continuam na lista e só aparecem em `duplicates`.
+
+    Só o vocabulário (palavras distintas) passa por `slugify`; o resto é vetorizado, o que mantém
+    centenas de milhares de seeds na casa de um segundo.
+    """
+    seeds = list(keywords)
+    n = len(seeds)
+    if n == 0:
+        return DedupResult([], [])
+    # Sem guardar uma lista por seed: milhares de objetos vivos só disparariam o coletor de lixo.
+    # Um só split do texto inteiro; o separador "\x00" (não é espaço) marca onde cada seed começa
+    tokens = " \x00 ".join(seeds).split()
+    word_index = dict(zip(dict.fromkeys(tokens), range(len(tokens))))
+    token_word = np.fromiter(map(word_index.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    is_sep = token_word == word_index.get("\x00", -1)
+    token_row = np.cumsum(is_sep)[~is_sep]
+    token_word = token_word[~is_sep]
+
+    # Vocabulário: trechos do slug e termos (sem stopwords, sem plural) de cada palavra distinta
+    parts: dict[str, int] = {}
+    vocab: dict[str, int] = {}
+    word_parts: list[list[int]] = []
+    word_terms: list[list[int]] = []
+    for word in word_index:
+        chunks = [c for c in slugify(word).split("-") if c]
+        word_parts.append([parts.setdefault(c, len(parts)) for c in chunks])
+        word_terms.append([vocab.setdefault(stem(t), len(vocab)) for c in chunks for t in _TERM_RE.findall(c) if t not in STOPWORDS])
+
+    # Slug = sequência dos trechos, na ordem (igual a slugify(keyword))
+    part_rows, part_vals = _expand(word_parts, token_word, token_row)
+    position = np.arange(part_rows.size) - np.searchsorted(part_rows, np.arange(n))[part_rows]
+    slug_first = _first_of_group(_sum_by_row(_mix(part_vals, position), part_rows, n))
+
+    # Conjunto de termos (sem repetição); seeds sem termo útil usam o próprio slug como termo
+    term_rows, term_vals = _expand(word_terms, token_word, token_row)
+    empty = np.flatnonzero(np.bincount(term_rows, minlength=n) == 0)
+    span = len(vocab) + n
+    pairs = np.sort(np.concatenate([term_rows * span + term_vals, empty * span + len(vocab) + slug_first[empty]]))
+    pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+    term_rows, term_vals = pairs // span, pairs % span
+    set_first = _first_of_group(_sum_by_row(_mix(term_vals, term_vals), term_rows, n))
+
+    # Quase-duplicatas entre os líderes (primeira seed de cada conjunto de termos)
+    rows = np.arange(n)
+    is_leader = set_first == rows
+    leaders = np.flatnonzero(is_leader)
+    root = set_first.copy()
+    similarity = np.ones(n)
+    unique = is_leader & (slug_first == rows)
+    if threshold < 1.0 and leaders.size > 1:
+        rank = np.cumsum(is_leader) - 1
+        in_leader = is_leader[term_rows]
+        found = _near_leaders(rank[term_rows[in_leader]], term_vals[in_leader], leaders.size, span, threshold)
+        # Líderes vêm antes das seeds que apontam para eles, então a raiz já está resolvida
+        for i in sorted(found):
+            j, sim = found[i]
+            root[leaders[i]] = root[leaders[j]]
+            similarity[leaders[i]] = round(sim, 3)
+            unique[leaders[i]] = False
+
+    duplicates = []
+    for i in np.flatnonzero(~unique).tolist():
+        if slug_first[i] != i:
+            reason = "slug"
+        elif set_first[i] != i:
+            reason = "exact"
+        else:
+            reason = "near"
+        duplicates.append(Duplicate(seeds[i], seeds[root[set_first[i]]], reason, float(similarity[i])))
+    keep = unique if merge else slug_first == rows
+    return DedupResult([seeds[i] for i in np.flatnonzero(keep).tolist()], duplicates)
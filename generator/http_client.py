@@ -0,0 +1,193 @@
+from __future__ import annotations
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import cfg
+from .concurrency import TokenBucket, api_limiter
+
+
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class HttpError(Exception):
+    """Falha definitiva após esgotar as tentativas."""
+
+
+class CircuitOpenError(HttpError):
+    """Circuito aberto: o endpoint falhou repetidamente e está em pausa."""
+
+
+def _retry_after_seconds(resp: requests.Response | None) -> float | None:
+    if resp is None:
+        return None
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return None
+
+
+class _Breaker:
+    def __init__(self):
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False  # meio-aberto: uma tentativa já saiu e ainda não voltou
+
+
+class HttpClient:
+    """Cliente HTTP compartilhado: pool keep-alive, retries com backoff exponencial + jitter
+    (respeitando `Retry-After`), circuit breaker e contadores por endpoint."""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 60.0,
+        pool_size: int = 10,
+        limiter: TokenBucket | None = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.limiter = limiter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._breakers: dict[str, _Breaker] = {}
+        self._stats: dict[str, dict] = {}
+
+    # -- circuit breaker -------------------------------------------------
+    def _check_circuit(self, endpoint: str) -> None:
+        with self._lock:
+            br = self._breakers.setdefault(endpoint, _Breaker())
+            if br.opened_at is None:
+                return
+            if not br.probing and time.monotonic() - br.opened_at >= self.breaker_cooldown:
+                # Meio-aberto: libera uma única tentativa; as demais falham rápido até ela voltar
+                br.probing = True
+                return
+        self._count(endpoint, "short_circuited")
+        raise CircuitOpenError(f"circuito aberto para {endpoint}")
+
+    def _record(self, endpoint: str, ok: bool) -> None:
+        with self._lock:
+            br = self._breakers.setdefault(endpoint, _Breaker())
+            probe, br.probing = br.probing, False
+            if ok:
+                br.failures = 0
+                br.opened_at = None
+            else:
+                br.failures += 1
+                # Falha da tentativa do meio-aberto reabre na hora, com novo cooldown
+                if probe or br.failures >= self.breaker_threshold:
+                    br.opened_at = time.monotonic()
+
+    def _release_probe(self, endpoint: str) -> None:
+        """Tentativa do meio-aberto interrompida sem resultado: a próxima chamada pode sondar."""
+        with self._lock:
+            self._breakers.setdefault(endpoint, _Breaker()).probing = False
+
+    # -- métricas --------------------------------------------------------
+    def _count(self, endpoint: str, field: str, latency: float | None = None) -> None:
+        with self._lock:
+            st = self._stats.setdefault(endpoint, {
+                "requests": 0, "errors": 0, "retries": 0, "short_circuited": 0,
+                "latency_total": 0.0, "latency_max": 0.0,
+            })
+            st[field] += 1
+            if latency is not None:
+                st["latency_total"] += latency
+                st["latency_max"] = max(st["latency_max"], latency)
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            out = {}
+            for ep, st in self._stats.items():
+                avg = st["latency_total"] / st["requests"] if st["requests"] else 0.0
+                out[ep] = {**st, "latency_avg": round(avg, 4)}
+            return out
+
+    # -- requisições -----------------------------------------------------
+    def _backoff(self, attempt: int, resp: requests.Response | None) -> float:
+        retry_after = _retry_after_seconds(resp)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter: uniforme em [0, base * 2^attempt]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method: str, url: str, *, limited: bool = True, **kwargs) -> requests.Response:
+        parsed = urlparse(url)
+        endpoint = f"{parsed.netloc}{parsed.path}"
+        last_exc: Exception | None = None
+        for attempt in range(self.max_retries + 1):
+            self._check_circuit(endpoint)
+            if limited and self.limiter is not None:
+                self.limiter.acquire()
+            resp = None
+            start = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                last_exc = exc
+            except BaseException:
+                self._release_probe(endpoint)
+                raise
+            finally:
+                self._count(endpoint, "requests", time.perf_counter() - start)
+            if resp is not None and resp.status_code not in RETRY_STATUS:
+                # Erro do cliente (4xx) não indica endpoint indisponível: não conta para o breaker
+                self._record(endpoint, True)
+                if resp.status_code >= 400:
+                    self._count(endpoint, "errors")
+                    # Com stream=True o corpo não foi lido: fechar devolve a conexão ao pool
+                    resp.close()
+                    resp.raise_for_status()
+                return resp
+            if resp is not None:
+                last_exc = HttpError(f"HTTP {resp.status_code} em {endpoint}")
+                resp.close()
+            self._count(endpoint, "errors")
+            self._record(endpoint, False)
+            if attempt < self.max_retries:
+                self._count(endpoint, "retries")
+                time.sleep(self._backoff(attempt, resp))
+        raise HttpError(f"falha após {self.max_retries + 1} tentativas em {endpoint}") from last_exc
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+
+client = HttpClient(
+    max_retries=cfg.HTTP_MAX_RETRIES,
+    backoff_base=cfg.HTTP_BACKOFF_BASE,
+    backoff_max=cfg.HTTP_BACKOFF_MAX,
+    breaker_threshold=cfg.HTTP_BREAKER_THRESHOLD,
+    breaker_cooldown=cfg.HTTP_BREAKER_COOLDOWN,
+    pool_size=max(10, cfg.GEN_CONCURRENCY),
+    limiter=api_limiter,
+)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import hashlib
+import os
+
+from .config import cfg
+from .metrics import metrics
+from .output_store import output_store
+
+try:  # Pillow é opcional: sem ele, a capa original é usada como antes
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None
+
+
+FORMATS = (("webp", "image/webp", "WEBP"), ("jpg", "image/jpeg", "JPEG"))
+SIZES = "(max-width: 900px) 100vw, 852px"
+
+
+def _widths() -> list[int]:
+    return sorted({int(w) for w in cfg.IMAGE_WIDTHS.split(",") if w.strip()})
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def derive(src_path: str) -> dict | None:
+    """Gera derivados redimensionados (WebP + JPEG em várias larguras) com hash de conteúdo no nome.
+
+    Derivados já existentes são reaproveitados (o nome muda se a imagem de origem mudar).
+    Roda dentro do pool de geração, então várias capas são processadas em paralelo
+    (o Pillow libera o GIL ao redimensionar/codificar).
+    Retorna dados para `srcset`/`sizes` ou None se não houver Pillow ou a origem for vetorial.
+    """
+    if Image is None or not output_store.exists(src_path) or src_path.endswith(".svg"):
+        return None
+    slug = os.path.splitext(os.path.basename(src_path))[0]
+    src_path = output_store.locate(src_path)  # capa nova deste build ainda está no staging
+    digest = _file_hash(src_path)
+    outdir = os.path.join(cfg.ASSETS_DIR, "r")
+
+    with Image.open(src_path) as im:
+        src_w, src_h = im.size
+        max_w = min(src_w, max(_widths(), default=src_w))
+        widths = [w for w in _widths() if w < max_w] + [max_w]
+        variants: dict[str, list[tuple[str, int, int]]] = {ext: [] for ext, _, _ in FORMATS}
+        loaded = None
+        for w in widths:
+            h = round(src_h * w / src_w)
+            for ext, _mime, pil_format in FORMATS:
+                name = f"{slug}-{w}.{digest}.{ext}"
+                path = os.path.join(outdir, name)
+                output_store.claim(path)
+                if not output_store.exists(path):
+                    if loaded is None:
+                        loaded = im.convert("RGB")
+                    resized = loaded if w == src_w else loaded.resize((w, h), Image.LANCZOS)
+                    tmp = output_store.temp_path(path)
+                    resized.save(tmp, pil_format, quality=cfg.IMAGE_QUALITY, optimize=True, **({"method": 6} if ext == "webp" else {"progressive": True}))
+                    output_store.settle(tmp, path)
+                    metrics.incr("image.derivatives_encoded")
+                variants[ext].append((f"{cfg.SITE_URL}/assets/r/{name}", w, h))
+
+    largest = variants["jpg"][-1]
+    return {
+        "src": largest[0],
+        "width": largest[1],
+        "height": largest[2],
+        "sizes": SIZES,
+        "sources": [
+            {"type": mime, "srcset": ", ".join(f"{url} {w}w" for url, w, _ in variants[ext])}
+            for ext, mime, _ in FORMATS
+        ],
+    }
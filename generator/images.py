@@ -1,12 +1,15 @@
 from __future__ import annotations
 import base64
 import os
-import requests
 from .config import cfg
-from .utils import ensure_dir, slugify
+from .http_client import client
+from .image_variants import derive
+from .metrics import metrics
+from .output_store import output_store
+from .utils import slugify
 
 
-OPENROUTER_IMAGES_URL = "https://openrouter.ai/api/v1/images"
+OPENROUTER_IMAGES_URL = f"{cfg.OPENROUTER_BASE_URL}/images"
 
 
 def _image_prompt(keyword: str, site_name: str) -> str:
@@ -17,15 +20,18 @@ def _image_prompt(keyword: str, site_name: str) -> str:
     )
 
 
-def _save_bytes(path: str, content: bytes) -> str:
-    ensure_dir(os.path.dirname(path))
-    with open(path, "wb") as f:
-        f.write(content)
+def _save_b64(path: str, data: str, chunk: int = 1 << 20) -> str:
+    """Decodifica base64 em blocos direto para o arquivo, sem montar o binário inteiro em memória."""
+    chunk -= chunk % 4
+    tmp = output_store.temp_path(path)
+    with open(tmp, "wb") as f:
+        for i in range(0, len(data), chunk):
+            f.write(base64.b64decode(data[i:i + chunk]))
+    output_store.settle(tmp, path)
     return path
 
 
 def _save_placeholder_svg(slug: str, title: str) -> str:
-    ensure_dir(cfg.ASSETS_DIR)
     path = os.path.join(cfg.ASSETS_DIR, f"{slug}.svg")
     svg = f"""
     <svg xmlns='http://www.w3.org/2000/svg' width='1200' height='630'>
@@ -42,30 +48,53 @@ def _save_placeholder_svg(slug: str, title: str) -> str:
       <text x='600' y='360' font-size='44' text-anchor='middle' fill='#e6e8eb' font-family='Inter, sans-serif'>{title}</text>
     </svg>
     """.strip()
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(svg)
+    output_store.write_text(path, svg)
     return path
 
 
+def _drop_placeholder(slug: str) -> None:
+    svg = os.path.join(cfg.ASSETS_DIR, f"{slug}.svg")
+    for path in (svg, svg + ".gz"):
+        if os.path.exists(path):
+            output_store.remove(path)
+
+
+def existing_image(keyword: str, title: str) -> tuple[str, str] | None:
+    """Retorna (abs_url, alt) de uma capa já gerada em execuções anteriores, sem chamar a API."""
+    slug = slugify(keyword)
+    for ext in ("png", "svg"):
+        if output_store.exists(os.path.join(cfg.ASSETS_DIR, f"{slug}.{ext}")):
+            return (f"{cfg.SITE_URL}/assets/{slug}.{ext}", f"Imagem de capa: {title}")
+    return None
+
+
+def placeholder_image(keyword: str, title: str) -> tuple[str, str]:
+    """Capa placeholder (SVG local, sem chamada à API); retorna (abs_url, alt)."""
+    slug = slugify(keyword)
+    _save_placeholder_svg(slug, title)
+    return (f"{cfg.SITE_URL}/assets/{slug}.svg", f"Imagem de capa: {title}")
+
+
+def responsive_image(keyword: str) -> dict | None:
+    """Derivados responsivos (srcset) da capa raster do artigo, se houver."""
+    return derive(os.path.join(cfg.ASSETS_DIR, f"{slugify(keyword)}.png"))
+
+
 def generate_image(keyword: str, title: str) -> tuple[str, str] | None:
     """Gera imagem para o artigo e retorna (abs_url, alt). Usa OpenRouter se possível; caso contrário, placeholder SVG.
 
-    Retorna None se imagens estiverem desabilitadas.
+    Retorna None se imagens estiverem desabilitadas. Quando a capa real chega, o placeholder antigo sai no commit.
     """
     if not cfg.GENERATE_IMAGES:
         return None
 
     slug = slugify(keyword)
     alt = f"Imagem de capa: {title}"
-    # Caminhos de saída
     out_png = os.path.join(cfg.ASSETS_DIR, f"{slug}.png")
-    out_svg = os.path.join(cfg.ASSETS_DIR, f"{slug}.svg")
 
-    # Se já existe arquivo (de execuções anteriores), reusa
-    if os.path.exists(out_png):
+    # Se já existe capa raster (de execuções anteriores), reusa; o SVG é só placeholder e pode ser trocado
+    if output_store.exists(out_png):
         return (f"{cfg.SITE_URL}/assets/{slug}.png", alt)
-    if os.path.exists(out_svg):
-        return (f"{cfg.SITE_URL}/assets/{slug}.svg", alt)
 
     # Tenta via OpenRouter se houver chave
     if cfg.OPENROUTER_API_KEY:
@@ -82,8 +111,8 @@ def generate_image(keyword: str, title: str) -> tuple[str, str] | None:
                 "size": "1200x630",
                 "response_format": "b64_json",
             }
-            resp = requests.post(OPENROUTER_IMAGES_URL, headers=headers, json=payload, timeout=90)
-            resp.raise_for_status()
+            with metrics.timer("image.request", histogram=True):
+                resp = client.post(OPENROUTER_IMAGES_URL, headers=headers, json=payload, timeout=90)
             data = resp.json()
             img_b64 = None
             if isinstance(data, dict) and data.get("data"):
@@ -92,18 +121,25 @@ def generate_image(keyword: str, title: str) -> tuple[str, str] | None:
                 url = item.get("url")
                 if url and not img_b64:
                     # baixa do URL
-                    r2 = requests.get(url, timeout=60)
-                    r2.raise_for_status()
-                    _save_bytes(out_png, r2.content)
+                    r2 = client.get(url, timeout=60, limited=False, stream=True)
+                    tmp = output_store.temp_path(out_png)
+                    with open(tmp, "wb") as f:
+                        for block in r2.iter_content(1 << 16):
+                            f.write(block)
+                    output_store.settle(tmp, out_png)
+                    metrics.incr("image.generated")
+                    _drop_placeholder(slug)
                     return (f"{cfg.SITE_URL}/assets/{slug}.png", alt)
             if img_b64:
-                content = base64.b64decode(img_b64)
-                _save_bytes(out_png, content)
+                _save_b64(out_png, img_b64)
+                metrics.incr("image.generated")
+                _drop_placeholder(slug)
                 return (f"{cfg.SITE_URL}/assets/{slug}.png", alt)
         except Exception:
             pass
 
     # Fallback: placeholder SVG local
-    path = _save_placeholder_svg(slug, title)
+    metrics.incr("image.placeholder")
+    _save_placeholder_svg(slug, title)
     return (f"{cfg.SITE_URL}/assets/{slug}.svg", alt)
 
@@ -0,0 +1,86 @@
+from __future__ import annotations
+import os
+
+from .config import cfg
+from .manifest import BuildManifest, content_digest, template_digest
+from .output_store import output_store
+from .posts import PostMeta
+from .renderer import Renderer
+from .topics import TOPIC_LABELS, topic_of
+
+
+def paginate(items: list, size: int) -> list[list]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)] or [[]]
+
+
+def page_path(base: str, n: int) -> str:
+    """Caminho relativo (ao site) da página `n` de uma listagem com raiz `base` ("" ou "temas/x/")."""
+    return base if n == 1 else f"{base}page/{n}/"
+
+
+def _pagination(base: str, n: int, pages: int) -> dict:
+    return {
+        "page": n,
+        "pages": pages,
+        "prev": page_path(base, n - 1) if n > 1 else None,
+        "next": page_path(base, n + 1) if n < pages else None,
+    }
+
+
+def _prune_pages(base: str, pages: int) -> None:
+    """Remove diretórios `page/N/` além da última página atual."""
+    n = pages + 1
+    while os.path.isdir(os.path.join(cfg.OUTPUT_DIR, page_path(base, n))):
+        output_store.remove(os.path.join(cfg.OUTPUT_DIR, page_path(base, n)))
+        n += 1
+
+
+def write_listing(
+    renderer: Renderer,
+    manifest: BuildManifest,
+    template: str,
+    base: str,
+    posts: list[PostMeta],
+    first_page: dict | None = None,
+    context: dict | None = None,
+) -> list[dict]:
+    """Grava uma listagem paginada; só regrava páginas cujo conjunto de posts (ou navegação) mudou.
+
+    `first_page` entra apenas no contexto da página 1 (ex.: lista de hubs na home).
+    Retorna as URLs {"loc", "lastmod"} para o sitemap.
+    """
+    tpl_digest = template_digest(template, "_pagination.html", "base.html")
+    chunks = paginate(posts, cfg.INDEX_PAGE_SIZE)
+    urls = []
+    for n, chunk in enumerate(chunks, 1):
+        rel = page_path(base, n)
+        key = rel.rstrip("/") or "index"
+        outdir = os.path.join(cfg.OUTPUT_DIR, rel)
+        ctx = {**(context or {}), **((first_page or {}) if n == 1 else {}), "pagination": _pagination(base, n, len(chunks))}
+        digest = content_digest([tpl_digest, ctx, [(p.slug, p.title, p.description) for p in chunk]])
+        if manifest.update(key, digest, os.path.join(outdir, "index.html")):
+            renderer.render_listing(template, outdir, posts=chunk, **ctx)
+        urls.append({"loc": f"{cfg.SITE_URL}/{rel}", "lastmod": manifest.lastmod(key)})
+    _prune_pages(base, len(chunks))
+    return urls
+
+
+def build_listings(renderer: Renderer, manifest: BuildManifest, posts: list[PostMeta]) -> list[dict]:
+    """Home paginada + hubs por tema (`/temas/<tema>/`). `posts` já deve vir ordenado."""
+    groups: dict[str, list[PostMeta]] = {}
+    for p in posts:
+        groups.setdefault(topic_of(p.keyword), []).append(p)
+    hubs = [
+        {"slug": t, "label": TOPIC_LABELS.get(t, t), "count": len(groups[t]), "path": f"temas/{t}/"}
+        for t in TOPIC_LABELS
+        if t in groups
+    ]
+
+    urls = write_listing(renderer, manifest, "index.html", "", posts, first_page={"hubs": hubs})
+    for hub in hubs:
+        urls += write_listing(renderer, manifest, "hub.html", hub["path"], groups[hub["slug"]], context={"hub": hub})
+
+    # Hubs que ficaram sem posts
+    output_store.prune(os.path.join(cfg.OUTPUT_DIR, "temas"), groups)
+    return urls
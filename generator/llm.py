@@ -2,19 +2,104 @@ from __future__ import annotations
 import json
 import os
 import random
+import re
 import textwrap
-from typing import Optional
-import requests
+import time
+from typing import Any, Callable, Iterable, Optional
 
 from .config import cfg
+from .concurrency import CallBudget
+from .http_client import client
+from .llm_cache import llm_cache
+from .metrics import metrics
 
 
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_URL = f"{cfg.OPENROUTER_BASE_URL}/chat/completions"
+DEFAULT_TEMPERATURE = 0.6
 
 
-def call_openrouter(system: str, user: str, temperature: float = 0.6) -> Optional[str]:
+TITLE_MAX = 62
+DESC_MAX = 150
+MIN_BODY_CHARS = 200
+# Streaming: grava o checkpoint a cada tantos caracteres novos
+CHECKPOINT_CHARS = 1024
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def _join(prefix: str, text: str) -> str:
+    """Texto retomado: `prefix` + continuação (ou só a continuação, se o modelo recomeçou do zero)."""
+    if not prefix or text.startswith(prefix[:200]):
+        return text
+    return prefix + text
+
+
+def _stream(headers: dict, payload: dict, prefix: str, checkpoint: Callable[[str], None]) -> tuple[str, bool]:
+    """Chat completion via SSE, com limite de inatividade entre tokens (`LLM_IDLE_TIMEOUT`) e sem limite total.
+
+    Retorna (texto, completo). O texto inclui `prefix` (a parte retomada); enquanto chega, e também
+    se a transmissão parar no meio, ele é salvo via `checkpoint`.
+    """
+    idle = cfg.LLM_IDLE_TIMEOUT
+    parts = [prefix] if prefix else []
+    size = saved = len(prefix)
+    complete = False
+    last = time.monotonic()
+    try:
+        resp = client.post(OPENROUTER_URL, headers=headers, json=dict(payload, stream=True), stream=True, timeout=(10, idle))
+        with resp:
+            for line in resp.iter_lines(chunk_size=None):
+                now = time.monotonic()
+                if line.startswith(b"data:"):
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        break
+                    event = json.loads(data)
+                    if event.get("error"):
+                        break
+                    choice = (event.get("choices") or [{}])[0]
+                    piece = (choice.get("delta") or {}).get("content") or ""
+                    if piece:
+                        if not parts:
+                            piece = piece.lstrip()
+                        parts.append(piece)
+                        size += len(piece)
+                        last = now
+                    reason = choice.get("finish_reason")
+                    if reason:
+                        # "length": cortado pelo limite de tokens; o resto vem numa retomada
+                        complete = reason != "length"
+                elif now - last > idle:
+                    # Só comentários de keep-alive (": OPENROUTER PROCESSING") e nenhum token novo
+                    break
+                if size - saved >= CHECKPOINT_CHARS:
+                    checkpoint("".join(parts))
+                    saved = size
+    except Exception:
+        complete = False
+    text = "".join(parts)
+    if not complete and size > saved:
+        checkpoint(text)
+    return text.rstrip(), complete
+
+
+def _request(
+    system: str,
+    user: str,
+    temperature: float,
+    budget: CallBudget | None,
+    json_mode: bool = False,
+) -> Optional[str]:
+    """Uma chamada à API, sem cache: exige chave e vaga em `budget["count"]`; a vaga volta se nada vier.
+
+    Com `LLM_STREAM`, a resposta vem por SSE e uma resposta interrompida numa execução anterior é
+    retomada do checkpoint (o texto salvo vai como início da mensagem do assistente). Retorna só
+    respostas completas.
+    """
     if not cfg.OPENROUTER_API_KEY:
         return None
+    if budget is not None and not budget.try_spend("count"):
+        return None
     headers = {
         "Authorization": f"Bearer {cfg.OPENROUTER_API_KEY}",
         "Content-Type": "application/json",
@@ -30,38 +115,330 @@ def call_openrouter(system: str, user: str, temperature: float = 0.6) -> Optiona
         ],
         "temperature": temperature,
     }
+    if json_mode:
+        # Modelos sem suporte ignoram; a validação abaixo não depende disso
+        payload["response_format"] = {"type": "json_object"}
+    model = cfg.OPENROUTER_MODEL
+    got_any = False
+    content = None
+    if cfg.LLM_STREAM:
+        prefix = llm_cache.partial(model, system, user, temperature) or ""
+        if prefix:
+            payload["messages"].append({"role": "assistant", "content": prefix})
+            metrics.incr("llm.resumed")
+
+        def checkpoint(text: str) -> None:
+            llm_cache.checkpoint(model, system, user, temperature, text)
+
+        with metrics.timer("llm.request", histogram=True):
+            text, complete = _stream(headers, payload, prefix, checkpoint)
+        got_any = len(text) > len(prefix)
+        if complete:
+            content = _join(prefix, text[len(prefix):]) if prefix else text
+            llm_cache.drop_partial(model, system, user, temperature)
+        elif got_any:
+            metrics.incr("llm.interrupted")
+    else:
+        try:
+            with metrics.timer("llm.request", histogram=True):
+                resp = client.post(OPENROUTER_URL, headers=headers, json=payload, timeout=60)
+            data = resp.json()
+            content = data["choices"][0]["message"]["content"].strip()
+        except Exception:
+            content = None
+    if not content:
+        metrics.incr("llm.failed")
+        # Tokens recebidos (mesmo incompletos) custaram a chamada
+        if budget is not None and not got_any:
+            budget.refund("count")
+        return None
+    metrics.incr("llm.generated")
+    return content
+
+
+def salvage(system: str, user: str, temperature: float = DEFAULT_TEMPERATURE, json_mode: bool = False) -> Optional[str]:
+    """O que dá para aproveitar do checkpoint de uma resposta interrompida, sem chamar a API.
+
+    Texto: corta no último parágrafo completo. JSON: ver `_salvage_json`. Quem chama valida o
+    resultado; nada disso vai para o cache, e o checkpoint fica para a retomada.
+    """
+    partial = llm_cache.partial(cfg.OPENROUTER_MODEL, system, user, temperature)
+    if not partial:
+        return None
+    if json_mode:
+        return _salvage_json(partial)
+    cut = partial.rfind("\n\n")
+    return partial[:cut].rstrip() if cut >= MIN_BODY_CHARS else None
+
+
+_PARAGRAPH = re.compile(r'(?<!\\)((?:\\\\)*)\\n\s*\\n')  # "\n\n" escapado, sem contar um "\\n" literal
+
+
+def _salvage_json(partial: str) -> Optional[str]:
+    """Objeto JSON com os membros completos de um prefixo e o `body_md` cortado no último parágrafo.
+
+    Lê membro a membro com `raw_decode`, em qualquer ordem de chaves; o primeiro que não fecha
+    encerra a leitura. Se for a string do `body_md`, ela é cortada no último `\n\n` escapado e
+    fechada; se o corpo completo já veio antes, ele basta. Membros depois do corte se perdem.
+    """
+    decoder = json.JSONDecoder()
+    text = _FENCE.sub("", partial.strip())
+    pos = text.find("{")
+    if pos < 0:
+        return None
+    data: dict[str, Any] = {}
+    pos += 1
+    while True:
+        pos = _skip_ws(text, pos)
+        if text[pos:pos + 1] == ",":
+            pos = _skip_ws(text, pos + 1)
+        if pos >= len(text) or text[pos] == "}":
+            break
+        try:
+            key, pos = decoder.raw_decode(text, pos)
+        except ValueError:
+            break
+        pos = _skip_ws(text, pos)
+        if not isinstance(key, str) or text[pos:pos + 1] != ":":
+            break
+        start = _skip_ws(text, pos + 1)
+        try:
+            data[key], pos = decoder.raw_decode(text, start)
+        except ValueError:
+            if key == "body_md" and text[start:start + 1] == '"':
+                data[key] = _cut_string(text, start)
+            break
+    body = data.get("body_md")
+    if not isinstance(body, str) or len(body.strip()) < MIN_BODY_CHARS:
+        return None
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _cut_string(text: str, start: int) -> Optional[str]:
+    """A string JSON aberta em `start`, interrompida, até o último parágrafo completo."""
+    cut = None
+    for m in _PARAGRAPH.finditer(text, start + 1):
+        cut = m.start() + len(m.group(1))
+    if cut is None:
+        return None
     try:
-        resp = requests.post(OPENROUTER_URL, headers=headers, json=payload, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
-        return data["choices"][0]["message"]["content"].strip()
-    except Exception:
+        return json.loads(text[start:cut] + '"')
+    except ValueError:
+        return None
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+
+def call_openrouter(
+    system: str,
+    user: str,
+    temperature: float = DEFAULT_TEMPERATURE,
+    budget: CallBudget | None = None,
+    offline: bool = False,
+    validate: Callable[[str], bool] | None = None,
+    json_mode: bool = False,
+) -> Optional[str]:
+    """Chat completion com cache por (modelo, prompts, temperatura).
+
+    Em cache miss, só chama a API se houver chave, `offline` for falso e houver vaga em `budget["count"]`.
+    Com `validate`, respostas reprovadas (em cache ou novas) contam como ausentes e não entram no cache.
+    Sem resposta completa, devolve o que der para aproveitar de um streaming interrompido (`salvage`).
+    """
+    cached = llm_cache.get(cfg.OPENROUTER_MODEL, system, user, temperature)
+    if cached is not None and (validate is None or validate(cached)):
+        return cached
+    return _complete(system, user, temperature, budget, offline, validate, json_mode)
+
+
+def _complete(
+    system: str,
+    user: str,
+    temperature: float,
+    budget: CallBudget | None,
+    offline: bool = False,
+    validate: Callable[[str], bool] | None = None,
+    json_mode: bool = False,
+) -> Optional[str]:
+    """Resposta nova (validada e posta no cache) ou, se ela não vier, o aproveitável do checkpoint."""
+    content = None if offline else _request(system, user, temperature, budget, json_mode)
+    if content is not None and validate is not None and not validate(content):
+        metrics.incr("llm.invalid")
+        content = None
+    if content is not None:
+        llm_cache.put(cfg.OPENROUTER_MODEL, system, user, temperature, content)
+        return content
+    partial = salvage(system, user, temperature, json_mode)
+    if partial is not None and (validate is None or validate(partial)):
+        metrics.incr("llm.salvaged")
+        return partial
+    return None
+
+
+# -- JSON estruturado -----------------------------------------------------------
+def parse_json(content: str | None) -> Any:
+    """JSON de uma resposta do modelo, tolerando cercas ```json e texto em volta do objeto."""
+    if not content:
+        return None
+    text = _FENCE.sub("", content.strip())
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
         return None
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+
 
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
 
-def gen_title_and_description(keyword: str) -> tuple[str, str]:
+
+def validate_metadata(data: Any) -> tuple[str, str] | None:
+    """(título, description) de um objeto `{"title", "description"}`; None se faltar algo ou o tipo for errado.
+
+    Textos longos demais são encurtados em vez de descartados.
+    """
+    if not isinstance(data, dict):
+        return None
+    title, desc = data.get("title"), data.get("description")
+    if not isinstance(title, str) or not isinstance(desc, str):
+        return None
+    title, desc = " ".join(title.split()), " ".join(desc.split())
+    if not title or not desc:
+        return None
+    return _clip(title, TITLE_MAX), _clip(desc, DESC_MAX)
+
+
+def validate_article(data: Any) -> dict | None:
+    """Objeto `{"title", "description", "body_md"}` normalizado, ou None se inválido."""
+    meta = validate_metadata(data)
+    if meta is None:
+        return None
+    body = data.get("body_md")
+    if not isinstance(body, str) or len(body.strip()) < MIN_BODY_CHARS:
+        return None
+    return {"title": meta[0], "description": meta[1], "body_md": body.strip()}
+
+
+def _is_metadata(content: str) -> bool:
+    return validate_metadata(parse_json(content)) is not None
+
+
+def _is_article(content: str) -> bool:
+    return validate_article(parse_json(content)) is not None
+
+
+# -- título e description -------------------------------------------------------
+def metadata_prompt(keyword: str) -> tuple[str, str]:
+    """Retorna (system, user) do prompt de título/description de uma palavra-chave."""
     prompt = f"""
     Gere um título forte (no máximo 62 caracteres) e uma meta description (no máximo 150 caracteres) para um artigo em PT-BR sobre: "{keyword}". Responda em JSON com chaves title e description.
     """.strip()
     system = "Você é um especialista em SEO e copywriting em português do Brasil."
-    content = call_openrouter(system, prompt)
-    if content:
-        try:
-            data = json.loads(content)
-            title = data.get("title") or keyword.title()
-            desc = data.get("description") or f"Guia prático sobre {keyword}."
-            return title.strip(), desc.strip()
-        except Exception:
-            pass
-    # Fallback
+    return system, prompt
+
+
+def fallback_metadata(keyword: str) -> tuple[str, str]:
     base = keyword.strip().capitalize()
-    title = base if len(base) <= 62 else base[:59] + "..."
+    title = base if len(base) <= TITLE_MAX else base[:TITLE_MAX - 3] + "..."
     desc = f"Guia prático para {keyword} em casa."
     return title, desc
 
 
-def gen_article_body(keyword: str, outline_h2: list[str]) -> str:
-    # Quando possível, pede um texto estruturado; caso contrário, gera fallback simples.
+def cached_metadata(keyword: str) -> tuple[str, str] | None:
+    system, prompt = metadata_prompt(keyword)
+    return validate_metadata(parse_json(call_openrouter(system, prompt, offline=True, validate=_is_metadata)))
+
+
+def _remember_metadata(keyword: str, meta: tuple[str, str]) -> None:
+    """Guarda título/description sob a chave do prompt individual (vale para lote e chamada estruturada)."""
+    system, prompt = metadata_prompt(keyword)
+    content = json.dumps({"title": meta[0], "description": meta[1]}, ensure_ascii=False)
+    llm_cache.put(cfg.OPENROUTER_MODEL, system, prompt, DEFAULT_TEMPERATURE, content)
+
+
+def gen_title_and_description(keyword: str, budget: CallBudget | None = None, offline: bool = False) -> tuple[str, str]:
+    system, prompt = metadata_prompt(keyword)
+    content = call_openrouter(system, prompt, budget=budget, offline=offline, validate=_is_metadata, json_mode=True)
+    return validate_metadata(parse_json(content)) or fallback_metadata(keyword)
+
+
+def metadata_batch_prompt(keywords: list[str]) -> tuple[str, str]:
+    """Retorna (system, user) do prompt de título/description de várias palavras-chave, numeradas a partir de 1."""
+    items = "\n".join(f'{i}. "{kw}"' for i, kw in enumerate(keywords, 1))
+    prompt = f"""
+    Para cada palavra-chave numerada abaixo, gere um título forte (no máximo {TITLE_MAX} caracteres) e uma meta description (no máximo {DESC_MAX} caracteres) para um artigo em PT-BR.
+    Responda em JSON no formato {{"items": [{{"id": 1, "title": "...", "description": "..."}}]}}, um item por palavra-chave, com o mesmo número em id.
+
+    {items}
+    """.strip()
+    system = "Você é um especialista em SEO e copywriting em português do Brasil."
+    return system, prompt
+
+
+def gen_metadata_batch(keywords: Iterable[str], budget: CallBudget | None = None) -> dict[str, tuple[str, str]]:
+    """Título/description de várias palavras-chave numa requisição só.
+
+    Cada item é validado sozinho: os bons vão para o cache sob a chave do prompt individual
+    (`gen_title_and_description` passa a achá-los, independentemente da composição do lote);
+    itens ausentes ou malformados ficam fora do resultado e aquela palavra-chave segue o caminho
+    individual (chamada própria ou fallback).
+    """
+    keywords = list(dict.fromkeys(keywords))
+    if not keywords:
+        return {}
+    system, prompt = metadata_batch_prompt(keywords)
+    data = parse_json(_request(system, prompt, DEFAULT_TEMPERATURE, budget, json_mode=True))
+    items = data.get("items") if isinstance(data, dict) else data
+    found: dict[str, tuple[str, str]] = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("id")) - 1
+        except (TypeError, ValueError):
+            continue
+        meta = validate_metadata(item)
+        if meta is None or not 0 <= index < len(keywords) or keywords[index] in found:
+            continue
+        found[keywords[index]] = meta
+        _remember_metadata(keywords[index], meta)
+    metrics.incr("llm.batch_items", len(found))
+    metrics.incr("llm.batch_rejected", len(keywords) - len(found))
+    return found
+
+
+def metadata_pending(keyword: str, outline_h2: list[str]) -> bool:
+    """Se título/description de `keyword` exigiriam uma chamada própria — ou seja, se vale pô-la num lote.
+
+    Não exigem quando já estão em cache ou quando virão junto com o corpo na chamada estruturada.
+    """
+    model = cfg.OPENROUTER_MODEL
+    if llm_cache.has(model, *metadata_prompt(keyword), DEFAULT_TEMPERATURE):
+        return False
+    if not (cfg.LLM_STRUCTURED and cfg.GENERATE_WITH_LLM):
+        return True
+    return llm_cache.has(model, *article_body_prompt(keyword, outline_h2), DEFAULT_TEMPERATURE)
+
+
+def body_cached(keyword: str, outline_h2: list[str]) -> bool:
+    """Se há corpo completo em cache para `keyword` (pelo prompt de corpo ou, no modo estruturado, pelo estruturado)."""
+    model = cfg.OPENROUTER_MODEL
+    if llm_cache.has(model, *article_body_prompt(keyword, outline_h2), DEFAULT_TEMPERATURE):
+        return True
+    return cfg.LLM_STRUCTURED and llm_cache.has(model, *article_prompt(keyword, outline_h2), DEFAULT_TEMPERATURE)
+
+
+def article_body_prompt(keyword: str, outline_h2: list[str]) -> tuple[str, str]:
+    """Retorna (system, user) do prompt do corpo do artigo."""
     outline = "\n".join(f"- {h}" for h in outline_h2)
     prompt = f"""
     Escreva um artigo objetivo em PT-BR para iniciantes, sobre "{keyword}".
@@ -77,11 +454,10 @@ def gen_article_body(keyword: str, outline_h2: list[str]) -> str:
     - Não invente dados. Não inclua links.
     """.strip()
     system = "Você é um redator especialista em café em casa e métodos de preparo."
-    content = call_openrouter(system, prompt)
-    if content:
-        return content
+    return system, prompt
 
-    # Fallback simples
+
+def fallback_body(keyword: str, outline_h2: list[str]) -> str:
     blocks = [
         f"{keyword.capitalize()} pode parecer complexo, mas com algumas escolhas simples você consegue resultados consistentes em casa.",
     ]
@@ -97,3 +473,67 @@ def gen_article_body(keyword: str, outline_h2: list[str]) -> str:
     blocks.append("\n### Resumo prático\n- Comece simples\n- Padronize medidas\n- Ajuste moagem\n- Anote o que funcionou\n")
     return "\n\n".join(blocks)
 
+
+def gen_article_body(keyword: str, outline_h2: list[str], budget: CallBudget | None = None, offline: bool = False) -> str:
+    # Quando possível, pede um texto estruturado; caso contrário, gera fallback simples.
+    system, prompt = article_body_prompt(keyword, outline_h2)
+    content = call_openrouter(system, prompt, budget=budget, offline=offline)
+    return content or fallback_body(keyword, outline_h2)
+
+
+def article_prompt(keyword: str, outline_h2: list[str]) -> tuple[str, str]:
+    """Retorna (system, user) do prompt estruturado: título, description e corpo num único objeto JSON."""
+    _system, body = article_body_prompt(keyword, outline_h2)
+    prompt = f"""
+    {body}
+
+    Responda somente com um objeto JSON com as chaves:
+    - "title": título forte, no máximo {TITLE_MAX} caracteres;
+    - "description": meta description, no máximo {DESC_MAX} caracteres;
+    - "body_md": o artigo em Markdown, sem o título principal.
+    """.strip()
+    system = "Você é um redator especialista em café em casa, métodos de preparo e SEO em português do Brasil."
+    return system, prompt
+
+
+def gen_article(
+    keyword: str,
+    outline_h2: list[str],
+    budget: CallBudget | None = None,
+    offline: bool = False,
+) -> tuple[str, str, str]:
+    """(título, description, corpo) com uma única chamada estruturada, validada como JSON.
+
+    Respostas em cache dos prompts separados continuam valendo: título/description já em cache têm
+    prioridade (um post publicado não muda de título) e um corpo em cache (inclusive os importados
+    de `cache/llm/<slug>.md`) dispensa a chamada. Se ela falhar ou vier inválida, os dois vêm do
+    checkpoint de streaming, se aproveitável, ou caem no fallback, sem uma segunda requisição.
+    Com `offline`, o corpo só vem do cache, mas título/description ainda podem ser pedidos, como
+    em `gen_title_and_description`.
+    """
+    model = cfg.OPENROUTER_MODEL
+    meta = cached_metadata(keyword)
+    body_system, body_prompt = article_body_prompt(keyword, outline_h2)
+    body = None
+    if llm_cache.has(model, body_system, body_prompt, DEFAULT_TEMPERATURE):
+        body = llm_cache.get(model, body_system, body_prompt, DEFAULT_TEMPERATURE)
+
+    attempted = False
+    if body is None:
+        system, prompt = article_prompt(keyword, outline_h2)
+        content = llm_cache.get(model, system, prompt, DEFAULT_TEMPERATURE)
+        if content is None or not _is_article(content):
+            attempted = not offline
+            content = _complete(system, prompt, DEFAULT_TEMPERATURE, budget, offline, _is_article, json_mode=True)
+        data = validate_article(parse_json(content))
+        if data:
+            body = data["body_md"]
+            if meta is None:
+                meta = data["title"], data["description"]
+                _remember_metadata(keyword, meta)
+
+    if meta is None and not attempted:
+        system, prompt = metadata_prompt(keyword)
+        meta = validate_metadata(parse_json(_complete(system, prompt, DEFAULT_TEMPERATURE, budget, validate=_is_metadata, json_mode=True)))
+    title, description = meta or fallback_metadata(keyword)
+    return title, description, body or fallback_body(keyword, outline_h2)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .config import cfg
+from .utils import ensure_dir
+
+
+CACHE_FILE = "llm.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_model ON responses(model);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed);
+CREATE TABLE IF NOT EXISTS partials (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    updated REAL NOT NULL,
+    content TEXT NOT NULL
+);
+"""
+
+# Checkpoints de respostas interrompidas que ninguém retomou somem depois disso
+PARTIAL_MAX_AGE_DAYS = 7
+
+
+def cache_key(model: str, system: str, user: str, temperature: float) -> str:
+    raw = json.dumps([model, system, user, round(float(temperature), 4)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Cache de respostas do LLM endereçado por conteúdo (modelo, prompts, temperatura), em um único SQLite.
+
+    A tabela `partials` guarda, com a mesma chave, o texto já recebido de respostas em streaming que
+    não terminaram; ele é retomado na próxima chamada e apagado quando a resposta completa chega.
+
+    Um hit não escreve no banco: o novo `accessed` fica em memória e vai de uma vez em `flush`
+    (chamado por `evict`, no fim do build, e por `close`).
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(cfg.CACHE_DIR, CACHE_FILE)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._touched: dict[str, float] = {}   # chave → último acesso ainda não gravado
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            ensure_dir(os.path.dirname(self.path) or ".")
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def get(self, model: str, system: str, user: str, temperature: float) -> str | None:
+        key = cache_key(model, system, user, temperature)
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            return row[0]
+
+    def flush(self) -> None:
+        """Grava numa única transação os `accessed` dos hits desde o último flush."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._touched:
+            db = self._db()
+            db.executemany("UPDATE responses SET accessed = ? WHERE key = ?",
+                           [(ts, key) for key, ts in self._touched.items()])
+            db.commit()
+            self._touched.clear()
+
+    def has(self, model: str, system: str, user: str, temperature: float) -> bool:
+        """Consulta sem contar hit/miss nem tocar `accessed` (para decidir a ordem das buscas)."""
+        key = cache_key(model, system, user, temperature)
+        with self._lock:
+            return self._db().execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone() is not None
+
+    def put(self, model: str, system: str, user: str, temperature: float, content: str, replace: bool = True) -> None:
+        key = cache_key(model, system, user, temperature)
+        now = time.time()
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._lock:
+            db = self._db()
+            db.execute(
+                f"{verb} INTO responses (key, model, created, accessed, size, content) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, now, now, len(content.encode("utf-8")), content),
+            )
+            db.commit()
+
+    # -- checkpoints de streaming ------------------------------------------------
+    def partial(self, model: str, system: str, user: str, temperature: float) -> str | None:
+        key = cache_key(model, system, user, temperature)
+        with self._lock:
+            row = self._db().execute("SELECT content FROM partials WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def checkpoint(self, model: str, system: str, user: str, temperature: float, content: str) -> None:
+        key = cache_key(model, system, user, temperature)
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO partials (key, model, updated, content) VALUES (?, ?, ?, ?)",
+                (key, model, time.time(), content),
+            )
+            db.commit()
+
+    def drop_partial(self, model: str, system: str, user: str, temperature: float) -> None:
+        key = cache_key(model, system, user, temperature)
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM partials WHERE key = ?", (key,))
+            db.commit()
+
+    def invalidate_model(self, model: str) -> int:
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM partials WHERE model = ?", (model,))
+            cur = db.execute("DELETE FROM responses WHERE model = ?", (model,))
+            db.commit()
+            return cur.rowcount
+
+    def evict(self, max_bytes: int | None = None, max_age_days: float | None = None) -> int:
+        """Remove entradas mais antigas que `max_age_days` e, se preciso, as menos acessadas até caber em `max_bytes`."""
+        removed = 0
+        with self._lock:
+            self._flush()  # o LRU precisa dos acessos deste build
+            db = self._db()
+            stale = time.time() - PARTIAL_MAX_AGE_DAYS * 86400
+            db.execute("DELETE FROM partials WHERE updated < ?", (stale,))
+            if max_age_days:
+                cutoff = time.time() - max_age_days * 86400
+                removed += db.execute("DELETE FROM responses WHERE accessed < ?", (cutoff,)).rowcount
+            if max_bytes:
+                total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > max_bytes:
+                    doomed = []
+                    for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed ASC"):
+                        if total <= max_bytes:
+                            break
+                        doomed.append((key,))
+                        total -= size
+                    db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+                    removed += len(doomed)
+            db.commit()
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            db = self._db()
+            entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            by_model = dict(db.execute("SELECT model, COUNT(*) FROM responses GROUP BY model").fetchall())
+            partials = db.execute("SELECT COUNT(*) FROM partials").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "by_model": by_model,
+            "partials": partials,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._flush()
+                self._conn.close()
+                self._conn = None
+
+
+llm_cache = LLMCache()
@@ -0,0 +1,93 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+from .config import cfg
+from .utils import write_text, read_text
+
+
+MANIFEST_NAME = "build-manifest.json"
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def content_digest(data) -> str:
+    """Hash estável de qualquer estrutura serializável em JSON."""
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+_template_cache: dict[str, str] = {}
+_global_inputs: dict = {}
+
+
+def set_global_inputs(data: dict) -> None:
+    """Registra entradas comuns a todas as páginas (globais do site, assets com hash)."""
+    global _global_inputs
+    _global_inputs = dict(data)
+
+
+def forget_template_digests() -> None:
+    """Esquece os hashes memoizados (templates editados com o processo vivo, ex.: `serve --watch`)."""
+    _template_cache.clear()
+
+
+def template_digest(*names: str) -> str:
+    """Hash combinado dos templates usados por uma página e das entradas globais (memoizado por processo)."""
+    parts = []
+    for name in names:
+        if name not in _template_cache:
+            path = os.path.join(cfg.TEMPLATES_DIR, name)
+            h = hashlib.sha256()
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    h.update(f.read())
+            _template_cache[name] = h.hexdigest()
+        parts.append(_template_cache[name])
+    return content_digest([parts, _global_inputs])
+
+
+class BuildManifest:
+    """Registro persistente (em CACHE_DIR) do hash de entrada e da data de mudança de cada saída.
+
+    Chaves são identificadores lógicos de saída (ex.: "posts/<slug>", "index").
+    Entradas não tocadas durante a execução são descartadas ao salvar.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(cfg.CACHE_DIR, MANIFEST_NAME)
+        self.entries: dict[str, dict] = {}
+        self._seen: set[str] = set()
+        raw = read_text(self.path)
+        if raw:
+            try:
+                data = json.loads(raw)
+                self.entries = data.get("entries", {}) if isinstance(data, dict) else {}
+            except Exception:
+                self.entries = {}
+
+    def update(self, key: str, digest: str, output_path: str | None = None) -> bool:
+        """Registra o hash atual de `key` e retorna True se a saída precisa ser (re)gerada."""
+        self._seen.add(key)
+        entry = self.entries.get(key)
+        if entry and entry.get("hash") == digest:
+            return bool(output_path) and not os.path.exists(output_path)
+        self.entries[key] = {"hash": digest, "lastmod": _now_iso()}
+        return True
+
+    def discard(self, key: str) -> None:
+        """Remove a saída `key` (ex.: post de uma palavra-chave que saiu do arquivo)."""
+        self.entries.pop(key, None)
+        self._seen.discard(key)
+
+    def lastmod(self, key: str) -> str:
+        entry = self.entries.get(key)
+        return entry["lastmod"] if entry else _now_iso()
+
+    def save(self) -> None:
+        self.entries = {k: v for k, v in self.entries.items() if k in self._seen}
+        write_text(self.path, json.dumps({"entries": self.entries}, ensure_ascii=False, indent=0, sort_keys=True))
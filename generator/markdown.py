@@ -0,0 +1,141 @@
+from __future__ import annotations
+import re
+from html import escape
+
+
+# Conversor Markdown → HTML em uma única passada por linha, sem dependência externa.
+# Cobre o subconjunto que o LLM costuma gerar: títulos, parágrafos, listas (com e sem
+# número), citações, blocos de código, tabelas simples, separadores e ênfases/links/código inline.
+
+# Incrementar quando a saída mudar, para o manifest re-renderizar os posts
+MARKDOWN_VERSION = 3
+
+_BLOCK_RE = re.compile(
+    r"(?P<fence>```|~~~)(?P<lang>[\w+-]*)"
+    r"|(?P<hr>(?:-[ \t]*){3,}|(?:\*[ \t]*){3,}|(?:_[ \t]*){3,})$"
+    r"|(?P<hashes>#{1,6})[ \t]+(?=.*[^ \t#])(?P<htext>.*?)[ \t#]*$"  # "#" sozinho é texto
+    r"|[-*+][ \t]+(?P<ul>.*)"
+    r"|(?P<olnum>\d{1,9})[.)][ \t]+(?P<ol>.*)"
+    r"|>[ \t]?(?P<quote>.*)"
+)
+_TABLE_SEP_RE = re.compile(r"\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$")
+_INLINE_RE = re.compile(
+    r"`(?P<code>[^`\n]+)`"
+    r"|\*\*(?P<b1>\S(?:.*?\S)?)\*\*"
+    r"|__(?P<b2>\S(?:.*?\S)?)__"
+    r"|\*(?P<i1>\S(?:.*?\S)?)\*"
+    r"|(?<!\w)_(?P<i2>\S(?:.*?\S)?)_(?!\w)"
+    r"|\[(?P<ltext>[^\]\n]+)\]\((?P<href>(?:[^()\s]|\([^()\s]*\))+)(?:[ \t]+\"[^\"]*\")?\)"
+)
+_SAFE_HREF_RE = re.compile(r"(?:https?://|mailto:|/|#)", re.IGNORECASE)
+
+
+def _inline(text: str) -> str:
+    """Escapa HTML e aplica formatação inline (código, negrito, itálico, links seguros)."""
+    parts = []
+    pos = 0
+    for m in _INLINE_RE.finditer(text):
+        parts.append(escape(text[pos:m.start()], quote=False))
+        pos = m.end()
+        if m.group("code") is not None:
+            parts.append(f"<code>{escape(m.group('code'), quote=False)}</code>")
+        elif m.group("b1") is not None or m.group("b2") is not None:
+            parts.append(f"<strong>{_inline(m.group('b1') or m.group('b2'))}</strong>")
+        elif m.group("i1") is not None or m.group("i2") is not None:
+            parts.append(f"<em>{_inline(m.group('i1') or m.group('i2'))}</em>")
+        else:
+            label = _inline(m.group("ltext"))
+            href = m.group("href")
+            if _SAFE_HREF_RE.match(href):
+                parts.append(f'<a href="{escape(href)}">{label}</a>')
+            else:
+                parts.append(label)
+    parts.append(escape(text[pos:], quote=False))
+    return "".join(parts)
+
+
+def _cells(row: str) -> list[str]:
+    row = row.strip()
+    if row.startswith("|"):
+        row = row[1:]
+    if row.endswith("|"):
+        row = row[:-1]
+    return [c.strip() for c in row.split("|")]
+
+
+def markdown_to_html(md: str) -> str:
+    out: list[str] = []
+    para: list[str] = []
+    list_tag = ""
+    lines = md.splitlines()
+    n = len(lines)
+    i = 0
+
+    def flush() -> None:
+        nonlocal list_tag
+        if para:
+            out.append(f"<p>{_inline(chr(10).join(para))}</p>")
+            para.clear()
+        if list_tag:
+            out.append(f"</{list_tag}>")
+            list_tag = ""
+
+    while i < n:
+        line = lines[i].strip()
+        i += 1
+        if not line:
+            flush()
+            continue
+
+        m = _BLOCK_RE.match(line)
+        if m is None:
+            # Tabela: linha com "|" seguida de separador |---|
+            if "|" in line and i < n and "|" in lines[i] and _TABLE_SEP_RE.match(lines[i].strip()):
+                flush()
+                head = "".join(f"<th>{_inline(c)}</th>" for c in _cells(line))
+                i += 1
+                rows = []
+                while i < n and "|" in lines[i] and lines[i].strip():
+                    rows.append("<tr>" + "".join(f"<td>{_inline(c)}</td>" for c in _cells(lines[i])) + "</tr>")
+                    i += 1
+                out.append(f"<table>\n<thead><tr>{head}</tr></thead>\n<tbody>\n" + "\n".join(rows) + "\n</tbody>\n</table>")
+                continue
+            if list_tag:
+                flush()
+            para.append(line)
+            continue
+
+        if m.group("fence"):
+            flush()
+            fence, lang = m.group("fence"), m.group("lang")
+            code = []
+            while i < n and not lines[i].strip().startswith(fence):
+                code.append(lines[i])
+                i += 1
+            i += 1  # pula o fechamento
+            cls = f' class="language-{escape(lang)}"' if lang else ""
+            out.append(f"<pre><code{cls}>{escape(chr(10).join(code), quote=False)}</code></pre>")
+        elif m.group("hr") is not None:
+            flush()
+            out.append("<hr>")
+        elif m.group("hashes"):
+            flush()
+            level = len(m.group("hashes"))
+            out.append(f"<h{level}>{_inline(m.group('htext'))}</h{level}>")
+        elif m.group("ul") is not None or m.group("ol") is not None:
+            tag = "ul" if m.group("ul") is not None else "ol"
+            if para or list_tag != tag:
+                flush()
+                start = m.group("olnum")
+                out.append(f'<ol start="{int(start)}">' if tag == "ol" and start and int(start) != 1 else f"<{tag}>")
+                list_tag = tag
+            out.append(f"<li>{_inline(m.group(tag))}</li>")
+        else:
+            flush()
+            quoted = [m.group("quote")]
+            while i < n and lines[i].lstrip().startswith(">"):
+                quoted.append(lines[i].lstrip()[1:].removeprefix(" "))
+                i += 1
+            out.append(f"<blockquote>\n{markdown_to_html(chr(10).join(quoted))}\n</blockquote>")
+    flush()
+    return "\n".join(out)
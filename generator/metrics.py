@@ -0,0 +1,120 @@
+from __future__ import annotations
+import bisect
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from .utils import write_text
+
+
+# Limites (segundos) dos histogramas de latência
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Metrics:
+    """Contadores, timers e histogramas de latência do build, seguros para threads.
+
+    Workers de outros processos devolvem `drain()` e o processo principal faz `merge()`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[str, int] = {}
+        self.timers: dict[str, list[float]] = {}  # nome -> [contagem, total, máximo]
+        self.histograms: dict[str, list[int]] = {}  # nome -> contagem por bucket (+ overflow)
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, seconds: float, histogram: bool = False) -> None:
+        with self._lock:
+            t = self.timers.setdefault(name, [0, 0.0, 0.0])
+            t[0] += 1
+            t[1] += seconds
+            t[2] = max(t[2], seconds)
+            if histogram:
+                h = self.histograms.setdefault(name, [0] * (len(BUCKETS) + 1))
+                h[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    @contextmanager
+    def timer(self, name: str, histogram: bool = False):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, histogram)
+
+    def timed(self, name: str, histogram: bool = False):
+        """Decorador: cronometra cada chamada da função em `name`."""
+        def deco(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, histogram):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def drain(self) -> dict:
+        """Retorna e zera os dados acumulados (para enviar de um worker ao processo principal)."""
+        with self._lock:
+            data = {"counters": self.counters, "timers": self.timers, "histograms": self.histograms}
+            self.counters, self.timers, self.histograms = {}, {}, {}
+        return data
+
+    def merge(self, data: dict) -> None:
+        with self._lock:
+            for k, v in data.get("counters", {}).items():
+                self.counters[k] = self.counters.get(k, 0) + v
+            for k, (count, total, peak) in data.get("timers", {}).items():
+                t = self.timers.setdefault(k, [0, 0.0, 0.0])
+                t[0] += count
+                t[1] += total
+                t[2] = max(t[2], peak)
+            for k, buckets in data.get("histograms", {}).items():
+                h = self.histograms.setdefault(k, [0] * (len(BUCKETS) + 1))
+                for i, n in enumerate(buckets):
+                    h[i] += n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timers = {
+                k: {"count": int(c), "total_s": round(tot, 6), "avg_s": round(tot / c, 6) if c else 0.0, "max_s": round(mx, 6)}
+                for k, (c, tot, mx) in sorted(self.timers.items())
+            }
+            histograms = {k: _histogram_summary(v) for k, v in sorted(self.histograms.items())}
+            return {"counters": dict(sorted(self.counters.items())), "timers": timers, "histograms": histograms}
+
+
+def _histogram_summary(buckets: list[int]) -> dict:
+    total = sum(buckets)
+    labels = [f"le_{b:g}" for b in BUCKETS] + ["gt_%g" % BUCKETS[-1]]
+
+    def quantile(q: float) -> float | None:
+        # Limite superior do bucket que contém o quantil (aproximação); None se acima do último
+        if not total:
+            return None
+        acc = 0
+        for i, n in enumerate(buckets):
+            acc += n
+            if acc >= q * total:
+                return BUCKETS[i] if i < len(BUCKETS) else None
+        return None
+
+    return {
+        "count": total,
+        "buckets": {label: n for label, n in zip(labels, buckets) if n},
+        "p50_le_s": quantile(0.5),
+        "p95_le_s": quantile(0.95),
+        "p99_le_s": quantile(0.99),
+    }
+
+
+def write_report(path: str, data: dict) -> str:
+    write_text(path, json.dumps(data, ensure_ascii=False, indent=2, default=str))
+    return path
+
+
+metrics = Metrics()
@@ -0,0 +1,220 @@
+from __future__ import annotations
+import gzip
+import io
+import json
+import os
+import shutil
+import threading
+from typing import Iterable
+
+from .config import cfg
+from .metrics import metrics
+from .utils import ensure_dir
+
+
+# Extensões de texto que ganham sidecar .gz
+COMPRESSIBLE = (".html", ".css", ".xml", ".txt", ".svg", ".js", ".json")
+JOURNAL_NAME = ".publish.json"
+
+
+def gzip_bytes(data: bytes) -> bytes:
+    """gzip determinístico (nível 9, sem nome nem mtime): mesma entrada, mesmos bytes."""
+    buf = io.BytesIO()
+    with gzip.GzipFile(filename="", mode="wb", fileobj=buf, compresslevel=9, mtime=0) as gz:
+        gz.write(data)
+    return buf.getvalue()
+
+
+def _same_content(path: str, data: bytes) -> bool:
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+class OutputStore:
+    """Toda escrita em OUTPUT_DIR passa por aqui.
+
+    - Conteúdo idêntico ao publicado não é regravado (sem churn de mtime no upload).
+    - O que muda vai para uma árvore de staging irmã (`<OUTPUT_DIR>.staging`) com o mesmo layout;
+      `commit()` publica tudo no fim do build (os.replace por arquivo, folhas antes das listagens)
+      e só então aplica as remoções. Um build interrompido não toca o site publicado.
+    - O commit tem um journal: se ele mesmo for interrompido, `recover()` termina o trabalho no
+      próximo run; staging sem journal é de um build abortado e é descartado.
+    - Saídas que deixaram de existir (keyword removida, derivado antigo) são registradas em
+      `orphans` e removidas no commit.
+
+    Caminhos fora de OUTPUT_DIR (ex.: ASSETS_DIR customizado) são gravados direto, com tmp + replace.
+    Os workers de renderização usam a própria instância: o staging é só um diretório, então o
+    commit do processo principal enxerga o que eles gravaram.
+    """
+
+    def __init__(self, root: str | None = None):
+        self.root = os.path.abspath(root or cfg.OUTPUT_DIR)
+        self.staging = self.root + ".staging"
+        self.orphans: list[str] = []
+        self._removals: list[str] = []
+        self._claimed: set[str] = set()
+        self._lock = threading.Lock()
+
+    # -- caminhos --------------------------------------------------------------
+    def _rel(self, path: str) -> str | None:
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        return None if rel == os.pardir or rel.startswith(os.pardir + os.sep) else rel
+
+    def staged_path(self, path: str) -> str:
+        """Onde `path` fica até o commit (o próprio `path` se estiver fora de OUTPUT_DIR)."""
+        rel = self._rel(path)
+        return os.path.join(self.staging, rel) if rel is not None else path
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(path) or os.path.exists(self.staged_path(path))
+
+    def locate(self, path: str) -> str:
+        """Caminho legível de `path` neste build: a versão em staging, se houver, senão a publicada."""
+        staged = self.staged_path(path)
+        return staged if os.path.exists(staged) else path
+
+    # -- escrita ---------------------------------------------------------------
+    def temp_path(self, path: str) -> str:
+        """Arquivo temporário para escritas em streaming; feche-o e chame `settle(tmp, path)`."""
+        target = self.staged_path(path)
+        ensure_dir(os.path.dirname(target))
+        return f"{target}.{os.getpid()}-{threading.get_ident()}.tmp"
+
+    def settle(self, tmp: str, path: str) -> bool:
+        """Conclui uma escrita em `tmp`: descarta se igual à saída atual, senão põe em staging."""
+        with open(tmp, "rb") as f:
+            data = f.read()
+        if _same_content(path, data):
+            os.remove(tmp)
+            metrics.incr("files.unchanged")
+            return False
+        os.replace(tmp, self.staged_path(path))
+        self._written(path, data)
+        return True
+
+    def write(self, path: str, data: bytes) -> bool:
+        """Grava `data` em `path` (via staging) se o conteúdo mudou; retorna se houve escrita."""
+        if _same_content(path, data):
+            metrics.incr("files.unchanged")
+            return False
+        tmp = self.temp_path(path)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self.staged_path(path))
+        self._written(path, data)
+        return True
+
+    def write_text(self, path: str, text: str) -> bool:
+        return self.write(path, text.encode("utf-8"))
+
+    def _written(self, path: str, data: bytes) -> None:
+        metrics.incr("files.written")
+        metrics.incr("bytes.written", len(data))
+        if cfg.PRECOMPRESS and path.endswith(COMPRESSIBLE):
+            self.write(path + ".gz", gzip_bytes(data))
+
+    # -- remoção e órfãos -----------------------------------------------------
+    def remove(self, path: str) -> None:
+        """Agenda a remoção de um arquivo ou diretório publicado (aplicada no commit)."""
+        rel = self._rel(path)
+        with self._lock:
+            self._removals.append(rel if rel is not None else os.path.abspath(path))
+
+    def prune(self, directory: str, keep: Iterable[str]) -> list[str]:
+        """Marca como órfãs as entradas de `directory` fora de `keep` (nomes); retorna os caminhos."""
+        if not os.path.isdir(directory):
+            return []
+        keep = set(keep)
+        found = [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name not in keep]
+        self._orphan(found)
+        return found
+
+    def claim(self, path: str) -> None:
+        """Registra uma saída como viva neste build (usado com `prune_unclaimed`)."""
+        with self._lock:
+            self._claimed.add(os.path.abspath(path))
+
+    def claimed(self, directory: str) -> list[str]:
+        """Caminhos reclamados neste build dentro de `directory`, relativos a ele."""
+        directory = os.path.abspath(directory)
+        with self._lock:
+            return sorted(os.path.relpath(p, directory) for p in self._claimed if os.path.dirname(p) == directory)
+
+    def prune_unclaimed(self, directory: str) -> list[str]:
+        """Marca como órfãos os arquivos de `directory` que ninguém reclamou neste build."""
+        if not os.path.isdir(directory):
+            return []
+        found = [
+            path for path in (os.path.abspath(os.path.join(directory, name)) for name in sorted(os.listdir(directory)))
+            if path not in self._claimed
+        ]
+        self._orphan(found)
+        return found
+
+    def _orphan(self, paths: list[str]) -> None:
+        for path in paths:
+            self.remove(path)
+        with self._lock:
+            self.orphans += [self._rel(p) or p for p in paths]
+        metrics.incr("files.orphaned", len(paths))
+
+    # -- publicação -----------------------------------------------------------
+    def commit(self) -> list[str]:
+        """Publica o staging no site e aplica as remoções agendadas; retorna os órfãos removidos."""
+        with self._lock:
+            removals, self._removals = self._removals, []
+            orphans, self.orphans = self.orphans, []
+            self._claimed.clear()
+        if not removals and not os.path.isdir(self.staging):
+            return orphans
+        ensure_dir(self.staging)
+        journal = os.path.join(self.staging, JOURNAL_NAME)
+        with open(journal + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"remove": removals}, f)
+        os.replace(journal + ".tmp", journal)
+        self._publish()
+        return orphans
+
+    def recover(self) -> None:
+        """Início do build: termina um commit interrompido ou descarta o staging de um build abortado."""
+        if os.path.exists(os.path.join(self.staging, JOURNAL_NAME)):
+            self._publish()
+        elif os.path.isdir(self.staging):
+            shutil.rmtree(self.staging, ignore_errors=True)
+
+    def _publish(self) -> None:
+        journal = os.path.join(self.staging, JOURNAL_NAME)
+        with open(journal, "r", encoding="utf-8") as f:
+            removals = json.load(f).get("remove", [])
+        staged = []
+        for dirpath, _dirs, files in os.walk(self.staging):
+            for name in files:
+                if name != JOURNAL_NAME and not name.endswith(".tmp"):
+                    staged.append(os.path.relpath(os.path.join(dirpath, name), self.staging))
+        # Mais fundo primeiro: posts e assets chegam antes das listagens e do sitemap que apontam para eles
+        staged.sort(key=lambda rel: (-rel.count(os.sep), rel))
+        for rel in staged:
+            dst = os.path.join(self.root, rel)
+            ensure_dir(os.path.dirname(dst))
+            os.replace(os.path.join(self.staging, rel), dst)
+        published = set(staged)
+        for item in removals:
+            if item in published:
+                continue
+            path = item if os.path.isabs(item) else os.path.join(self.root, item)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+            else:
+                continue
+            metrics.incr("files.removed")
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+
+output_store = OutputStore()
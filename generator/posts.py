@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+
+class PostMeta:
+    """Registro compacto de um post: só o que índice e sitemap precisam (sem corpo)."""
+
+    __slots__ = ("slug", "keyword", "title", "description", "url", "lastmod")
+
+    def __init__(self, slug: str, keyword: str, title: str, description: str, url: str, lastmod: str):
+        self.slug = slug
+        self.keyword = keyword
+        self.title = title
+        self.description = description
+        self.url = url
+        self.lastmod = lastmod
+
+    @classmethod
+    def from_article(cls, article: dict) -> "PostMeta":
+        return cls(
+            article["slug"],
+            article["keyword"],
+            article["title"],
+            article["description"],
+            article["url"],
+            article["lastmod"],
+        )
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
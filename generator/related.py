@@ -0,0 +1,251 @@
+from __future__ import annotations
+import math
+import os
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+from unidecode import unidecode
+
+from .config import cfg
+from .dedup import STOPWORDS, stem
+from .manifest import content_digest
+
+
+INDEX_VERSION = 1
+# Termos vão para FEATURES posições por hashing; os vetores TF-IDF são projetados em DIM dimensões
+FEATURES = 1 << 14
+DIM = 256
+FIELD_WEIGHTS = (("keyword", 3.0), ("title", 2.0), ("body_md", 1.0))
+# Recalcula IDF e vizinhos de todo o corpus quando ele muda mais do que isso desde o último recálculo
+REBUILD_DRIFT = 0.25
+MIN_SCORE = 0.05
+# Limite de memória da matriz de similaridade de um bloco (floats)
+_BLOCK_FLOATS = 1 << 24
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def features(article: dict) -> tuple[np.ndarray, np.ndarray]:
+    """Termos com peso (posições de hashing e TF sublinear) de keyword, título e corpo."""
+    counts: Counter[int] = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        text = unidecode(article.get(field) or "").lower()
+        for word in _WORD_RE.findall(text):
+            if len(word) > 2 and word not in STOPWORDS:
+                counts[zlib.crc32(stem(word).encode()) % FEATURES] += weight
+    idx = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+    tf = np.fromiter((1.0 + math.log(c) for c in counts.values()), dtype=np.float32, count=len(counts))
+    order = np.argsort(idx)
+    return idx[order], tf[order]
+
+
+def _projection() -> np.ndarray:
+    # Projeção aleatória fixa (preserva cossenos aproximadamente); a mesma em todo build
+    return np.random.default_rng(INDEX_VERSION).standard_normal((FEATURES, DIM), dtype=np.float32) / np.float32(math.sqrt(DIM))
+
+
+class RelatedIndex:
+    """Vetores TF-IDF persistidos e os k vizinhos mais próximos de cada post.
+
+    A cada build, `add()` recebe os posts gerados; `update()` só vetoriza os novos/alterados e só
+    recalcula a lista de vizinhos de quem perdeu um vizinho (removido ou alterado). Os demais apenas
+    comparam seus vizinhos atuais com os posts novos, numa multiplicação de matrizes em lote.
+    O IDF fica congelado até o corpus crescer/mudar mais que REBUILD_DRIFT; aí tudo é recalculado.
+    """
+
+    def __init__(self, path: str | None = None, k: int | None = None):
+        self.path = path or os.path.join(cfg.CACHE_DIR, "related.npz")
+        self.k = cfg.RELATED_POSTS if k is None else k
+        self._pending: dict[str, tuple[str, np.ndarray, np.ndarray]] = {}
+        self._seen: set[str] = set()
+        self.stats = {"vectorized": 0, "refreshed": 0, "full_rebuild": False}
+        self._load()
+
+    def _reset(self) -> None:
+        self.slugs: list[str] = []
+        self.digests: list[str] = []
+        self.ptr = np.zeros(1, dtype=np.int64)
+        self.feat_idx = np.empty(0, dtype=np.int32)
+        self.feat_tf = np.empty(0, dtype=np.float32)
+        self.vectors = np.empty((0, DIM), dtype=np.float32)
+        self.neighbors = np.empty((0, self.k), dtype=np.int32)
+        self.scores = np.empty((0, self.k), dtype=np.float32)
+        self.df = np.zeros(FEATURES, dtype=np.int64)
+        self.idf: np.ndarray | None = None
+        self.idf_docs = 0
+        self._rows: dict[str, int] | None = None
+
+    def _load(self) -> None:
+        self._reset()
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if int(data["version"]) != INDEX_VERSION or data["neighbors"].shape[1] != self.k:
+                    return
+                self.slugs = data["slugs"].tolist()
+                self.digests = data["digests"].tolist()
+                self.ptr, self.feat_idx, self.feat_tf = data["ptr"], data["feat_idx"], data["feat_tf"]
+                self.vectors, self.neighbors, self.scores = data["vectors"], data["neighbors"], data["scores"]
+                self.df, self.idf, self.idf_docs = data["df"], data["idf"], int(data["idf_docs"])
+        except Exception:
+            self._reset()
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp.npz"
+        np.savez(
+            tmp,
+            version=INDEX_VERSION,
+            slugs=np.array(self.slugs, dtype=str),
+            digests=np.array(self.digests, dtype=str),
+            ptr=self.ptr, feat_idx=self.feat_idx, feat_tf=self.feat_tf,
+            vectors=self.vectors, neighbors=self.neighbors, scores=self.scores,
+            df=self.df, idf=self.idf if self.idf is not None else np.zeros(FEATURES, dtype=np.float32),
+            idf_docs=self.idf_docs,
+        )
+        os.replace(tmp, self.path)
+
+    # -- entrada -------------------------------------------------------------
+    def add(self, article: dict) -> None:
+        slug = article["slug"]
+        self._seen.add(slug)
+        digest = content_digest([article.get(f) for f, _ in FIELD_WEIGHTS])
+        if slug in self._pending:
+            return
+        row = self._row_of().get(slug)
+        if row is not None and self.digests[row] == digest:
+            return
+        self._pending[slug] = (digest, *features(article))
+
+    def discard(self, slug: str) -> None:
+        """Tira `slug` do corpus no próximo `update` (post removido sem um build completo)."""
+        self._seen.discard(slug)
+        self._pending.pop(slug, None)
+
+    def _row_of(self) -> dict[str, int]:
+        if self._rows is None:
+            self._rows = {s: i for i, s in enumerate(self.slugs)}
+        return self._rows
+
+    # -- cálculo -------------------------------------------------------------
+    def _vectorize(self, rows: np.ndarray, proj: np.ndarray) -> np.ndarray:
+        """Vetores normalizados (TF × IDF projetados) das linhas pedidas, em blocos densos."""
+        out = np.empty((rows.size, DIM), dtype=np.float32)
+        step = max(1, _BLOCK_FLOATS // FEATURES)
+        for lo in range(0, rows.size, step):
+            block = rows[lo:lo + step]
+            starts, lens = self.ptr[block], self.ptr[block + 1] - self.ptr[block]
+            pos = np.repeat(starts - np.cumsum(lens) + lens, lens) + np.arange(lens.sum())
+            idx = self.feat_idx[pos]
+            dense = np.zeros((block.size, FEATURES), dtype=np.float32)
+            dense[np.repeat(np.arange(block.size), lens), idx] = self.feat_tf[pos] * self.idf[idx]
+            out[lo:lo + block.size] = dense @ proj
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1, norms)
+
+    def _top_k(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """k vizinhos mais próximos (por cosseno) das linhas pedidas contra o corpus inteiro."""
+        n = self.vectors.shape[0]
+        k = min(self.k, max(n - 1, 0))
+        neighbors = np.full((rows.size, self.k), -1, dtype=np.int32)
+        scores = np.full((rows.size, self.k), -np.inf, dtype=np.float32)
+        if k == 0:
+            return neighbors, scores
+        step = max(1, _BLOCK_FLOATS // n)
+        for lo in range(0, rows.size, step):
+            block = rows[lo:lo + step]
+            sims = self.vectors[block] @ self.vectors.T
+            sims[np.arange(block.size), block] = -np.inf
+            part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            part_scores = np.take_along_axis(sims, part, axis=1)
+            order = np.argsort(-part_scores, axis=1, kind="stable")
+            neighbors[lo:lo + block.size, :k] = np.take_along_axis(part, order, axis=1)
+            scores[lo:lo + block.size, :k] = np.take_along_axis(part_scores, order, axis=1)
+        return neighbors, scores
+
+    def _merge_new(self, rows: np.ndarray, new_rows: np.ndarray) -> None:
+        """Atualiza os vizinhos de `rows` considerando só os posts novos (o resto da lista já vale)."""
+        step = max(1, _BLOCK_FLOATS // max(new_rows.size + self.k, 1))
+        for lo in range(0, rows.size, step):
+            block = rows[lo:lo + step]
+            sims = self.vectors[block] @ self.vectors[new_rows].T
+            cand = np.concatenate([self.neighbors[block], np.broadcast_to(new_rows, (block.size, new_rows.size))], axis=1)
+            cand_scores = np.concatenate([self.scores[block], sims], axis=1)
+            order = np.argsort(-cand_scores, axis=1, kind="stable")[:, :self.k]
+            self.neighbors[block] = np.take_along_axis(cand, order, axis=1)
+            self.scores[block] = np.take_along_axis(cand_scores, order, axis=1)
+
+    def update(self) -> dict[str, list[str]]:
+        """Aplica as mudanças do build (novos, alterados, removidos) e devolve slug -> slugs relacionados."""
+        old_rows = self._row_of()
+        removed = [s for s in self.slugs if s not in self._seen or s in self._pending]
+        if removed or self._pending:
+            self._apply(old_rows, set(removed))
+        self._pending.clear()
+        return self.mapping()
+
+    def _apply(self, old_rows: dict[str, int], dropped: set[str]) -> None:
+        keep = np.array([i for i, s in enumerate(self.slugs) if s not in dropped], dtype=np.int64)
+        # df: tira os termos de quem saiu ou mudou, soma os de quem entrou
+        gone = np.array([old_rows[s] for s in dropped], dtype=np.int64)
+        if gone.size:
+            lens = self.ptr[gone + 1] - self.ptr[gone]
+            pos = np.repeat(self.ptr[gone] - np.cumsum(lens) + lens, lens) + np.arange(lens.sum())
+            np.subtract.at(self.df, self.feat_idx[pos], 1)
+        new_slugs = list(self._pending)
+        for _digest, idx, _tf in self._pending.values():
+            self.df[idx] += 1
+
+        # Tabela compacta: linhas mantidas na ordem antiga + novas no fim
+        lens = self.ptr[keep + 1] - self.ptr[keep]
+        pos = np.repeat(self.ptr[keep] - np.cumsum(lens) + lens, lens) + np.arange(lens.sum())
+        pieces_idx = [self.feat_idx[pos]] + [v[1] for v in self._pending.values()]
+        pieces_tf = [self.feat_tf[pos]] + [v[2] for v in self._pending.values()]
+        all_lens = np.concatenate([lens, np.array([v[1].size for v in self._pending.values()], dtype=np.int64)])
+        self.feat_idx = np.concatenate(pieces_idx).astype(np.int32)
+        self.feat_tf = np.concatenate(pieces_tf).astype(np.float32)
+        self.ptr = np.concatenate([[0], np.cumsum(all_lens)]).astype(np.int64)
+        self.slugs = [self.slugs[i] for i in keep] + new_slugs
+        self.digests = [self.digests[i] for i in keep] + [v[0] for v in self._pending.values()]
+        self._rows = None
+
+        n, m = len(self.slugs), keep.size
+        new_rows = np.arange(m, n)
+        drift = abs(n - self.idf_docs) + gone.size
+        full = self.idf is None or self.idf_docs == 0 or drift > REBUILD_DRIFT * self.idf_docs
+        proj = _projection()
+        if full:
+            self.idf = (np.log((1 + n) / (1 + self.df)) + 1).astype(np.float32)
+            self.idf_docs = n
+            self.vectors = self._vectorize(np.arange(n), proj)
+            self.neighbors, self.scores = self._top_k(np.arange(n))
+            self.stats.update(vectorized=n, refreshed=n, full_rebuild=True)
+            return
+
+        # Incremental: IDF congelado; novos vetorizados; listas com vizinho perdido são refeitas
+        remap = np.full(len(old_rows) + 1, -1, dtype=np.int64)
+        remap[keep] = np.arange(m)
+        old_neighbors = self.neighbors[keep]
+        mapped = np.where(old_neighbors >= 0, remap[old_neighbors], -1)
+        lost = ((old_neighbors >= 0) & (mapped < 0)).any(axis=1)
+        self.vectors = np.concatenate([self.vectors[keep], self._vectorize(new_rows, proj)])
+        self.neighbors = np.concatenate([mapped.astype(np.int32), np.full((n - m, self.k), -1, dtype=np.int32)])
+        self.scores = np.concatenate([np.where(mapped >= 0, self.scores[keep], -np.inf).astype(np.float32),
+                                      np.full((n - m, self.k), -np.inf, dtype=np.float32)])
+        refresh = np.concatenate([np.flatnonzero(lost), new_rows])
+        merge = np.flatnonzero(~lost)
+        if new_rows.size and merge.size:
+            self._merge_new(merge, new_rows)
+        if refresh.size:
+            self.neighbors[refresh], self.scores[refresh] = self._top_k(refresh)
+        self.stats.update(vectorized=int(new_rows.size), refreshed=int(refresh.size), full_rebuild=False)
+
+    def mapping(self) -> dict[str, list[str]]:
+        out = {}
+        for slug, nbrs, scores in zip(self.slugs, self.neighbors.tolist(), self.scores.tolist()):
+            if slug in self._seen:
+                out[slug] = [self.slugs[j] for j, s in zip(nbrs, scores) if j >= 0 and s >= MIN_SCORE]
+        return out
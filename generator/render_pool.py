@@ -0,0 +1,65 @@
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+from .concurrency import bounded_map
+from .markdown import markdown_to_html
+from .metrics import metrics
+from .renderer import Renderer, get_renderer
+
+
+# Renderer do processo worker (aquecido no initializer)
+_worker_renderer: Renderer | None = None
+
+
+def _init_worker() -> None:
+    global _worker_renderer
+    # Com fork, o worker herda as métricas do pai até aqui; descartadas, não voltam em dobro no merge
+    metrics.drain()
+    _worker_renderer = Renderer()
+    for name in ("base.html", "article.html"):
+        _worker_renderer.template(name)
+
+
+def _render_one(item: tuple[str, dict], renderer: Renderer | None = None) -> tuple[str, str]:
+    """Converte o markdown e grava o post; retorna (slug, caminho)."""
+    outdir, article = item
+    renderer = renderer or _worker_renderer or get_renderer()
+    with metrics.timer("markdown"):
+        body_html = markdown_to_html(article["body_md"]) if article.get("body_md") else ""
+    path = renderer.render_article(outdir, {**article, "body_html": body_html})
+    return article["slug"], path
+
+
+def _render_in_worker(item: tuple[str, dict]) -> tuple[str, str, dict]:
+    slug, path = _render_one(item)
+    # Métricas do worker voltam junto com o resultado
+    return slug, path, metrics.drain()
+
+
+def resolve_workers(workers: int | None) -> int:
+    """`None`/0 = um worker por núcleo; 1 = caminho serial."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def render_articles_parallel(items: Iterable[tuple[str, dict]], workers: int | None = None) -> Iterator[tuple[str, str]]:
+    """Renderiza pares (outdir, article) num pool de processos e devolve (slug, caminho) em ordem.
+
+    A submissão é limitada a uma janela de alguns itens por worker, então nem o
+    processo principal nem os workers acumulam o lote inteiro em memória. A saída
+    é idêntica byte a byte à do caminho serial (`workers=1`).
+    """
+    workers = resolve_workers(workers)
+    if workers == 1:
+        renderer = get_renderer()
+        for item in items:
+            yield _render_one(item, renderer)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for slug, path, worker_metrics in bounded_map(pool, _render_in_worker, items, window=workers * 4):
+            metrics.merge(worker_metrics)
+            yield slug, path
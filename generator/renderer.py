@@ -1,79 +1,153 @@
 from __future__ import annotations
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, select_autoescape
 from datetime import datetime, timezone
 import os
+from typing import Iterable
 from urllib.parse import urlparse
 
+from .assets import load_asset_map, minify_html
 from .config import cfg
+from .metrics import metrics
+from .output_store import output_store
+from .sitemap import write_sitemaps
 from .utils import ensure_dir
 
 
-def _env() -> Environment:
-    loader = FileSystemLoader("templates")
-    env = Environment(loader=loader, autoescape=select_autoescape(["html", "xml"]))
+def _base_path(site_url: str) -> str:
     # Suporte a GitHub Pages em subcaminho: extrai base path do SITE_URL
-    parsed = urlparse(cfg.SITE_URL)
+    parsed = urlparse(site_url)
     base_path = parsed.path if parsed and parsed.path else "/"
     if not base_path.endswith("/"):
         base_path = base_path + "/"
-    env.globals.update({
-        "SITE_NAME": cfg.SITE_NAME,
-        "SITE_TAGLINE": cfg.SITE_TAGLINE,
-        "SITE_URL": cfg.SITE_URL,
-        "GA_MEASUREMENT_ID": cfg.GA_MEASUREMENT_ID,
-        "BASE_PATH": base_path,
-    })
-    return env
+    return base_path
 
 
-def render_article(outdir: str, article: dict) -> str:
-    env = _env()
-    tpl = env.get_template("article.html")
-    html = tpl.render(article=article)
-    ensure_dir(outdir)
-    path = os.path.join(outdir, "index.html")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
+def _write(outdir: str, filename: str, content: str) -> str:
+    """Grava a saída (minificada, se HTML) pelo output store, que cuida do sidecar .gz."""
+    if cfg.MINIFY_HTML and filename.endswith(".html"):
+        content = minify_html(content)
+    path = os.path.join(outdir, filename)
+    output_store.write_text(path, content)
     return path
 
 
-def render_index(outdir: str, posts: list[dict]) -> str:
-    env = _env()
-    tpl = env.get_template("index.html")
-    html = tpl.render(posts=posts)
-    ensure_dir(outdir)
-    path = os.path.join(outdir, "index.html")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
-    return path
+class Renderer:
+    """Ambiente Jinja único por processo: cada template é compilado uma vez e o
+    bytecode fica em `CACHE_DIR/jinja` entre execuções."""
+
+    def __init__(self, templates_dir: str | None = None, cache_dir: str | None = None, assets: dict[str, str] | None = None):
+        cache_dir = cache_dir or os.path.join(cfg.CACHE_DIR, "jinja")
+        ensure_dir(cache_dir)
+        self.env = Environment(
+            loader=FileSystemLoader(templates_dir or cfg.TEMPLATES_DIR),
+            autoescape=select_autoescape(["html", "xml"]),
+            bytecode_cache=FileSystemBytecodeCache(cache_dir),
+            auto_reload=False,
+        )
+        self.assets = assets if assets is not None else load_asset_map()
+        # Entradas globais de todas as páginas (entram no hash do manifest)
+        self.site_globals = {
+            "SITE_NAME": cfg.SITE_NAME,
+            "SITE_TAGLINE": cfg.SITE_TAGLINE,
+            "SITE_URL": cfg.SITE_URL,
+            "GA_MEASUREMENT_ID": cfg.GA_MEASUREMENT_ID,
+            "BASE_PATH": _base_path(cfg.SITE_URL),
+            "ASSETS": dict(self.assets),
+            "MINIFY_HTML": cfg.MINIFY_HTML,
+            "SEARCH_ENABLED": cfg.SEARCH_ENABLED,
+        }
+        self.env.globals.update(self.site_globals)
+        # Nome com hash de um asset (ex.: "styles.css" → "styles.1a2b3c4d5e.css")
+        self.env.globals["asset"] = lambda name: self.assets.get(name, name)
+        self._templates: dict[str, Template] = {}
+
+    def template(self, name: str) -> Template:
+        tpl = self._templates.get(name)
+        if tpl is None:
+            tpl = self._templates[name] = self.env.get_template(name)
+        return tpl
+
+    # -- renderização em memória ----------------------------------------
+    def render_template(self, name: str, **ctx) -> str:
+        with metrics.timer(f"render.{name}"):
+            html = self.template(name).render(**ctx)
+        metrics.incr("templates.rendered")
+        return html
+
+    def article_html(self, article: dict) -> str:
+        return self.render_template("article.html", article=article)
+
+    def index_html(self, posts: list, **ctx) -> str:
+        return self.render_template("index.html", posts=posts, **ctx)
+
+    def listing_html(self, template: str, **ctx) -> str:
+        return self.render_template(template, **ctx)
+
+    def page_html(self, page: dict) -> str:
+        return self.render_template("page.html", page=page)
+
+    # -- escrita em disco -----------------------------------------------
+    def render_article(self, outdir: str, article: dict) -> str:
+        return _write(outdir, "index.html", self.article_html(article))
+
+    def render_articles(self, items: Iterable[tuple[str, dict]]) -> list[str]:
+        """Renderiza vários artigos de uma vez: `items` são pares (outdir, article)."""
+        return [_write(outdir, "index.html", self.article_html(article)) for outdir, article in items]
+
+    def render_index(self, outdir: str, posts: list, **ctx) -> str:
+        return _write(outdir, "index.html", self.index_html(posts, **ctx))
+
+    def render_listing(self, template: str, outdir: str, **ctx) -> str:
+        return _write(outdir, "index.html", self.listing_html(template, **ctx))
+
+    def render_page(self, outdir: str, page: dict) -> str:
+        return _write(outdir, "index.html", self.page_html(page))
+
+    def render_sitemap(self, outdir: str, urls: Iterable[dict]) -> str:
+        """Grava sitemaps fragmentados + `sitemap_index.xml`; cada item é {"loc": ..., "lastmod": ...}."""
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        return write_sitemaps(outdir, ({"loc": u["loc"], "lastmod": u.get("lastmod") or now} for u in urls))
+
+    def render_robots(self, outdir: str) -> str:
+        return _write(outdir, "robots.txt", self.render_template("robots.txt.j2"))
+
+
+_renderer: Renderer | None = None
+
+
+def get_renderer() -> Renderer:
+    global _renderer
+    if _renderer is None:
+        _renderer = Renderer()
+    return _renderer
+
+
+def reset_renderer() -> Renderer:
+    """Troca o renderer do processo por um novo (templates e assets relidos do disco)."""
+    global _renderer
+    _renderer = Renderer()
+    return _renderer
+
+
+def render_article(outdir: str, article: dict) -> str:
+    return get_renderer().render_article(outdir, article)
+
+
+def render_articles(items: Iterable[tuple[str, dict]]) -> list[str]:
+    return get_renderer().render_articles(items)
+
+
+def render_index(outdir: str, posts: list, **ctx) -> str:
+    return get_renderer().render_index(outdir, posts, **ctx)
 
 
 def render_page(outdir: str, page: dict) -> str:
-    env = _env()
-    tpl = env.get_template("page.html")
-    html = tpl.render(page=page)
-    ensure_dir(outdir)
-    path = os.path.join(outdir, "index.html")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
-    return path
+    return get_renderer().render_page(outdir, page)
 
 
-def render_sitemap(outdir: str, urls: list[str]) -> str:
-    env = _env()
-    tpl = env.get_template("sitemap.xml.j2")
-    xml = tpl.render(urls=urls, now=datetime.now(timezone.utc).isoformat())
-    path = os.path.join(outdir, "sitemap.xml")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(xml)
-    return path
+def render_sitemap(outdir: str, urls: Iterable[dict]) -> str:
+    return get_renderer().render_sitemap(outdir, urls)
 
 
 def render_robots(outdir: str) -> str:
-    env = _env()
-    tpl = env.get_template("robots.txt.j2")
-    txt = tpl.render()
-    path = os.path.join(outdir, "robots.txt")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(txt)
-    return path
+    return get_renderer().render_robots(outdir)
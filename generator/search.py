@@ -0,0 +1,320 @@
+from __future__ import annotations
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+from collections import Counter, defaultdict
+from typing import Iterator
+
+from .config import cfg
+from .dedup import STOPWORDS
+from .manifest import content_digest
+from .output_store import output_store
+from .shard import SHARDS_DIR, Shard
+from .utils import ensure_dir, fold, read_text, write_text
+
+
+INDEX_VERSION = 1
+SEARCH_DIR = os.path.join(cfg.OUTPUT_DIR, "search")
+STATE_PATH = os.path.join(cfg.CACHE_DIR, "search-state.json")
+# Posts por arquivo de metadados (título, slug, description) servido ao navegador
+DOCS_CHUNK = 256
+# Grupos de termos têm prefixo de 2 caracteres; um grupo grande é dividido até este comprimento
+GROUP_PREFIX = 2
+MAX_PREFIX = 4
+FIELD_WEIGHTS = (("title", 3), ("description", 2), ("body_md", 1))
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Destino de links em markdown: "[texto](url)" indexa só o texto
+_LINK_RE = re.compile(r"\]\([^)]*\)")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL UNIQUE,
+    digest TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+CREATE TABLE IF NOT EXISTS parts (
+    name TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    rows INTEGER NOT NULL
+);
+"""
+
+
+def tokenize(text: str) -> list[str]:
+    """Termos de busca: mesma normalização do `slugify` (unidecode + minúsculas), sem stopwords."""
+    return [w for w in _WORD_RE.findall(fold(text)) if len(w) > 1 and w not in STOPWORDS]
+
+
+def post_terms(article: dict, limit: int | None = None) -> dict[str, int]:
+    """Termos de um post com peso inteiro (TF sublinear por campo).
+
+    Termos do título e da description entram sempre; o resto da cota (`SEARCH_TERMS_PER_POST`)
+    vai para os termos mais frequentes do corpo.
+    """
+    limit = cfg.SEARCH_TERMS_PER_POST if limit is None else limit
+    counts: Counter[str] = Counter()
+    head: set[str] = set()
+    for field, weight in FIELD_WEIGHTS:
+        text = article.get(field) or ""
+        if field == "body_md":
+            text = _LINK_RE.sub("]", text)
+        for word in tokenize(text):
+            counts[word] += weight
+            if field != "body_md":
+                head.add(word)
+    ranked = sorted(counts.items(), key=lambda kv: (kv[0] not in head, -kv[1], kv[0]))
+    return {term: round(10 * (1 + math.log(count))) for term, count in ranked[:max(limit, len(head))]}
+
+
+def _row_hash(row: tuple) -> int:
+    return int.from_bytes(hashlib.blake2b("\x1f".join(map(str, row)).encode("utf-8"), digest_size=16).digest(), "big")
+
+
+def index_path(shard: Shard | None = None) -> str:
+    """Banco do índice: um por build, ou um por shard em `cache/shards/` (vai junto para o merge)."""
+    if shard:
+        return os.path.join(SHARDS_DIR, f"search-{shard.tag}.sqlite3")
+    return os.path.join(cfg.CACHE_DIR, "search.sqlite3")
+
+
+def _group_range(group: str) -> tuple[str, str]:
+    # Termos só têm [a-z0-9]; "~" vem depois de todos eles
+    return group, group + "~"
+
+
+class SearchIndex:
+    """Índice invertido persistente (SQLite) dos posts de um build ou de um shard.
+
+    Como o `RelatedIndex`: `add()` recebe cada post do build e só tokeniza os novos/alterados;
+    `update()` aplica as mudanças (posts que não vieram saem) e atualiza o hash das partes afetadas —
+    grupos de termos por prefixo (`t:<xx>`) e blocos de metadados (`d:<n>`). O hash de uma parte é o
+    XOR dos hashes das suas linhas: só as linhas que entram ou saem são lidas, não a parte inteira.
+    `SearchWriter` publica só as partes cujo hash mudou.
+
+    Em shards, o id de cada post é ≡ (i - 1) mod N: ids de shards diferentes nunca colidem.
+    """
+
+    def __init__(self, path: str | None = None, shard: Shard | None = None):
+        self.path = path or index_path(shard)
+        self.step, self.offset = (shard.count, shard.index - 1) if shard else (1, 0)
+        ensure_dir(os.path.dirname(self.path) or ".")
+        self.db = sqlite3.connect(self.path)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            self.db.executescript("DROP TABLE IF EXISTS docs; DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS parts;")
+            self.db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self.db.executescript(_SCHEMA)
+        self.docs: dict[str, tuple[int, str]] = {
+            slug: (doc, digest) for doc, slug, digest in self.db.execute("SELECT id, slug, digest FROM docs")
+        }
+        self._pending: dict[str, tuple[str, dict, dict[str, int]]] = {}
+        self._seen: set[str] = set()
+        self.stats = {"indexed": 0, "removed": 0, "parts": 0}
+
+    def close(self) -> None:
+        self.db.close()
+
+    # -- entrada -------------------------------------------------------------
+    def add(self, article: dict) -> None:
+        slug = article["slug"]
+        self._seen.add(slug)
+        fields = [article.get(f) or "" for f, _ in FIELD_WEIGHTS]
+        digest = content_digest([INDEX_VERSION, cfg.SEARCH_TERMS_PER_POST, fields])
+        known = self.docs.get(slug)
+        if slug in self._pending or (known and known[1] == digest):
+            return
+        doc = {"title": article.get("title") or "", "description": article.get("description") or ""}
+        self._pending[slug] = (digest, doc, post_terms(article))
+
+    def discard(self, slug: str) -> None:
+        """Tira `slug` do índice no próximo `update` (post removido sem um build completo)."""
+        self._seen.discard(slug)
+        self._pending.pop(slug, None)
+
+    # -- atualização ---------------------------------------------------------
+    def _next_id(self) -> int:
+        top = self.db.execute("SELECT max(id) FROM docs").fetchone()[0]
+        return self.offset if top is None else (top - self.offset) // self.step * self.step + self.step + self.offset
+
+    def update(self) -> dict:
+        """Aplica novos, alterados e removidos; devolve as estatísticas da atualização."""
+        removed = [slug for slug in self.docs if slug not in self._seen]
+        # parte -> [XOR dos hashes das linhas que entraram/saíram, variação no número de linhas]
+        delta: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+
+        def touch(name: str, row: tuple, sign: int) -> None:
+            delta[name][0] ^= _row_hash(row)
+            delta[name][1] += sign
+
+        with self.db:
+            for slug in removed + [s for s in self._pending if s in self.docs]:
+                doc = self.docs[slug][0]
+                for term, weight in self.db.execute("SELECT term, weight FROM postings WHERE doc = ?", (doc,)):
+                    touch(f"t:{term[:GROUP_PREFIX]}", (term, doc, weight), -1)
+                for row in self.db.execute("SELECT id, title, slug, description FROM docs WHERE id = ?", (doc,)):
+                    touch(f"d:{doc // DOCS_CHUNK}", row, -1)
+                self.db.execute("DELETE FROM postings WHERE doc = ?", (doc,))
+                self.db.execute("DELETE FROM docs WHERE id = ?", (doc,))
+            for slug in removed:
+                del self.docs[slug]
+            for slug, (digest, meta, terms) in self._pending.items():
+                doc = self.docs[slug][0] if slug in self.docs else self._next_id()
+                self.db.execute(
+                    "INSERT INTO docs (id, slug, digest, title, description) VALUES (?, ?, ?, ?, ?)",
+                    (doc, slug, digest, meta["title"], meta["description"]),
+                )
+                self.db.executemany("INSERT INTO postings (term, doc, weight) VALUES (?, ?, ?)", ((t, doc, w) for t, w in terms.items()))
+                self.docs[slug] = (doc, digest)
+                for term, weight in terms.items():
+                    touch(f"t:{term[:GROUP_PREFIX]}", (term, doc, weight), 1)
+                touch(f"d:{doc // DOCS_CHUNK}", (doc, meta["title"], slug, meta["description"]), 1)
+            for name, (xor, count) in delta.items():
+                row = self.db.execute("SELECT digest, rows FROM parts WHERE name = ?", (name,)).fetchone()
+                digest, rows = (int(row[0], 16) ^ xor, row[1] + count) if row else (xor, count)
+                if rows > 0:
+                    self.db.execute("INSERT OR REPLACE INTO parts (name, digest, rows) VALUES (?, ?, ?)", (name, f"{digest:032x}", rows))
+                else:
+                    self.db.execute("DELETE FROM parts WHERE name = ?", (name,))
+        self.stats.update(indexed=len(self._pending), removed=len(removed), parts=len(delta))
+        self._pending.clear()
+        return self.stats
+
+    # -- leitura (usada pelo SearchWriter) ----------------------------------
+    def parts(self) -> dict[str, str]:
+        return dict(self.db.execute("SELECT name, digest FROM parts"))
+
+    def postings(self, group: str) -> Iterator[tuple[str, int, int]]:
+        lo, hi = _group_range(group)
+        yield from self.db.execute(
+            "SELECT term, doc, weight FROM postings WHERE term >= ? AND term < ? ORDER BY term, doc", (lo, hi)
+        )
+
+    def doc_rows(self, chunk: int) -> Iterator[tuple[int, str, str, str]]:
+        yield from self.db.execute(
+            "SELECT id, title, slug, description FROM docs WHERE id >= ? AND id < ? ORDER BY id",
+            (chunk * DOCS_CHUNK, (chunk + 1) * DOCS_CHUNK),
+        )
+
+    def count(self) -> int:
+        return len(self.docs)
+
+
+def _encode(postings: list[tuple[int, int]]) -> list[int]:
+    """[df, id, peso, Δid, peso, ...]: as `SEARCH_MAX_POSTINGS` de maior peso, em ordem de id."""
+    top = sorted(postings, key=lambda p: (-p[1], p[0]))[:cfg.SEARCH_MAX_POSTINGS]
+    out, last = [len(postings)], 0
+    for doc, weight in sorted(top):
+        out += [doc - last, weight]
+        last = doc
+    return out
+
+
+def _layout(terms: dict[str, list[tuple[int, int]]], prefix: str) -> Iterator[tuple[str, dict]]:
+    """Divide os termos de um prefixo em arquivos de até `SEARCH_SHARD_POSTINGS` postings.
+
+    Um prefixo grande vira um arquivo por prefixo um caractere mais longo; termos que são o
+    próprio prefixo ficam no arquivo com o nome dele. O navegador procura o termo no arquivo
+    do prefixo mais longo que existir.
+    """
+    size = sum(min(len(p), cfg.SEARCH_MAX_POSTINGS) for p in terms.values())
+    if size <= cfg.SEARCH_SHARD_POSTINGS or len(terms) == 1 or len(prefix) >= MAX_PREFIX:
+        yield prefix, terms
+        return
+    buckets: dict[str, dict] = defaultdict(dict)
+    for term, postings in terms.items():
+        buckets[term[:len(prefix) + 1]][term] = postings
+    for key in sorted(buckets):
+        yield from _layout(buckets[key], key)
+
+
+class SearchWriter:
+    """Publica o índice em OUTPUT_DIR/search a partir de um ou mais `SearchIndex` (um por shard).
+
+    - `search/index.json`: arquivos de termos existentes, total de posts e stopwords.
+    - `search/t/<prefixo>.json`: {termo: [df, id, peso, Δid, peso, ...]}.
+    - `search/d/<n>.json`: {id: [título, slug, description]} de `DOCS_CHUNK` ids.
+
+    Só são regravadas as partes cujo hash (combinado entre os índices) mudou desde o último build;
+    o estado fica em `cache/search-state.json` e, como o manifest, só é salvo depois do commit.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or STATE_PATH
+        self.params = [INDEX_VERSION, DOCS_CHUNK, MAX_PREFIX, cfg.SEARCH_MAX_POSTINGS, cfg.SEARCH_SHARD_POSTINGS]
+        raw = read_text(self.path)
+        state = json.loads(raw) if raw else {}
+        self.parts: dict[str, list] = state.get("parts", {}) if state.get("params") == self.params else {}
+
+    @staticmethod
+    def _file(name: str, key: str) -> str:
+        return os.path.join(SEARCH_DIR, name[0], f"{key}.json")
+
+    def write(self, indexes: list[SearchIndex]) -> dict:
+        sources = [index.parts() for index in indexes]
+        current = {name: content_digest([src.get(name) for src in sources]) for name in set().union(*sources)}
+        parts, written = {}, 0
+        for name in sorted(current):
+            prev = self.parts.get(name)
+            if prev and prev[0] == current[name] and all(output_store.exists(self._file(name, k)) for k in prev[1]):
+                parts[name] = prev
+                continue
+            keys = self._write_terms(indexes, name) if name.startswith("t:") else self._write_docs(indexes, name)
+            parts[name] = [current[name], keys]
+            written += 1
+        self.parts = parts
+
+        shards = sorted(k for name, (_, keys) in parts.items() if name.startswith("t:") for k in keys)
+        meta = {
+            "version": INDEX_VERSION,
+            "docs": sum(index.count() for index in indexes),
+            "chunk": DOCS_CHUNK,
+            "stop": sorted(STOPWORDS),
+            "shards": shards,
+        }
+        output_store.write_text(os.path.join(SEARCH_DIR, "index.json"), json.dumps(meta, separators=(",", ":")))
+        # Arquivos de prefixos que sumiram ou foram divididos/juntados
+        for kind in ("t", "d"):
+            live = {f"{k}.json" for name, (_, keys) in parts.items() if name[0] == kind for k in keys}
+            output_store.prune(os.path.join(SEARCH_DIR, kind), live | {f"{n}.gz" for n in live})
+        return {"parts": len(parts), "written": written, "shards": len(shards), "docs": meta["docs"]}
+
+    def _write_terms(self, indexes: list[SearchIndex], name: str) -> list[str]:
+        terms: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        for index in indexes:
+            for term, doc, weight in index.postings(name[2:]):
+                terms[term].append((doc, weight))
+        keys = []
+        for key, group in _layout(dict(sorted(terms.items())), name[2:]):
+            data = {term: _encode(postings) for term, postings in group.items()}
+            output_store.write_text(self._file(name, key), json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+            keys.append(key)
+        return keys
+
+    def _write_docs(self, indexes: list[SearchIndex], name: str) -> list[str]:
+        rows = sorted(row for index in indexes for row in index.doc_rows(int(name[2:])))
+        data = {str(doc): [title, slug, description] for doc, title, slug, description in rows}
+        output_store.write_text(self._file(name, name[2:]), json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+        return [name[2:]]
+
+    def save(self) -> None:
+        write_text(self.path, json.dumps({"params": self.params, "parts": self.parts}, separators=(",", ":")))
+
+
+def drop_search_output() -> None:
+    """Busca desligada: remove o índice publicado e o estado (o próximo build com busca refaz tudo)."""
+    if os.path.isdir(SEARCH_DIR):
+        output_store.remove(SEARCH_DIR)
+    if os.path.exists(STATE_PATH):
+        os.remove(STATE_PATH)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+import glob
+import hashlib
+import json
+import os
+from typing import Iterable, Iterator, NamedTuple
+
+from .config import cfg
+from .posts import PostMeta
+from .utils import slugify, write_text
+
+
+SHARDS_DIR = os.path.join(cfg.CACHE_DIR, "shards")
+PARTIAL_VERSION = 1
+
+
+def shard_of(slug: str, count: int) -> int:
+    """Shard (1..count) dono de `slug`: hash estável, igual em qualquer máquina e execução."""
+    return int.from_bytes(hashlib.sha256(slug.encode("utf-8")).digest()[:8], "big") % count + 1
+
+
+class Shard(NamedTuple):
+    """Fatia `index` de `count` (1-based, como em `--shard 2/4`)."""
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "Shard":
+        try:
+            index, count = (int(part) for part in spec.split("/"))
+        except ValueError:
+            raise ValueError(f"shard inválido: {spec!r} (use i/N, ex.: 1/4)") from None
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"shard inválido: {spec!r} (i deve estar entre 1 e N)")
+        return cls(index, count)
+
+    @property
+    def tag(self) -> str:
+        return f"{self.index}-of-{self.count}"
+
+    def owns(self, slug: str) -> bool:
+        return shard_of(slug, self.count) == self.index
+
+    def share(self, total: int) -> int:
+        """Fatia deste shard de um limite por run (orçamento de API): total // N, e o resto fica com o shard 1."""
+        return total // self.count + (total % self.count if self.index == 1 else 0)
+
+
+class ShardPlan:
+    """Filtra as palavras-chave de um shard e guarda um hash da lista completa (de todos os shards).
+
+    O merge compara esse hash entre as partes: shards gerados a partir de listas diferentes
+    deixariam buracos ou duplicatas no site.
+    """
+
+    def __init__(self, shard: Shard):
+        self.shard = shard
+        self.total = 0
+        self._hash = hashlib.sha256()
+
+    def select(self, keywords: Iterable[str]) -> Iterator[str]:
+        for kw in keywords:
+            slug = slugify(kw)
+            self._hash.update(slug.encode("utf-8") + b"\n")
+            self.total += 1
+            if self.shard.owns(slug):
+                yield kw
+
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def partial_path(shard: Shard, directory: str | None = None) -> str:
+    return os.path.join(directory or SHARDS_DIR, f"shard-{shard.tag}.json")
+
+
+def write_partial(plan: ShardPlan, posts: Iterable[PostMeta], inputs: str, assets: Iterable[str]) -> str:
+    """Manifest parcial de um shard: metadados dos posts (o que listagens e sitemap precisam),
+    hash das entradas dos templates e derivados de imagem que o shard usa (relativos a ASSETS_DIR)."""
+    path = partial_path(plan.shard)
+    data = {
+        "version": PARTIAL_VERSION,
+        "shard": plan.shard.index,
+        "count": plan.shard.count,
+        "plan": plan.digest,
+        "planned": plan.total,
+        "inputs": inputs,
+        "assets": sorted(assets),
+        "posts": [p.as_dict() for p in posts],
+    }
+    write_text(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return path
+
+
+class MergeError(Exception):
+    """Conjunto de manifests parciais incompleto ou inconsistente."""
+
+
+def load_partials(paths: Iterable[str] | None = None) -> tuple[list[PostMeta], dict]:
+    """Junta os manifests parciais; exige todos os shards 1..N, do mesmo plano e com as mesmas entradas.
+
+    Retorna (posts ordenados por slug, {"count", "plan", "inputs", "assets"}).
+    """
+    paths = sorted(paths or glob.glob(os.path.join(SHARDS_DIR, "shard-*.json")))
+    if not paths:
+        raise MergeError(f"nenhum manifest parcial em {SHARDS_DIR}")
+    parts: dict[int, dict] = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != PARTIAL_VERSION:
+            raise MergeError(f"{path}: versão de manifest parcial não suportada")
+        if data["shard"] in parts:
+            raise MergeError(f"{path}: shard {data['shard']} repetido")
+        parts[data["shard"]] = data
+    first = next(iter(parts.values()))
+    count = first["count"]
+    for key in ("count", "plan", "inputs"):
+        if any(p[key] != first[key] for p in parts.values()):
+            raise MergeError(f"manifests parciais com '{key}' diferente (shards de builds distintos?)")
+    missing = sorted(set(range(1, count + 1)) - parts.keys())
+    if missing:
+        raise MergeError(f"faltam os shards {', '.join(f'{i}/{count}' for i in missing)}")
+
+    posts: dict[str, PostMeta] = {}
+    assets: set[str] = set()
+    for index in sorted(parts):
+        assets.update(parts[index]["assets"])
+        for item in parts[index]["posts"]:
+            if item["slug"] in posts:
+                raise MergeError(f"post {item['slug']} em mais de um shard")
+            posts[item["slug"]] = PostMeta(**item)
+    info = {"count": count, "plan": first["plan"], "inputs": first["inputs"], "assets": sorted(assets)}
+    return [posts[s] for s in sorted(posts)], info
@@ -0,0 +1,108 @@
+from __future__ import annotations
+import gzip
+import os
+from typing import Iterable
+from xml.sax.saxutils import escape
+
+from .config import cfg
+from .output_store import output_store
+
+
+INDEX_NAME = "sitemap_index.xml"
+SHARD_PATTERN = "sitemap-{n}.xml.gz"
+# Limite do protocolo: 50.000 URLs ou 50 MB (descomprimido) por arquivo
+MAX_SHARD_BYTES = 50 * 1024 * 1024 - 1024
+
+_URLSET_OPEN = b'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+_URLSET_CLOSE = b"</urlset>\n"
+
+
+class SitemapWriter:
+    """Grava sitemaps em fragmentos `sitemap-N.xml.gz` de forma incremental e fecha com um `sitemap_index.xml`.
+
+    Uso: `add(loc, lastmod)` para cada URL e `close()` no final. O gzip é determinístico
+    (mtime=0), então fragmentos sem mudança não são regravados (o output store compara o conteúdo).
+    """
+
+    def __init__(self, outdir: str, max_urls: int | None = None, max_bytes: int = MAX_SHARD_BYTES):
+        self.outdir = outdir
+        self.max_urls = max_urls or cfg.SITEMAP_MAX_URLS
+        self.max_bytes = max_bytes
+        self.shards: list[tuple[str, str]] = []  # (nome, lastmod mais recente)
+        self._gz: gzip.GzipFile | None = None
+        self._raw = None
+        self._tmp = ""
+        self._count = 0
+        self._bytes = 0
+        self._lastmod = ""
+
+    def _open_shard(self) -> None:
+        name = SHARD_PATTERN.format(n=len(self.shards) + 1)
+        self._tmp = output_store.temp_path(os.path.join(self.outdir, name))
+        self._raw = open(self._tmp, "wb")
+        self._gz = gzip.GzipFile(filename="", mode="wb", fileobj=self._raw, mtime=0)
+        self._gz.write(_URLSET_OPEN)
+        self._count = 0
+        self._bytes = len(_URLSET_OPEN) + len(_URLSET_CLOSE)
+        self._lastmod = ""
+        self.shards.append((name, ""))
+
+    def _close_shard(self) -> None:
+        if self._gz is None:
+            return
+        self._gz.write(_URLSET_CLOSE)
+        self._gz.close()
+        self._raw.close()
+        name = self.shards[-1][0]
+        output_store.settle(self._tmp, os.path.join(self.outdir, name))
+        self.shards[-1] = (name, self._lastmod)
+        self._gz = None
+
+    def add(self, loc: str, lastmod: str) -> None:
+        entry = f"  <url>\n    <loc>{escape(loc)}</loc>\n    <lastmod>{escape(lastmod)}</lastmod>\n  </url>\n".encode("utf-8")
+        if self._gz is not None and (self._count >= self.max_urls or self._bytes + len(entry) > self.max_bytes):
+            self._close_shard()
+        if self._gz is None:
+            self._open_shard()
+        self._gz.write(entry)
+        self._count += 1
+        self._bytes += len(entry)
+        self._lastmod = max(self._lastmod, lastmod)
+
+    def add_all(self, urls: Iterable[dict]) -> "SitemapWriter":
+        for u in urls:
+            self.add(u["loc"], u["lastmod"])
+        return self
+
+    def close(self) -> str:
+        self._close_shard()
+        if not self.shards:
+            # Sitemap vazio ainda precisa ser válido
+            self._open_shard()
+            self._close_shard()
+        self._prune()
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+        for name, lastmod in self.shards:
+            lines.append(f"  <sitemap>\n    <loc>{escape(cfg.SITE_URL)}/{name}</loc>")
+            if lastmod:
+                lines.append(f"    <lastmod>{escape(lastmod)}</lastmod>")
+            lines.append("  </sitemap>")
+        lines.append("</sitemapindex>\n")
+        path = os.path.join(self.outdir, INDEX_NAME)
+        output_store.write_text(path, "\n".join(lines))
+        return path
+
+    def _prune(self) -> None:
+        """Remove fragmentos de execuções anteriores que sobraram e o antigo sitemap.xml único."""
+        n = len(self.shards) + 1
+        while os.path.exists(os.path.join(self.outdir, SHARD_PATTERN.format(n=n))):
+            output_store.remove(os.path.join(self.outdir, SHARD_PATTERN.format(n=n)))
+            n += 1
+        legacy = os.path.join(self.outdir, "sitemap.xml")
+        if os.path.exists(legacy):
+            output_store.remove(legacy)
+
+
+def write_sitemaps(outdir: str, urls: Iterable[dict]) -> str:
+    """Grava os fragmentos e o índice a partir de um iterável de {"loc", "lastmod"}; retorna o caminho do índice."""
+    return SitemapWriter(outdir).add_all(urls).close()
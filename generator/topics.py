@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from .affiliate import cta_matcher
+
+
+# Rótulos dos hubs; os temas vêm das regras de CTA com `hub` (data/cta_rules.csv) e das seções extras do outline
+TOPIC_LABELS = {
+    "moedores": "Moedores e moagem",
+    "metodos": "Cafeteiras e métodos de preparo",
+    "filtros": "Filtros e coadores",
+    "balancas": "Balanças e medidas",
+    "proporcoes": "Proporções e receitas",
+    "guias": "Guias gerais",
+}
+DEFAULT_TOPIC = "guias"
+
+# Seções extras do outline: (tema, gatilhos, seção). Usada por `outline_from_keyword` e, depois das
+# regras de CTA, por `topic_of`; a ordem é a de inserção no outline (cada uma entra na 2ª posição)
+OUTLINE_RULES: list[tuple[str, tuple[str, ...], str]] = [
+    ("moedores", ("moedor", "moagem"), "Tipos de moedores e moagens"),
+    ("metodos", ("cafeteira", "método", "metodo"), "Como funciona o método"),
+    ("proporcoes", ("proporção", "proporcao"), "Entendendo proporções e receitas"),
+]
+
+
+def outline_matches(keyword: str) -> list[tuple[str, tuple[str, ...], str]]:
+    """Linhas de `OUTLINE_RULES` cujos gatilhos aparecem na palavra-chave, na ordem da tabela."""
+    k = (keyword or "").lower()
+    return [rule for rule in OUTLINE_RULES if any(w in k for w in rule[1])]
+
+
+def topic_of(keyword: str) -> str:
+    """Tema (slug do hub) de uma palavra-chave, com a mesma prioridade das heurísticas existentes."""
+    for rule in cta_matcher().match(keyword):
+        if rule.hub:
+            return rule.hub
+    for topic, _triggers, _section in outline_matches(keyword):
+        return topic
+    return DEFAULT_TOPIC
@@ -8,11 +8,15 @@ def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
+def fold(text: str) -> str:
+    """Normalização comum a slugs e termos de busca: sem acentos (unidecode) e em minúsculas."""
+    return unidecode(text or "").lower()
+
+
 def slugify(text: str) -> str:
     if not text:
         return ""
-    text = unidecode(text)
-    text = text.lower()
+    text = fold(text)
     text = re.sub(r"[^a-z0-9\-\s]", "", text)
     text = re.sub(r"\s+", "-", text)
     text = re.sub(r"-+", "-", text)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+import os
+import time
+from collections import deque
+from typing import Iterable, Iterator
+
+from jinja2 import Environment, meta
+
+
+class DependencyGraph:
+    """Grafo de dependências do build: aresta `a → b` quando mudar `a` exige refazer `b`.
+
+    Nós são strings com prefixo de tipo: `template:<nome>`, `keyword:<kw>`, `llm:<slug>`,
+    `post:<slug>` e saídas agregadas (`listings`, `pages`, `sitemap`, `robots`, `css`).
+    """
+
+    def __init__(self):
+        self.children: dict[str, set[str]] = {}
+        self.parents: dict[str, set[str]] = {}
+
+    def add(self, src: str, dst: str) -> None:
+        self.children.setdefault(src, set()).add(dst)
+        self.parents.setdefault(dst, set()).add(src)
+
+    def remove(self, node: str) -> None:
+        for child in self.children.pop(node, ()):
+            self.parents.get(child, set()).discard(node)
+        for parent in self.parents.pop(node, ()):
+            self.children.get(parent, set()).discard(node)
+
+    def unlink(self, src: str, dst: str) -> None:
+        self.children.get(src, set()).discard(dst)
+        self.parents.get(dst, set()).discard(src)
+
+    def affected(self, nodes: Iterable[str]) -> set[str]:
+        """Fecho transitivo: os próprios nós e tudo que depende deles."""
+        seen = set(nodes)
+        queue = deque(seen)
+        while queue:
+            for child in self.children.get(queue.popleft(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    queue.append(child)
+        return seen
+
+
+def template_refs(env: Environment, name: str) -> set[str]:
+    """Templates citados diretamente por `name` (`extends`/`include`/`import`); nomes dinâmicos ficam de fora."""
+    source, _filename, _uptodate = env.loader.get_source(env, name)
+    return {ref for ref in meta.find_referenced_templates(env.parse(source)) if ref}
+
+
+def snapshot(paths: Iterable[str]) -> dict[str, tuple[int, int]]:
+    """(mtime_ns, tamanho) de cada arquivo sob `paths` (arquivos ou diretórios, recursivo)."""
+    found: dict[str, tuple[int, int]] = {}
+    stack = [p for p in paths if os.path.exists(p)]
+    while stack:
+        path = stack.pop()
+        if os.path.isdir(path):
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        found[os.path.normpath(entry.path)] = (st.st_mtime_ns, st.st_size)
+        else:
+            st = os.stat(path)
+            found[os.path.normpath(path)] = (st.st_mtime_ns, st.st_size)
+    return found
+
+
+def watch(paths: list[str], interval: float = 0.25) -> Iterator[set[str]]:
+    """Polling de `paths`; gera o conjunto de arquivos criados, alterados ou removidos a cada rodada.
+
+    Uma mudança só é entregue depois de uma rodada sem novidades, então o salvamento de
+    vários arquivos pelo editor vira um lote só.
+    """
+    before = snapshot(paths)
+    pending: set[str] = set()
+    while True:
+        time.sleep(interval)
+        now = snapshot(paths)
+        diff = {p for p in before.keys() | now.keys() if before.get(p) != now.get(p)}
+        before = now
+        if diff:
+            pending |= diff
+        elif pending:
+            yield pending
+            pending = set()
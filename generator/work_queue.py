@@ -0,0 +1,204 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import closing
+from typing import Iterable
+
+from .concurrency import CallBudget
+from .config import cfg
+from .llm import body_cached, metadata_pending
+from .metrics import metrics
+from .output_store import output_store
+from .utils import ensure_dir, slugify
+
+
+QUEUE_FILE = "work-queue.sqlite3"
+KINDS = ("body", "metadata", "image")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    keyword TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    added REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    next_at REAL NOT NULL,
+    PRIMARY KEY (keyword, kind)
+);
+"""
+
+# Campos de cada item em memória (lista, para caber 100k+ palavras-chave)
+_SEQ, _ADDED, _ATTEMPTS, _NEXT_AT = range(4)
+
+
+def pending_work(keyword: str, outline: list[str]) -> set[str]:
+    """Trabalho de API que ainda falta para `keyword`: corpo real, título/description e capa raster.
+
+    Título/description só contam como item próprio quando não virão junto com o corpo (chamada
+    estruturada); o placeholder SVG não conta como capa.
+    """
+    kinds = set()
+    if cfg.GENERATE_WITH_LLM and not body_cached(keyword, outline):
+        kinds.add("body")
+    if metadata_pending(keyword, outline):
+        kinds.add("metadata")
+    if cfg.GENERATE_IMAGES and not output_store.exists(os.path.join(cfg.ASSETS_DIR, f"{slugify(keyword)}.png")):
+        kinds.add("image")
+    return kinds
+
+
+class GrantedBudget:
+    """O orçamento global visto por uma palavra-chave: só libera os tipos que o plano concedeu a ela."""
+
+    def __init__(self, budget: CallBudget, kinds: set[str]):
+        self.budget = budget
+        self.allowed = {"count": bool(kinds & {"body", "metadata"}), "img": "image" in kinds}
+        self.spent: set[str] = set()
+
+    def try_spend(self, kind: str) -> bool:
+        if not self.allowed.get(kind) or not self.budget.try_spend(kind):
+            return False
+        self.spent.add(kind)
+        return True
+
+    def refund(self, kind: str) -> None:
+        self.budget.refund(kind)
+
+    def get(self, kind: str, default: int = 0) -> int:
+        return self.budget.get(kind, default)
+
+
+class WorkQueue:
+    """Fila persistente (SQLite em CACHE_DIR) do trabalho de API pendente por palavra-chave.
+
+    A cada build: `sync` alinha a fila com as palavras-chave do plano (itens novos entram; os
+    concluídos e os de palavras-chave que saíram somem), `plan` concede o que cabe no orçamento,
+    em ordem de prioridade, `budget` dá a cada artigo uma vista do orçamento restrita ao concedido
+    e `settle` registra o resultado: item concluído sai, item que falhou volta com backoff
+    exponencial. `save` grava a fila no fim do build.
+
+    Classes de prioridade (`QUEUE_PRIORITY`, da primeira à última): `new` (corpo/título de palavra-chave
+    que entrou neste build), `body` (post com texto de fallback), `metadata`, `retry` (item que já
+    falhou, passado o backoff) e `image`. Capa só é pedida para post que já tem corpo real. Dentro
+    de uma classe, vale a ordem de chegada na fila: o fim do arquivo de palavras-chave não fica para trás.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(cfg.CACHE_DIR, QUEUE_FILE)
+        self.started = time.time()
+        self.items: dict[tuple[str, str], list] = {}
+        self.grants: dict[str, set[str]] = {}
+        self.results: Counter = Counter()
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            with closing(self._connect()) as db:
+                for keyword, kind, seq, added, attempts, next_at in db.execute("SELECT * FROM items"):
+                    self.items[(keyword, kind)] = [seq, added, attempts, next_at]
+
+    def _connect(self) -> sqlite3.Connection:
+        ensure_dir(os.path.dirname(self.path) or ".")
+        db = sqlite3.connect(self.path)
+        db.executescript(_SCHEMA)
+        return db
+
+    def sync(self, pending: Iterable[tuple[str, set[str]]]) -> None:
+        """Recebe (palavra-chave, tipos pendentes) de todo o plano, na ordem do arquivo."""
+        live: dict[tuple[str, str], list] = {}
+        for seq, (keyword, kinds) in enumerate(pending):
+            for kind in kinds:
+                item = self.items.get((keyword, kind))
+                if item is None:
+                    item = [seq, self.started, 0, 0.0]
+                    metrics.incr("queue.added")
+                item[_SEQ] = seq
+                live[(keyword, kind)] = item
+        metrics.incr("queue.dropped", len(self.items.keys() - live.keys()))
+        self.items = live
+
+    def _class(self, kind: str, item: list) -> str:
+        if item[_ATTEMPTS]:
+            return "retry"
+        if kind != "image" and item[_ADDED] >= self.started:
+            return "new"
+        return kind
+
+    def plan(self, llm_calls: int, img_calls: int) -> dict[str, set[str]]:
+        """Concede itens até o orçamento; títulos/descriptions em lote custam 1/LLM_META_BATCH de chamada."""
+        order = {name.strip(): i for i, name in enumerate(cfg.QUEUE_PRIORITY.split(",")) if name.strip()}
+        without_body = {kw for kw, kind in self.items if kind == "body"}
+        ready = sorted(
+            (order.get(self._class(kind, item), len(order)), item[_ADDED], item[_SEQ], kw, kind)
+            for (kw, kind), item in self.items.items()
+            if item[_NEXT_AT] <= self.started and not (kind == "image" and kw in without_body)
+        )
+        batch = cfg.LLM_META_BATCH if cfg.LLM_META_BATCH > 1 else 1
+        llm_left, img_left, meta_slots = llm_calls, img_calls, 0
+        self.grants = {}
+        for _rank, _added, _seq, kw, kind in ready:
+            if kind == "image":
+                if img_left <= 0:
+                    continue
+                img_left -= 1
+            elif kind == "metadata" and meta_slots:
+                meta_slots -= 1
+            else:
+                if llm_left <= 0:
+                    continue
+                llm_left -= 1
+                if kind == "metadata":
+                    meta_slots = batch - 1
+            self.grants.setdefault(kw, set()).add(kind)
+        for kinds in self.grants.values():
+            for kind in kinds:
+                metrics.incr(f"queue.granted.{kind}")
+        return self.grants
+
+    def granted(self, kind: str) -> list[str]:
+        """Palavras-chave com `kind` concedido, na ordem da fila."""
+        keys = [kw for kw, kinds in self.grants.items() if kind in kinds]
+        return sorted(keys, key=lambda kw: (self.items[(kw, kind)][_ADDED], self.items[(kw, kind)][_SEQ]))
+
+    def budget(self, keyword: str, budget: CallBudget) -> GrantedBudget:
+        return GrantedBudget(budget, self.grants.get(keyword, set()))
+
+    def settle(self, keyword: str, budget: GrantedBudget, pending: set[str]) -> None:
+        """Registra o resultado dos itens concedidos a `keyword`, dado o que ainda ficou pendente.
+
+        Item que não chegou a gastar orçamento (o global acabou antes) continua na fila sem penalidade.
+        """
+        now = time.time()
+        with self._lock:
+            for kind in self.grants.get(keyword, ()):
+                key = (keyword, kind)
+                if kind not in pending:
+                    self.items.pop(key, None)
+                    self.results["done"] += 1
+                elif ("img" if kind == "image" else "count") in budget.spent:
+                    item = self.items[key]
+                    item[_ATTEMPTS] += 1
+                    hours = min(cfg.QUEUE_BACKOFF_MAX_HOURS, cfg.QUEUE_BACKOFF_HOURS * 2 ** (item[_ATTEMPTS] - 1))
+                    item[_NEXT_AT] = now + hours * 3600
+                    self.results["failed"] += 1
+                else:
+                    self.results["not_started"] += 1
+
+    def save(self) -> None:
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM items")
+            db.executemany(
+                "INSERT INTO items (keyword, kind, seq, added, attempts, next_at) VALUES (?, ?, ?, ?, ?, ?)",
+                ((kw, kind, *item) for (kw, kind), item in self.items.items()),
+            )
+
+    def stats(self) -> dict:
+        pending = Counter(kind for _kw, kind in self.items)
+        granted = Counter(kind for kinds in self.grants.values() for kind in kinds)
+        return {
+            "pending": {kind: pending.get(kind, 0) for kind in KINDS},
+            "granted": {kind: granted.get(kind, 0) for kind in KINDS},
+            "backing_off": sum(1 for item in self.items.values() if item[_NEXT_AT] > self.started),
+            **{k: self.results.get(k, 0) for k in ("done", "failed", "not_started")},
+        }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Benchmark de ponta a ponta do build contra um stand-in local da OpenRouter.
+
+Gera corpora sintéticos de palavras-chave, roda `scripts.generate` (frio e incremental) medindo
+tempo total e pico de RSS, mede a vazão de cada etapa e grava tudo em JSON.
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from scripts.fake_openrouter import FakeOpenRouter
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_ACOES = ["como fazer", "como escolher", "guia de", "dicas de", "erros comuns no", "receita de", "como limpar",
+          "comparativo de", "melhor", "como usar", "passo a passo do", "como regular", "quanto custa",
+          "vale a pena", "manutenção do", "como armazenar", "truques para", "iniciante em", "segredos do", "checklist de"]
+_OBJETOS = ["café coado", "moedor manual", "moedor elétrico", "prensa francesa", "aeropress", "cafeteira italiana",
+            "espresso", "cold brew", "filtro de papel", "filtro de metal", "balança de café", "chaleira bico de ganso",
+            "café em grãos", "café gelado", "cappuccino", "latte", "v60", "chemex", "clever", "sifão",
+            "moka", "café solúvel", "leite vaporizado", "torra clara", "torra escura"]
+_CONTEXTOS = ["em casa", "no escritório", "para iniciantes", "sem gastar muito", "para viagem", "em 5 minutos",
+              "com pouco equipamento", "para duas pessoas", "no verão", "no inverno", "com leite vegetal",
+              "sem açúcar", "para presentear", "em apartamento pequeno", "para camping", "com água da torneira",
+              "para a família", "de manhã", "à tarde", "com sobremesa"]
+_QUALIFICADORES = ["", "2025", "fácil", "rápido", "barato", "premium", "passo a passo", "completo", "prático", "atualizado"]
+
+
+def synthetic_keywords(n: int, seed: int = 42) -> list[str]:
+    """`n` palavras-chave únicas e determinísticas no estilo de data/keywords.txt (até 100.000)."""
+    combos = list(itertools.product(_QUALIFICADORES, _ACOES, _OBJETOS, _CONTEXTOS))
+    if n > len(combos):
+        raise ValueError(f"no máximo {len(combos)} palavras-chave sintéticas")
+    random.Random(seed).shuffle(combos)
+    return [" ".join(p for p in (acao, obj, ctx, q) if p) for q, acao, obj, ctx in combos[:n]]
+
+
+def write_corpus(path: str, n: int, seed: int = 42) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        for kw in synthetic_keywords(n, seed):
+            f.write(kw + "\n")
+    return path
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def run_build(env: dict, extra_args: list[str] | None = None) -> dict:
+    """Roda `python -m scripts.generate` num subprocesso; devolve tempo total e pico de RSS."""
+    # Saída num arquivo, não num pipe: um build verboso encheria o pipe e travaria no wait4.
+    # wait4 dá o pico de RSS só deste filho (RUSAGE_CHILDREN seria o máximo entre todos os builds)
+    with tempfile.TemporaryFile() as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-m", "scripts.generate", *(extra_args or [])], cwd=ROOT, env=env,
+                                stdout=log, stderr=subprocess.STDOUT)
+        _pid, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        wall = time.perf_counter() - start
+        log.seek(0)
+        output = log.read().decode("utf-8", "replace").strip()
+    return {
+        "wall_s": round(wall, 3),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "exit_code": proc.returncode,
+        "output": output.splitlines()[-1] if output else "",
+    }
+
+
+def stage_throughput(env: dict, sample: int) -> dict:
+    """Mede cada etapa isoladamente num subprocesso (config lida do ambiente)."""
+    code = f"""
+import json, os, time
+from generator.concurrency import CallBudget
+from generator.config import cfg
+from generator.markdown import markdown_to_html
+from generator.renderer import get_renderer, _write
+from generator.sitemap import write_sitemaps
+from scripts.generate import generate_articles, iter_seeds
+from itertools import islice
+
+budget = CallBudget({{"count": cfg.LLM_MAX_CALLS_PER_RUN, "img": cfg.IMG_MAX_CALLS_PER_RUN}})
+renderer = get_renderer()
+t = dict(generation=0.0, markdown=0.0, render=0.0, write=0.0, sitemap=0.0)
+urls, n = [], 0
+it = generate_articles(islice(iter_seeds(), {sample}), budget)
+while True:
+    t0 = time.perf_counter()
+    article = next(it, None)
+    t1 = time.perf_counter()
+    if article is None:
+        break
+    t["generation"] += t1 - t0
+    body = markdown_to_html(article["body_md"])
+    t2 = time.perf_counter()
+    html = renderer.article_html({{**article, "body_html": body}})
+    t3 = time.perf_counter()
+    _write(os.path.join(cfg.OUTPUT_DIR, "posts", article["slug"]), "index.html", html)
+    t4 = time.perf_counter()
+    t["markdown"] += t2 - t1; t["render"] += t3 - t2; t["write"] += t4 - t3
+    urls.append({{"loc": article["url"], "lastmod": "2025-01-01T00:00:00+00:00"}})
+    n += 1
+t0 = time.perf_counter()
+write_sitemaps(cfg.OUTPUT_DIR, urls)
+t["sitemap"] = time.perf_counter() - t0
+print(json.dumps({{"items": n, "stages": {{k: {{"seconds": round(v, 4), "items_per_s": round(n / v, 1) if v else None}} for k, v in t.items()}}}}))
+"""
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "falhou"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench_size(size: int, fake: FakeOpenRouter, args) -> dict:
+    with tempfile.TemporaryDirectory(prefix=f"cafeiro-bench-{size}-") as tmp:
+        seeds = write_corpus(os.path.join(tmp, "keywords.txt"), size, args.seed)
+        env = {
+            **os.environ,
+            "KEYWORDS_FILE": seeds,
+            "OUTPUT_DIR": os.path.join(tmp, "public"),
+            "CACHE_DIR": os.path.join(tmp, "cache"),
+            "ASSETS_DIR": os.path.join(tmp, "public", "assets"),
+            "OPENROUTER_API_KEY": "bench",
+            "OPENROUTER_BASE_URL": fake.base_url,
+            "MAX_POSTS_TOTAL": str(size),
+            "LLM_MAX_CALLS_PER_RUN": str(args.llm_calls),
+            "IMG_MAX_CALLS_PER_RUN": str(args.img_calls),
+            "API_REQUESTS_PER_MINUTE": "0",
+            "HTTP_BACKOFF_BASE": "0.01",
+        }
+        cold = run_build(env)
+        warm = run_build(env)
+        stage_env = {**env, "OUTPUT_DIR": os.path.join(tmp, "stages"), "CACHE_DIR": os.path.join(tmp, "stages-cache"),
+                     "ASSETS_DIR": os.path.join(tmp, "stages", "assets")}
+        stages = stage_throughput(stage_env, min(size, args.stage_sample))
+    return {"size": size, "cold": cold, "incremental": warm, **stages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta do build")
+    parser.add_argument("--sizes", default="1000", help="Tamanhos de corpus separados por vírgula (ex.: 1000,10000,100000)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Latência do stand-in da OpenRouter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 429 do stand-in")
+    parser.add_argument("--payload-bytes", type=int, default=4000, help="Tamanho aproximado de cada corpo gerado")
+    parser.add_argument("--llm-calls", type=int, default=100, help="LLM_MAX_CALLS_PER_RUN durante o benchmark")
+    parser.add_argument("--img-calls", type=int, default=20, help="IMG_MAX_CALLS_PER_RUN durante o benchmark")
+    parser.add_argument("--stage-sample", type=int, default=2000, help="Máximo de posts na medição por etapa")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="Arquivo JSON de saída (padrão: bench-results/<data>-<commit>.json)")
+    args = parser.parse_args()
+
+    fake = FakeOpenRouter(latency_ms=args.latency_ms, error_rate=args.error_rate,
+                          payload_bytes=args.payload_bytes, seed=args.seed).start()
+    try:
+        runs = []
+        for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+            run = bench_size(size, fake, args)
+            runs.append(run)
+            print(f"{size:>7} keywords: frio {run['cold']['wall_s']}s / incremental {run['incremental']['wall_s']}s, "
+                  f"pico RSS {run['cold']['peak_rss_mb']} MB")
+    finally:
+        fake.stop()
+
+    commit = _git_commit()
+    result = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "params": {k: v for k, v in vars(args).items() if k != "out"},
+        "runs": runs,
+    }
+    out = args.out or os.path.join(ROOT, "bench-results", f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Resultados em {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Micro-benchmark do casamento de regras de CTA: matcher compilado vs varredura linear das regras.
+
+Sem `--sizes`, mede as regras reais (data/cta_rules.csv, algumas centenas) e depois elas
+completadas com categorias sintéticas até 1.000 e 10.000; o custo por palavra-chave do matcher
+deve ficar ~constante, o da varredura cresce com N.
+
+Uso: `python -m scripts.bench_cta [--sizes 100,1000,10000] [--json]`
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import time
+
+from generator.affiliate import CtaMatcher, CtaRule, load_cta_rules, normalize
+from scripts.generate import iter_seeds
+
+_SYLLABLES = ["ca", "fe", "mo", "li", "tor", "ra", "gra", "bal", "san", "pre", "vi", "nho", "qua", "dri", "pel", "zu"]
+
+
+def synthetic_rules(base: list[CtaRule], size: int, rng: random.Random) -> list[CtaRule]:
+    rules = list(base)
+    while len(rules) < size:
+        word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(3, 5)))
+        triggers = (word, f"{word} {rng.choice(_SYLLABLES)}{rng.choice(_SYLLABLES)}")
+        rules.append(CtaRule(rng.randint(1, 99), "", word, triggers, (f"{word} premium",)))
+    return rules[:size]
+
+
+def linear_best(rules: list[tuple[CtaRule, list[str]]], keyword: str) -> CtaRule | None:
+    """O que o código fazia antes: testa regra a regra (aqui já em ordem de prioridade e normalizadas)."""
+    k = normalize(keyword)
+    for rule, triggers in rules:
+        if any(t in k for t in triggers):
+            return rule
+    return None
+
+
+def timed(fn, keywords: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        for kw in keywords:
+            fn(kw)
+        best = min(best, time.perf_counter() - start)
+    return best / len(keywords) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark das regras de CTA")
+    parser.add_argument("--sizes", help="Tamanhos do conjunto de regras (padrão: as regras reais, 1000, 10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Rodadas sobre as palavras-chave (vale a melhor)")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(17)
+    keywords = list(iter_seeds()) or ["moedor manual para viagem"]
+    base = load_cta_rules()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()] if args.sizes else [len(base), 1000, 10000]
+    rows = []
+    for size in sizes:
+        rules = synthetic_rules(base, size, rng)
+        start = time.perf_counter()
+        matcher = CtaMatcher(rules)
+        compile_ms = (time.perf_counter() - start) * 1000
+        ranked = [(r, [normalize(t) for t in r.triggers]) for r in matcher.rules]
+        rows.append({
+            "rules": len(rules),
+            "compile_ms": round(compile_ms, 2),
+            "compiled_us": round(timed(matcher.ranks, keywords, args.repeat), 2),
+            "linear_us": round(timed(lambda kw: linear_best(ranked, kw), keywords, args.repeat), 2),
+        })
+
+    if args.json:
+        print(json.dumps({"keywords": len(keywords), "results": rows}))
+    else:
+        print(f"{len(keywords)} palavras-chave; µs por palavra-chave")
+        for r in rows:
+            print(f"{r['rules']:>6} regras: compilado {r['compiled_us']:>8.2f} µs, linear {r['linear_us']:>10.2f} µs "
+                  f"(compilação {r['compile_ms']:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import time
+
+from generator.config import cfg
+from generator.llm import gen_article_body, parse_json
+from generator.llm_cache import CACHE_FILE
+from generator.markdown import markdown_to_html
+
+
+def _markdown_of(content: str) -> str | None:
+    """O Markdown de uma resposta em cache: ela mesma ou, se for JSON, o `body_md`."""
+    if not content.lstrip().startswith(("{", "```")):
+        return content
+    data = parse_json(content)
+    if not isinstance(data, dict):
+        return content
+    body = data.get("body_md")
+    return body if isinstance(body, str) else None
+
+
+def load_corpus() -> list[str]:
+    """Corpos em cache: arquivos legados cache/llm/*.md e respostas no cache SQLite.
+
+    Respostas estruturadas (JSON) entram só pelo `body_md`; objetos sem corpo (título/description)
+    ficam de fora. Sem cache local, usa os textos de fallback das seeds padrão.
+    """
+    docs = []
+    for path in sorted(glob.glob(os.path.join(cfg.CACHE_DIR, "llm", "*.md"))):
+        with open(path, "r", encoding="utf-8") as f:
+            docs.append(f.read())
+    db_path = os.path.join(cfg.CACHE_DIR, CACHE_FILE)
+    if os.path.exists(db_path):
+        with sqlite3.connect(db_path) as conn:
+            for (content,) in conn.execute("SELECT content FROM responses WHERE size > 500"):
+                body = _markdown_of(content)
+                if body:
+                    docs.append(body)
+    if not docs:
+        from scripts.generate import iter_seeds, outline_from_keyword
+        docs = [gen_article_body(kw, outline_from_keyword(kw), offline=True) for kw in iter_seeds()]
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark do conversor Markdown → HTML")
+    parser.add_argument("--repeat", type=int, default=5, help="Rodadas sobre o corpus (vale a melhor)")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    docs = load_corpus()
+    total_bytes = sum(len(d.encode("utf-8")) for d in docs)
+    best = float("inf")
+    for _ in range(max(1, args.repeat)):
+        start = time.perf_counter()
+        for d in docs:
+            markdown_to_html(d)
+        best = min(best, time.perf_counter() - start)
+
+    result = {
+        "docs": len(docs),
+        "bytes": total_bytes,
+        "seconds": round(best, 6),
+        "docs_per_sec": round(len(docs) / best, 1) if best else None,
+        "mb_per_sec": round(total_bytes / best / 1e6, 2) if best else None,
+    }
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(
+            f"{result['docs']} documentos ({total_bytes / 1e3:.1f} kB) em {best * 1000:.2f} ms: "
+            f"{result['docs_per_sec']} docs/s, {result['mb_per_sec']} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Lista seeds repetidas/quase iguais de data/keywords.txt (e opcionalmente regrava o arquivo sem elas).
+
+Uso: `python -m scripts.dedup_keywords [--threshold 0.8] [--write]`; `--check` roda os casos de regressão.
+"""
+from __future__ import annotations
+import argparse
+import sys
+import time
+
+from generator.config import cfg
+from generator.dedup import dedupe_keywords
+from scripts.generate import iter_seeds
+
+
+# (seeds, mantidas, motivos das descartadas) — inclui entradas sem nenhum par candidato no LSH
+CHECKS = [
+    (["como fazer café coado", "balança para café"], ["como fazer café coado", "balança para café"], []),
+    (["moagem para aeropress", "moagem café aeropress"], ["moagem para aeropress"], ["exact"]),
+    (["Moedor Manual", "moedor-manual", "prensa francesa"], ["Moedor Manual", "prensa francesa"], ["slug"]),
+    (["moedor manual viagem barato elétrico", "moedor manual viagem barato elétrico potente"], ["moedor manual viagem barato elétrico"], ["near"]),
+    (["cafeteira italiana"], ["cafeteira italiana"], []),
+    ([], [], []),
+]
+
+
+def check(threshold: float) -> bool:
+    ok = True
+    for seeds, kept, reasons in CHECKS:
+        try:
+            result = dedupe_keywords(seeds, threshold)
+            got = (result.keywords, [d.reason for d in result.duplicates])
+        except Exception as exc:
+            got = repr(exc)
+        if got != (kept, reasons):
+            ok = False
+            print(f"FALHOU {seeds!r}: esperado {(kept, reasons)!r}, obtido {got!r}")
+    print(f"{len(CHECKS)} casos: {'ok' if ok else 'com falhas'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detecção de palavras-chave duplicadas ou quase iguais")
+    parser.add_argument("--threshold", type=float, default=cfg.DEDUP_THRESHOLD, help="Jaccard mínimo entre os termos")
+    parser.add_argument("--limit", type=int, default=50, help="Quantos pares mostrar (0 = todos)")
+    parser.add_argument("--write", action="store_true", help=f"Regrava {cfg.KEYWORDS_FILE} só com as seeds mantidas")
+    parser.add_argument("--check", action="store_true", help="Roda os casos de regressão do dedup e sai (código 1 se algum falhar)")
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(0 if check(args.threshold) else 1)
+
+    seeds = list(iter_seeds())
+    start = time.perf_counter()
+    result = dedupe_keywords(seeds, args.threshold)
+    elapsed = time.perf_counter() - start
+
+    pairs = result.duplicates if args.limit <= 0 else result.duplicates[:args.limit]
+    for dup in pairs:
+        print(f"[{dup.reason} {dup.similarity:.2f}] {dup.keyword!r} → {dup.kept!r}")
+    counts = ", ".join(f"{n} {reason}" for reason, n in result.report(args.threshold)["duplicates"].items())
+    print(f"{len(seeds)} seeds, {len(result.keywords)} mantidas ({counts or 'sem repetidas'}) em {elapsed:.3f}s")
+
+    if args.write and result.duplicates:
+        with open(cfg.KEYWORDS_FILE, "w", encoding="utf-8") as f:
+            for kw in result.keywords:
+                f.write(kw + "\n")
+        print(f"{cfg.KEYWORDS_FILE} regravado.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Servidor local que imita a API da OpenRouter (`/chat/completions` e `/images`) para testes e benchmarks.
+
+Responde no formato que cada prompt pede: JSON de título/description, lote (`items`), artigo
+estruturado (`body_md`) ou Markdown puro.
+
+Com `"stream": true` responde em SSE (chunked), como a API real; `--stall-after N` trava cada
+transmissão depois de N caracteres, mandando só comentários de keep-alive, para exercitar o limite
+de inatividade, o checkpoint e a retomada (mensagem final do assistente = prefixo já recebido).
+
+Uso: `python -m scripts.fake_openrouter --port 8765 --latency-ms 200 --error-rate 0.05`
+e aponte `OPENROUTER_BASE_URL=http://127.0.0.1:8765`.
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Linhas `N. "palavra-chave"` do prompt de títulos em lote
+_BATCH_LINE = re.compile(r'^\s*(\d+)\. "(.*)"$', re.M)
+
+# PNG 1x1 válido
+TINY_PNG_B64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+
+_PARAGRAPH = (
+    "Ajuste a moagem e a proporção de café e água aos poucos, anotando cada mudança. "
+    "Água filtrada entre 90 e 96 °C e um tempo de extração constante fazem mais diferença do que equipamentos caros. "
+)
+
+
+def fake_article(keyword: str, size: int) -> str:
+    """Corpo em Markdown com aproximadamente `size` bytes, no formato que o LLM costuma devolver."""
+    blocks = [f"{keyword.capitalize()} fica simples com alguns cuidados **básicos**."]
+    n = 1
+    while sum(len(b) for b in blocks) < size:
+        blocks.append(f"## Seção {n}\n\n{_PARAGRAPH}\n\n- Dica prática {n}\n- Meça sempre\n- Ajuste um fator por vez")
+        n += 1
+    blocks.append("### Resumo prático\n1. Comece simples\n2. Padronize medidas\n3. Ajuste a moagem")
+    return "\n\n".join(blocks)
+
+
+def fake_metadata(keyword: str) -> dict:
+    return {"title": keyword.capitalize()[:62], "description": f"Guia rápido: {keyword}."[:150]}
+
+
+class FakeOpenRouter:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 error_rate: float = 0.0, payload_bytes: int = 4000, seed: int | None = None,
+                 token_delay_ms: float = 0.0, stall_after: int = 0, stall_seconds: float = 60.0):
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.payload_bytes = payload_bytes
+        self.token_delay = token_delay_ms / 1000.0
+        self.stall_after = stall_after
+        self.stall_seconds = stall_seconds
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: dict, headers: dict | None = None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def _event(self, delta: dict, finish: str | None = None) -> None:
+                event = {"choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+                self._chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+            def _send_stream(self, content: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    self._chunk(b": OPENROUTER PROCESSING\n\n")
+                    self._event({"role": "assistant", "content": ""})
+                    for start in range(0, len(content), 16):
+                        if fake.stall_after and start >= fake.stall_after:
+                            # Conexão viva, mas sem tokens: o cliente tem de desistir pela inatividade
+                            deadline = time.monotonic() + fake.stall_seconds
+                            while time.monotonic() < deadline:
+                                self._chunk(b": OPENROUTER PROCESSING\n\n")
+                                time.sleep(0.2)
+                            self.close_connection = True
+                            return
+                        if fake.token_delay:
+                            time.sleep(fake.token_delay)
+                        self._event({"content": content[start:start + 16]})
+                    self._event({}, "stop")
+                    self._chunk(b"data: [DONE]\n\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                except OSError:
+                    self.close_connection = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                req = json.loads(self.rfile.read(length) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                    fail = fake.random.random() < fake.error_rate
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fail:
+                    return self._send(429, {"error": {"message": "rate limited"}}, {"Retry-After": "0"})
+                if self.path.endswith("/images"):
+                    return self._send(200, {"data": [{"b64_json": TINY_PNG_B64}]})
+                if self.path.endswith("/chat/completions"):
+                    prompt = next((m.get("content", "") for m in reversed(req.get("messages", [])) if m.get("role") == "user"), "")
+                    keyword = prompt.split('"')[1] if prompt.count('"') >= 2 else "café"
+                    if '"items"' in prompt:
+                        batch = _BATCH_LINE.findall(prompt)
+                        content = json.dumps({"items": [dict(fake_metadata(kw), id=int(i)) for i, kw in batch]}, ensure_ascii=False)
+                    elif '"body_md"' in prompt:
+                        content = json.dumps(dict(fake_metadata(keyword), body_md=fake_article(keyword, fake.payload_bytes)), ensure_ascii=False)
+                    elif "JSON" in prompt:
+                        content = json.dumps(fake_metadata(keyword), ensure_ascii=False)
+                    else:
+                        content = fake_article(keyword, fake.payload_bytes)
+                    if not req.get("stream"):
+                        return self._send(200, {"choices": [{"message": {"role": "assistant", "content": content}}]})
+                    # Retomada: a última mensagem do assistente é o começo já recebido da resposta
+                    last = req.get("messages", [{}])[-1]
+                    prefix = last.get("content", "") if last.get("role") == "assistant" else ""
+                    return self._send_stream(content[len(prefix):] if content.startswith(prefix) else content)
+                self._send(404, {"error": {"message": "not found"}})
+
+        return Handler
+
+    def start(self) -> "FakeOpenRouter":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in local da API da OpenRouter")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latência artificial por requisição")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 429 (0–1)")
+    parser.add_argument("--payload-bytes", type=int, default=4000, help="Tamanho aproximado do corpo gerado")
+    parser.add_argument("--token-delay-ms", type=float, default=0.0, help="Pausa entre eventos SSE")
+    parser.add_argument("--stall-after", type=int, default=0, help="Trava cada streaming após N caracteres (0 = nunca)")
+    parser.add_argument("--stall-seconds", type=float, default=60.0, help="Quanto tempo a transmissão fica travada")
+    args = parser.parse_args()
+    fake = FakeOpenRouter(args.host, args.port, args.latency_ms, args.error_rate, args.payload_bytes,
+                          token_delay_ms=args.token_delay_ms, stall_after=args.stall_after, stall_seconds=args.stall_seconds)
+    print(f"Fake OpenRouter em {fake.base_url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,53 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 import argparse
+import cProfile
+import json
 import os
-from datetime import datetime
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import chain, islice
+from typing import IO, Iterable, Iterator
 
 from generator.config import cfg
-from generator.utils import ensure_dir, slugify, write_text, read_text
-from generator.renderer import render_article, render_index, render_page, render_sitemap, render_robots
-from generator.llm import gen_title_and_description, gen_article_body
+from generator.utils import slugify, read_text
+from generator.renderer import Renderer, get_renderer
+from generator.llm import (
+    DEFAULT_TEMPERATURE, article_body_prompt, gen_article, gen_article_body, gen_metadata_batch,
+    gen_title_and_description, metadata_pending,
+)
+from generator.llm_cache import llm_cache
 from generator.affiliate import render_cta_links
-from generator.images import generate_image
+from generator.topics import outline_matches
+from generator.render_pool import render_articles_parallel
+from generator.markdown import MARKDOWN_VERSION
+from generator.images import existing_image, generate_image, placeholder_image, responsive_image
+from generator.concurrency import CallBudget, bounded_map
+from generator.manifest import BuildManifest, content_digest, set_global_inputs, template_digest
+from generator.assets import build_css, precompress_tree
+from generator.posts import PostMeta
+from generator.listing import build_listings
+from generator.dedup import dedupe_keywords
+from generator.related import RelatedIndex
+from generator.http_client import client
+from generator.metrics import metrics, write_report
+from generator.output_store import output_store
+from generator.search import SearchIndex, SearchWriter, drop_search_output
+from generator.shard import Shard, ShardPlan, write_partial
+from generator.work_queue import WorkQueue, pending_work
 
 
-SEED_PATH = "data/keywords.txt"
+SEED_PATH = cfg.KEYWORDS_FILE
+REPORT_PATH = os.path.join(cfg.CACHE_DIR, "build-report.json")
+PROFILE_PATH = os.path.join(cfg.CACHE_DIR, "build-profile.prof")
+DEDUP_REPORT_PATH = os.path.join(cfg.CACHE_DIR, "keyword-dedup.json")
 
 
-def load_seeds() -> list[str]:
+def iter_seeds() -> Iterator[str]:
+    """Lê as seeds de forma preguiçosa (uma linha por vez)."""
     if not os.path.exists(SEED_PATH):
-        return [
+        yield from [
             "como fazer café coado",
             "moedor de café para iniciantes",
             "melhor cafeteira italiana",
@@ -29,57 +59,93 @@ def load_seeds() -> list[str]:
             "filtro de papel vs metal",
             "como armazenar café em grãos",
         ]
+        return
     with open(SEED_PATH, "r", encoding="utf-8") as f:
-        return [l.strip() for l in f if l.strip()]
+        for line in f:
+            if line.strip():
+                yield line.strip()
+
+
+def load_seeds() -> list[str]:
+    return list(iter_seeds())
+
+
+def dedupe_seeds(seeds: Iterable[str]) -> Iterable[str]:
+    """Remove (ou só reporta, em DEDUP_MODE=flag) seeds repetidas antes de gastar chamadas de LLM."""
+    if cfg.DEDUP_MODE == "off":
+        return seeds
+    with metrics.timer("stage.dedup"):
+        result = dedupe_keywords(seeds, cfg.DEDUP_THRESHOLD, merge=cfg.DEDUP_MODE != "flag")
+    report = result.report(cfg.DEDUP_THRESHOLD)
+    for reason, n in report["duplicates"].items():
+        metrics.incr(f"keywords.duplicate.{reason}", n)
+    write_report(DEDUP_REPORT_PATH, report)
+    return result.keywords
 
 
 def outline_from_keyword(keyword: str) -> list[str]:
-    k = keyword.lower()
     base = [
         "Materiais e itens necessários",
         "Passo a passo simplificado",
         "Erros comuns e como evitar",
         "Ajustes finos e variações",
     ]
-    if "moedor" in k or "moagem" in k:
-        base.insert(1, "Tipos de moedores e moagens")
-    if "cafeteira" in k or "método" in k or "metodo" in k:
-        base.insert(1, "Como funciona o método")
-    if "proporção" in k or "proporcao" in k:
-        base.insert(1, "Entendendo proporções e receitas")
+    for _topic, _triggers, section in outline_matches(keyword):
+        base.insert(1, section)
     return base
 
 
-def build_article(keyword: str, used_llm: dict) -> dict:
-    title, description = gen_title_and_description(keyword)
+def import_legacy_body(keyword: str, outline: list[str]) -> None:
+    """Migração: corpos antigos em cache/llm/<slug>.md entram no cache por prompt."""
+    legacy = read_text(os.path.join(cfg.CACHE_DIR, "llm", f"{slugify(keyword)}.md"))
+    if legacy:
+        system, prompt = article_body_prompt(keyword, outline)
+        llm_cache.put(cfg.OPENROUTER_MODEL, system, prompt, DEFAULT_TEMPERATURE, legacy, replace=False)
+
+
+def pending_for(keyword: str) -> set[str]:
     outline = outline_from_keyword(keyword)
+    import_legacy_body(keyword, outline)
+    return pending_work(keyword, outline)
 
-    # Cache por slug
-    slug = slugify(keyword)
-    cache_dir = os.path.join(cfg.CACHE_DIR, "llm")
-    ensure_dir(cache_dir)
-    cache_file = os.path.join(cache_dir, f"{slug}.md")
-    body = read_text(cache_file)
 
-    if body is None and cfg.GENERATE_WITH_LLM and used_llm.get("count", 0) < cfg.LLM_MAX_CALLS_PER_RUN:
-        body = gen_article_body(keyword, outline)
-        # Se veio do LLM, persiste cache para rodadas futuras
-        if body:
-            write_text(cache_file, body)
-            used_llm["count"] = used_llm.get("count", 0) + 1
+@metrics.timed("build_article", histogram=True)
+def build_article(keyword: str, used_llm: CallBudget, work: WorkQueue | None = None) -> dict:
+    outline = outline_from_keyword(keyword)
+    slug = slugify(keyword)
+    import_legacy_body(keyword, outline)
+    # Com a fila, a palavra-chave só gasta orçamento no que o plano do build lhe concedeu
+    budget = work.budget(keyword, used_llm) if work else used_llm
 
-    if body is None:
-        body = gen_article_body(keyword, outline)
+    if cfg.LLM_STRUCTURED:
+        title, description, body = gen_article(keyword, outline, budget, offline=not cfg.GENERATE_WITH_LLM)
+    else:
+        title, description = gen_title_and_description(keyword, budget)
+        body = gen_article_body(keyword, outline, budget, offline=not cfg.GENERATE_WITH_LLM)
 
     ctas = render_cta_links(keyword)
-    # Imagem (com limite por run)
+    # Imagem: reaproveitar uma capa existente é grátis; só novas contam no limite por run
     image_url = None
     image_alt = None
-    if cfg.GENERATE_IMAGES and used_llm.get("img", 0) < cfg.IMG_MAX_CALLS_PER_RUN:
-        res = generate_image(keyword, title)
-        if res:
-            image_url, image_alt = res
-            used_llm["img"] = used_llm.get("img", 0) + 1
+    res = existing_image(keyword, title) if cfg.GENERATE_IMAGES else None
+    # Com a fila, a capa real (que substitui o placeholder) só sai quando concedida
+    wanted = "image" in work.grants.get(keyword, ()) if work else res is None
+    if wanted and cfg.GENERATE_IMAGES and budget.try_spend("img"):
+        generated = generate_image(keyword, title)
+        if generated is None:
+            budget.refund("img")
+        else:
+            res = generated
+    if res is None and cfg.GENERATE_IMAGES and work:
+        res = placeholder_image(keyword, title)
+    if work:
+        work.settle(keyword, budget, pending_work(keyword, outline))
+    image = None
+    if res:
+        image_url, image_alt = res
+        image = responsive_image(keyword)
+        if image:
+            image_url = image["src"]
     return {
         "slug": slug,
         "url": f"{cfg.SITE_URL}/posts/{slug}/",
@@ -91,70 +157,91 @@ def build_article(keyword: str, used_llm: dict) -> dict:
         "ctas": ctas,
         "image_url": image_url,
         "image_alt": image_alt,
+        "image": image,
     }
 
 
-def markdown_to_html(md: str) -> str:
-    # Conversão muito simples: apenas títulos e listas básicas.
-    # Para manter leve, sem dependência pesada de markdown.
-    import re
-    html = md
-    html = re.sub(r"^### (.*)$", r"<h3>\1</h3>", html, flags=re.MULTILINE)
-    html = re.sub(r"^## (.*)$", r"<h2>\1</h2>", html, flags=re.MULTILINE)
-    html = re.sub(r"^# (.*)$", r"<h1>\1</h1>", html, flags=re.MULTILINE)
-    # listas
-    lines = html.splitlines()
-    out = []
-    in_ul = False
-    for line in lines:
-        if line.strip().startswith("- ") or line.strip().startswith("* "):
-            if not in_ul:
-                out.append("<ul>")
-                in_ul = True
-            out.append(f"<li>{line.strip()[2:]}</li>")
-        else:
-            if in_ul:
-                out.append("</ul>")
-                in_ul = False
-            if line.strip() == "":
-                out.append("")
-            else:
-                out.append(f"<p>{line}</p>")
-    if in_ul:
-        out.append("</ul>")
-    return "\n".join(out)
+def generate_articles(seeds: Iterable[str], used_llm: CallBudget, work: WorkQueue | None = None) -> Iterator[dict]:
+    """Etapa 1: seeds → artigos, com LLM/imagens concorrentes e janela limitada em memória."""
+    workers = max(1, cfg.GEN_CONCURRENCY)
+    if work:
+        # Os títulos/descriptions concedidos saem antes, em lotes cheios (o plano reservou uma chamada por lote)
+        granted = work.granted("metadata")
+        size = max(1, cfg.LLM_META_BATCH)
+        for start in range(0, len(granted), size):
+            if len(granted[start:start + size]) > 1:
+                gen_metadata_batch(granted[start:start + size], used_llm)
+    else:
+        seeds = batch_metadata(seeds, used_llm)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from bounded_map(pool, lambda kw: build_article(kw, used_llm, work), seeds, window=workers * 2)
 
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--max-posts", type=int, default=None, help="Limitar total de posts renderizados")
-    args = parser.parse_args()
+def batch_metadata(seeds: Iterable[str], used_llm: CallBudget) -> Iterator[str]:
+    """Repassa as seeds em blocos de LLM_META_BATCH, pedindo antes, numa requisição por bloco, os
+    títulos/descriptions que não viriam da chamada estruturada (ex.: corpo já em cache)."""
+    size = cfg.LLM_META_BATCH
+    it = iter(seeds)
+    if size <= 1 or not cfg.OPENROUTER_API_KEY:
+        yield from it
+        return
+    while chunk := list(islice(it, size)):
+        pending = []
+        for kw in chunk:
+            outline = outline_from_keyword(kw)
+            import_legacy_body(kw, outline)
+            if metadata_pending(kw, outline):
+                pending.append(kw)
+        # Um item sozinho não ganha nada com o lote: fica com a chamada individual
+        if len(pending) > 1:
+            gen_metadata_batch(pending, used_llm)
+        yield from chunk
+
+
+def spool_articles(articles: Iterable[dict], spool: IO[str], related: RelatedIndex, links: dict[str, dict],
+                   search: SearchIndex | None = None) -> None:
+    """Etapa 1b: grava os artigos num arquivo temporário (um JSON por linha) e alimenta os índices de relacionados e de busca.
+
+    Os relacionados de um post dependem do corpus inteiro, então a renderização espera o fim da geração;
+    os corpos ficam em disco, não em memória.
+    """
+    for article in articles:
+        related.add(article)
+        if search is not None:
+            search.add(article)
+        links[article["slug"]] = {"title": article["title"], "url": article["url"]}
+        spool.write(json.dumps(article, ensure_ascii=False) + "\n")
 
-    seeds = load_seeds()[: cfg.MAX_POSTS_TOTAL]
-    used_llm = {"count": 0}
 
-    posts: list[dict] = []
-    for kw in seeds:
-        article = build_article(kw, used_llm)
-        # Render post
+def read_spool(spool: IO[str], related: dict[str, list[str]], links: dict[str, dict]) -> Iterator[dict]:
+    spool.seek(0)
+    for line in spool:
+        article = json.loads(line)
+        article["related"] = [links[s] for s in related.get(article["slug"], ()) if s in links]
+        yield article
+
+
+def plan_renders(articles: Iterable[dict], manifest: BuildManifest, posts: list[PostMeta], stats: dict) -> Iterator[tuple[str, dict]]:
+    """Etapa 2: consulta o manifest e só repassa os posts alterados; guarda apenas o PostMeta de cada um."""
+    article_tpl = [template_digest("article.html", "base.html"), MARKDOWN_VERSION]
+    for article in articles:
         outdir = os.path.join(cfg.OUTPUT_DIR, "posts", article["slug"])
-        article_html = markdown_to_html(article["body_md"]) if article.get("body_md") else ""
-        article_render = {
-            **article,
-            "body_html": article_html,
-        }
-        render_article(outdir, article_render)
-        posts.append(article_render)
-
-        if args.max_posts and len(posts) >= args.max_posts:
-            break
-
-    # Index
-    posts_sorted = sorted(posts, key=lambda x: x["slug"])  # simples
-    render_index(cfg.OUTPUT_DIR, posts_sorted)
-
-    # Páginas estáticas
-    pages = [
+        # Hash das entradas do post (sem a data, que deriva do próprio manifest)
+        key = f"posts/{article['slug']}"
+        digest = content_digest([article_tpl, {k: v for k, v in article.items() if k != "date"}])
+        changed = manifest.update(key, digest, os.path.join(outdir, "index.html"))
+        article["lastmod"] = manifest.lastmod(key)
+        article["date"] = article["lastmod"][:10]
+        posts.append(PostMeta.from_article(article))
+        if changed:
+            yield outdir, article
+        else:
+            stats["skipped"] += 1
+
+
+def static_pages() -> list[dict]:
+    """Páginas institucionais (sobre, privacidade, afiliados)."""
+    return [
         {
             "slug": "sobre",
             "title": "Sobre o " + cfg.SITE_NAME,
@@ -174,32 +261,203 @@ def main():
             "body_html": "<p>Participamos de programas de afiliados. Ao comprar por nossos links, podemos ganhar uma comissão que nos ajuda a manter o conteúdo gratuito.</p>",
         },
     ]
-    for page in pages:
+
+
+def build_pages(renderer: Renderer, manifest: BuildManifest) -> list[dict]:
+    """Grava as páginas estáticas que mudaram; retorna as URLs {"loc", "lastmod"} para o sitemap."""
+    page_tpl = template_digest("page.html", "base.html")
+    urls = []
+    for page in static_pages():
         pdir = os.path.join(cfg.OUTPUT_DIR, page["slug"])
-        render_page(pdir, page)
+        key = f"pages/{page['slug']}"
+        if manifest.update(key, content_digest([page_tpl, page]), os.path.join(pdir, "index.html")):
+            renderer.render_page(pdir, page)
+        urls.append({"loc": f"{cfg.SITE_URL}/{page['slug']}/", "lastmod": manifest.lastmod(key)})
+    # Página de busca: fora do sitemap (noindex); o índice que ela lê sai do SearchWriter
+    sdir = os.path.join(cfg.OUTPUT_DIR, "busca")
+    if cfg.SEARCH_ENABLED:
+        if manifest.update("pages/busca", template_digest("search.html", "base.html"), os.path.join(sdir, "index.html")):
+            renderer.render_listing("search.html", sdir)
+    elif os.path.isdir(sdir):
+        output_store.remove(sdir)
+    return urls
 
-    # SEO
-    urls = [
-        f"{cfg.SITE_URL}/",
-        *[p["url"] for p in posts_sorted],
-        *[f"{cfg.SITE_URL}/{p['slug']}/" for p in pages],
-    ]
-    render_sitemap(cfg.OUTPUT_DIR, urls)
-    render_robots(cfg.OUTPUT_DIR)
-
-    # Copia CSS
-    src_css = os.path.join("templates", "styles.css")
-    dst_css = os.path.join(cfg.OUTPUT_DIR, "styles.css")
-    if os.path.exists(src_css):
-        with open(src_css, "r", encoding="utf-8") as f:
-            css = f.read()
-        with open(dst_css, "w", encoding="utf-8") as f:
-            f.write(css)
 
+def build_sitemap(renderer: Renderer, listing_urls: Iterable[dict], posts: Iterable[PostMeta], page_urls: Iterable[dict]) -> None:
+    """Sitemap de listagens, posts e páginas; o lastmod vem da última mudança real de cada saída."""
+    urls = chain(listing_urls, ({"loc": p.url, "lastmod": p.lastmod} for p in posts), page_urls)
+    renderer.render_sitemap(cfg.OUTPUT_DIR, urls)
+
+
+def build_site_index(renderer: Renderer, manifest: BuildManifest, posts_sorted: list[PostMeta]) -> None:
+    """Tudo que depende do conjunto completo de posts: home/hubs, páginas, sitemap e robots."""
+    # Home paginada e hubs por tema
+    with metrics.timer("stage.listings"):
+        listing_urls = build_listings(renderer, manifest, posts_sorted)
+
+    with metrics.timer("stage.pages"):
+        page_urls = build_pages(renderer, manifest)
+
+    # SEO: lastmod vem da última mudança real de cada saída
+    with metrics.timer("stage.sitemap"):
+        build_sitemap(renderer, listing_urls, posts_sorted, page_urls)
+        renderer.render_robots(cfg.OUTPUT_DIR)
+
+
+def build(args) -> None:
+    limit = min(cfg.MAX_POSTS_TOTAL, args.max_posts) if args.max_posts else cfg.MAX_POSTS_TOTAL
+    seeds = islice(dedupe_seeds(iter_seeds()), limit)
+    # Shard: o limite e a deduplicação valem para a lista inteira, antes da divisão
+    shard: Shard | None = args.shard
+    plan = ShardPlan(shard) if shard else None
+    if plan:
+        seeds = plan.select(seeds)
+    # O orçamento por run vale para o build inteiro: com N shards, cada um gasta só a sua fatia
+    llm_limit = shard.share(cfg.LLM_MAX_CALLS_PER_RUN) if shard else cfg.LLM_MAX_CALLS_PER_RUN
+    img_limit = shard.share(cfg.IMG_MAX_CALLS_PER_RUN) if shard else cfg.IMG_MAX_CALLS_PER_RUN
+    used_llm = CallBudget({"count": llm_limit, "img": img_limit})
+    # Sem chave não há chamada a priorizar: a fila só existe com a API disponível
+    work = None
+    if cfg.OPENROUTER_API_KEY:
+        work = WorkQueue(os.path.join(cfg.CACHE_DIR, f"work-queue.shard-{shard.tag}.sqlite3") if shard else None)
+        with metrics.timer("stage.schedule"):
+            seeds = list(seeds)
+            work.sync((kw, pending_for(kw)) for kw in seeds)
+            work.plan(llm_limit, img_limit)
+    # Cada shard tem manifest e índice de relacionados próprios (um build não descarta as saídas do outro)
+    manifest = BuildManifest(os.path.join(cfg.CACHE_DIR, f"build-manifest.shard-{shard.tag}.json") if shard else None)
+    stats = {"skipped": 0}
+    started = datetime.now(timezone.utc)
+
+    # CSS minificado com hash no nome antes de renderizar (os templates referenciam o nome final)
+    with metrics.timer("stage.setup"):
+        output_store.recover()
+        build_css()
+        renderer = get_renderer()
+        set_global_inputs(renderer.site_globals)
+
+    # seeds → artigo (spool em disco) → relacionados → HTML. Corpos não ficam em memória.
+    posts: list[PostMeta] = []
+    related = RelatedIndex(os.path.join(cfg.CACHE_DIR, f"related.shard-{shard.tag}.npz") if shard else None)
+    links: dict[str, dict] = {}
+    # Busca: cada shard mantém o próprio índice (em cache/shards/); quem publica é o merge
+    search = SearchIndex(shard=shard) if cfg.SEARCH_ENABLED else None
+    search_writer = SearchWriter() if search is not None and not shard else None
+    search_stats = None
+    os.makedirs(cfg.CACHE_DIR, exist_ok=True)
+    with tempfile.TemporaryFile("w+", encoding="utf-8", dir=cfg.CACHE_DIR) as spool:
+        with metrics.timer("stage.generate"):
+            spool_articles(generate_articles(seeds, used_llm, work), spool, related, links, search)
+        with metrics.timer("stage.related"):
+            related_map = related.update()
+            related.save()
+        if search is not None:
+            with metrics.timer("stage.search"):
+                search_stats = {"index": search.update()}
+                if search_writer:
+                    search_stats["publish"] = search_writer.write([search])
+                search.close()
+        elif not shard:
+            drop_search_output()
+        with metrics.timer("stage.render"):
+            planned = plan_renders(read_spool(spool, related_map, links), manifest, posts, stats)
+            for _ in render_articles_parallel(planned, workers=args.render_workers):
+                pass
+        # Posts de keywords que saíram (ou ficaram além do limite) e derivados de capas antigas
+        posts_dir = os.path.join(cfg.OUTPUT_DIR, "posts")
+        live = {p.slug for p in posts}
+        if shard:
+            # Só os posts deste shard; derivados de imagem ficam para o merge, que vê todos os shards
+            live |= {name for name in (os.listdir(posts_dir) if os.path.isdir(posts_dir) else ()) if not shard.owns(name)}
+        else:
+            output_store.prune_unclaimed(os.path.join(cfg.ASSETS_DIR, "r"))
+        output_store.prune(posts_dir, live)
+
+    posts_sorted = sorted(posts, key=lambda x: x.slug)  # simples
+    if shard:
+        # Listagens, páginas, sitemap e robots saem no merge, a partir dos manifests parciais
+        with metrics.timer("stage.partial"):
+            assets = (os.path.join("r", name) for name in output_store.claimed(os.path.join(cfg.ASSETS_DIR, "r")))
+            write_partial(plan, posts_sorted, template_digest("article.html", "base.html"), assets)
+    else:
+        build_site_index(renderer, manifest, posts_sorted)
+
+    # Sidecars .gz de arquivos publicados que ainda não têm (o que foi gravado agora já ganhou o seu)
+    if cfg.PRECOMPRESS:
+        with metrics.timer("stage.precompress"):
+            metrics.incr("files.precompressed", precompress_tree(cfg.OUTPUT_DIR))
+
+    # Publica o staging de uma vez; só depois o manifest registra o build como feito
+    with metrics.timer("stage.publish"):
+        orphans = output_store.commit()
+    manifest.save()
+    if search_writer:
+        search_writer.save()
+    if work:
+        work.save()
+    with metrics.timer("stage.cache"):
+        llm_cache.evict(max_bytes=cfg.LLM_CACHE_MAX_MB * 1024 * 1024, max_age_days=cfg.LLM_CACHE_MAX_AGE_DAYS)
+        cache_stats = llm_cache.stats()
+
+    # Relatório legível por máquina (comparável entre runs / commits)
+    finished = datetime.now(timezone.utc)
+    report_path = REPORT_PATH.replace(".json", f".shard-{shard.tag}.json") if shard else REPORT_PATH
+    write_report(report_path, {
+        "started": started.isoformat(timespec="seconds"),
+        "finished": finished.isoformat(timespec="seconds"),
+        "wall_s": round((finished - started).total_seconds(), 3),
+        "shard": shard.tag if shard else None,
+        "posts": len(posts),
+        "skipped": stats["skipped"],
+        "rendered": len(posts) - stats["skipped"],
+        "render_workers": args.render_workers,
+        "budget": {
+            "llm": {"used": used_llm.get("count", 0), "limit": llm_limit},
+            "img": {"used": used_llm.get("img", 0), "limit": img_limit},
+        },
+        "llm_cache": cache_stats,
+        "queue": work.stats() if work else None,
+        "related": related.stats,
+        "search": search_stats,
+        "orphans": orphans,
+        "http": client.stats(),
+        **metrics.snapshot(),
+    })
+
+    where = f"{cfg.OUTPUT_DIR}, shard {shard.index}/{shard.count} de {plan.total} palavras-chave" if shard else cfg.OUTPUT_DIR
     print(
-        f"Gerados {len(posts)} posts em {cfg.OUTPUT_DIR} (LLM textos: {used_llm.get('count', 0)}, imagens: {used_llm.get('img', 0)})."
+        f"Gerados {len(posts)} posts em {where} ({stats['skipped']} sem mudanças; chamadas LLM: {used_llm.get('count', 0)}, imagens: {used_llm.get('img', 0)}; "
+        f"cache LLM: {cache_stats['hits']} hits / {cache_stats['misses']} misses)."
     )
 
 
+def shard_arg(spec: str) -> Shard:
+    try:
+        return Shard.parse(spec)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-posts", type=int, default=None, help="Limitar total de posts renderizados")
+    parser.add_argument("--render-workers", type=int, default=cfg.RENDER_WORKERS, help="Processos de renderização (0 = um por núcleo, 1 = serial)")
+    parser.add_argument("--shard", type=shard_arg, default=None, metavar="i/N",
+                        help="Gera só os posts do shard i de N (hash do slug); junte com `python -m scripts.merge`")
+    parser.add_argument("--profile", action="store_true", help=f"Rodar sob cProfile e gravar {PROFILE_PATH} (snakeviz/flameprof)")
+    args = parser.parse_args()
+
+    if not args.profile:
+        build(args)
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(build, args)
+    finally:
+        os.makedirs(cfg.CACHE_DIR, exist_ok=True)
+        profiler.dump_stats(PROFILE_PATH)
+        print(f"Perfil gravado em {PROFILE_PATH}")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+import argparse
+import json
+
+from generator.config import cfg
+from generator.llm_cache import llm_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção do cache de respostas do LLM")
+    parser.add_argument("--stats", action="store_true", help="Mostra tamanho e entradas por modelo")
+    parser.add_argument("--invalidate-model", metavar="MODEL", help="Remove todas as respostas de um modelo")
+    parser.add_argument("--evict", action="store_true", help="Aplica LLM_CACHE_MAX_MB / LLM_CACHE_MAX_AGE_DAYS")
+    args = parser.parse_args()
+
+    if args.invalidate_model:
+        n = llm_cache.invalidate_model(args.invalidate_model)
+        print(f"{n} respostas removidas para {args.invalidate_model}.")
+    if args.evict:
+        n = llm_cache.evict(max_bytes=cfg.LLM_CACHE_MAX_MB * 1024 * 1024, max_age_days=cfg.LLM_CACHE_MAX_AGE_DAYS)
+        print(f"{n} respostas removidas por tamanho/idade.")
+    if args.stats or not (args.invalidate_model or args.evict):
+        stats = llm_cache.stats()
+        print(json.dumps({k: stats[k] for k in ("entries", "bytes", "by_model")}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
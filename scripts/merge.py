@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Junta os shards de um build (`python -m scripts.generate --shard i/N`) num site completo.
+
+Lê os manifests parciais (padrão: `cache/shards/shard-*.json`), confere se todos os N shards
+estão lá e vieram do mesmo plano e dos mesmos templates, e grava o que depende do conjunto
+inteiro de posts: home/hubs paginados, páginas institucionais, sitemap e robots.txt. O HTML
+dos posts não é tocado. Derivados de imagem que nenhum shard usa são removidos. O índice de busca
+é publicado a partir dos índices dos shards (`cache/shards/search-*.sqlite3`).
+
+Uso: copie os `public/` e `cache/shards/` de todos os workers para o mesmo lugar e rode
+`python -m scripts.merge [manifests...]`.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+from generator.assets import build_css, precompress_tree
+from generator.config import cfg
+from generator.manifest import BuildManifest, set_global_inputs, template_digest
+from generator.metrics import metrics, write_report
+from generator.output_store import output_store
+from generator.renderer import get_renderer
+from generator.search import SearchIndex, SearchWriter, drop_search_output, index_path
+from generator.shard import MergeError, Shard, load_partials
+from scripts.generate import build_site_index
+
+REPORT_PATH = os.path.join(cfg.CACHE_DIR, "merge-report.json")
+
+
+def merge(paths: list[str] | None = None) -> dict:
+    started = datetime.now(timezone.utc)
+    with metrics.timer("stage.setup"):
+        output_store.recover()
+        build_css()
+        renderer = get_renderer()
+        set_global_inputs(renderer.site_globals)
+        posts, info = load_partials(paths)
+        if info["inputs"] != template_digest("article.html", "base.html"):
+            raise MergeError("os shards foram renderizados com outros templates/configuração do site")
+
+    manifest = BuildManifest()
+    build_site_index(renderer, manifest, posts)
+
+    search_writer, search_stats = None, None
+    if cfg.SEARCH_ENABLED:
+        with metrics.timer("stage.search"):
+            paths = [index_path(Shard(i, info["count"])) for i in range(1, info["count"] + 1)]
+            missing = [p for p in paths if not os.path.exists(p)]
+            if missing:
+                raise MergeError(f"faltam os índices de busca {', '.join(map(os.path.basename, missing))}")
+            indexes = [SearchIndex(p) for p in paths]
+            search_writer = SearchWriter()
+            search_stats = search_writer.write(indexes)
+            for index in indexes:
+                index.close()
+    else:
+        drop_search_output()
+
+    # Derivados de imagem: vivos são os reclamados por algum shard
+    for rel in info["assets"]:
+        output_store.claim(os.path.join(cfg.ASSETS_DIR, rel))
+    output_store.prune_unclaimed(os.path.join(cfg.ASSETS_DIR, "r"))
+
+    if cfg.PRECOMPRESS:
+        with metrics.timer("stage.precompress"):
+            metrics.incr("files.precompressed", precompress_tree(cfg.OUTPUT_DIR))
+    with metrics.timer("stage.publish"):
+        orphans = output_store.commit()
+    manifest.save()
+    if search_writer:
+        search_writer.save()
+
+    finished = datetime.now(timezone.utc)
+    report = {
+        "started": started.isoformat(timespec="seconds"),
+        "finished": finished.isoformat(timespec="seconds"),
+        "wall_s": round((finished - started).total_seconds(), 3),
+        "shards": info["count"],
+        "posts": len(posts),
+        "search": search_stats,
+        "orphans": orphans,
+        **metrics.snapshot(),
+    }
+    write_report(REPORT_PATH, report)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Junta os shards de um build")
+    parser.add_argument("manifests", nargs="*", help="Manifests parciais (padrão: cache/shards/shard-*.json)")
+    args = parser.parse_args()
+    try:
+        report = merge(args.manifests or None)
+    except MergeError as exc:
+        print(f"merge: {exc}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Merge de {report['shards']} shards: {report['posts']} posts indexados em {cfg.OUTPUT_DIR}.")
+
+
+if __name__ == "__main__":
+    main()
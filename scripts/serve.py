@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""Servidor local de `OUTPUT_DIR`, com rebuild parcial opcional.
+
+Uso: `python -m scripts.serve [--watch] [--port 8000] [--allow-llm] [--check]`
+
+Com `--watch`, observa `templates/`, `data/` e `cache/llm/` e refaz só as saídas afetadas,
+seguindo um grafo de dependências (template → páginas, keyword → post, post → índice/sitemap).
+Sem `--allow-llm`, nenhuma chamada de LLM ou imagem é feita: vale só o que já está em cache.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import threading
+import time
+import traceback
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from typing import Iterable
+
+from generator.affiliate import cta_matcher, render_cta_links
+from generator.assets import build_css
+from generator.concurrency import CallBudget
+from generator.config import cfg
+from generator.listing import build_listings
+from generator.llm import DEFAULT_TEMPERATURE, article_body_prompt
+from generator.llm_cache import llm_cache
+from generator.manifest import BuildManifest, forget_template_digests, set_global_inputs
+from generator.output_store import output_store
+from generator.posts import PostMeta
+from generator.related import RelatedIndex
+from generator.render_pool import render_articles_parallel
+from generator.renderer import reset_renderer
+from generator.search import SearchIndex, SearchWriter
+from generator.utils import read_text, slugify
+from generator.watch import DependencyGraph, snapshot, template_refs, watch
+from scripts.generate import build_pages, build_sitemap, dedupe_seeds, generate_articles, iter_seeds, outline_from_keyword, plan_renders
+
+
+# Template de entrada → saída agregada que ele produz
+ENTRY_TEMPLATES = {
+    "article.html": "posts",
+    "index.html": "listings",
+    "hub.html": "listings",
+    "page.html": "pages",
+    "search.html": "pages",
+    "robots.txt.j2": "robots",
+}
+
+
+def watched_paths() -> list[str]:
+    """Diretórios observados, absolutos; um caminho configurado que não existe é erro, não um diretório qualquer."""
+    missing = [p for p in (cfg.TEMPLATES_DIR, cfg.KEYWORDS_FILE, cfg.CTA_RULES_FILE) if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"caminhos configurados não existem: {', '.join(missing)}")
+    paths = {os.path.abspath(cfg.TEMPLATES_DIR), os.path.dirname(os.path.abspath(cfg.KEYWORDS_FILE)),
+             os.path.dirname(os.path.abspath(cfg.CTA_RULES_FILE)), os.path.abspath(os.path.join(cfg.CACHE_DIR, "llm"))}
+    return sorted(paths)
+
+
+def nodes_for(paths: Iterable[str]) -> set[str]:
+    """Nós do grafo afetados pelos arquivos alterados (relativos ou absolutos: tudo é comparado em absoluto)."""
+    templates = os.path.abspath(cfg.TEMPLATES_DIR)
+    legacy = os.path.abspath(os.path.join(cfg.CACHE_DIR, "llm"))
+    keywords, cta_rules = os.path.abspath(cfg.KEYWORDS_FILE), os.path.abspath(cfg.CTA_RULES_FILE)
+    nodes = set()
+    for path in map(os.path.abspath, paths):
+        parent, name = os.path.split(path)
+        if path == keywords:
+            nodes.add("keywords")
+        elif path == cta_rules:
+            nodes.add("cta_rules")
+        elif parent == templates:
+            nodes.add("css" if name == "styles.css" else f"template:{name}")
+        elif parent == legacy and name.endswith(".md"):
+            nodes.add(f"llm:{name[:-3]}")
+    return nodes
+
+
+def check() -> bool:
+    """Cada arquivo de dados, do jeito que o polling o reporta, cai no seu nó (e na forma configurada também)."""
+    found = snapshot(watched_paths())
+    expected = {cfg.KEYWORDS_FILE: "keywords", cfg.CTA_RULES_FILE: "cta_rules",
+                os.path.join(cfg.TEMPLATES_DIR, "article.html"): "template:article.html",
+                os.path.join(cfg.TEMPLATES_DIR, "styles.css"): "css"}
+    ok = True
+    for path, node in expected.items():
+        reported = [p for p in found if os.path.samefile(p, path)] if os.path.exists(path) else []
+        for form in reported + [path]:
+            got = nodes_for([form])
+            if got != {node}:
+                ok = False
+                print(f"FALHOU {form}: esperado {{{node!r}}}, obtido {got!r}")
+        if not reported:
+            ok = False
+            print(f"FALHOU {path}: fora dos caminhos observados")
+    print(f"{len(expected)} arquivos: {'ok' if ok else 'com falhas'}")
+    return ok
+
+
+class DevBuild:
+    """Estado do site em memória (artigos, metadados, grafo) para rebuilds parciais.
+
+    O primeiro `rebuild` parte do estado vazio e equivale a um build completo (com o
+    manifest em disco, o que não mudou não é regravado). Os corpos ficam em memória:
+    é um modo de desenvolvimento, não de produção.
+    """
+
+    def __init__(self, max_posts: int | None = None, allow_llm: bool = False, render_workers: int = 1):
+        self.limit = min(cfg.MAX_POSTS_TOTAL, max_posts) if max_posts else cfg.MAX_POSTS_TOTAL
+        self.allow_llm = allow_llm
+        self.render_workers = render_workers
+        self.manifest = BuildManifest()
+        self.related = RelatedIndex()
+        self.related_map: dict[str, list[str]] = {}
+        self.search = SearchIndex() if cfg.SEARCH_ENABLED else None
+        self.search_writer = SearchWriter() if cfg.SEARCH_ENABLED else None
+        self.graph = DependencyGraph()
+        self.renderer = None
+        output_store.recover()
+        self.slugs: dict[str, str] = {}          # keyword → slug
+        self.articles: dict[str, dict] = {}      # slug → artigo
+        self.metas: dict[str, PostMeta] = {}
+        self.listing_urls: list[dict] = []
+        self.page_urls: list[dict] = []
+        for name, output in ENTRY_TEMPLATES.items():
+            self.graph.add(f"template:{name}", output)
+        for src, dst in [("css", "template:base.html"), ("cta_rules", "posts"), ("cta_rules", "listings"),
+                         ("listings", "sitemap"), ("pages", "sitemap")]:
+            self.graph.add(src, dst)
+
+    # -- etapas --------------------------------------------------------------
+    def _reload_templates(self, nodes: set[str]) -> None:
+        """Relê templates (e o CSS) do disco e refaz as arestas `extends`/`include` dos editados."""
+        if self.renderer is None:
+            names = [n for n in os.listdir(cfg.TEMPLATES_DIR) if n.endswith((".html", ".j2"))]
+        else:
+            names = [n.split(":", 1)[1] for n in nodes if n.startswith("template:")]
+        if "css" in nodes:
+            build_css()
+        self.renderer = reset_renderer()
+        set_global_inputs(self.renderer.site_globals)
+        forget_template_digests()
+        for name in names:
+            node = f"template:{name}"
+            for parent in list(self.graph.parents.get(node, ())):
+                if parent.startswith("template:"):
+                    self.graph.unlink(parent, node)
+            if os.path.exists(os.path.join(cfg.TEMPLATES_DIR, name)):
+                for ref in template_refs(self.renderer.env, name):
+                    self.graph.add(f"template:{ref}", node)
+
+    def _sync_keywords(self) -> tuple[list[str], list[str]]:
+        """Compara as seeds do arquivo com as do estado; remove os posts que saíram."""
+        seeds = list(islice(dedupe_seeds(iter_seeds()), self.limit))
+        current = set(seeds)
+        added = [kw for kw in seeds if kw not in self.slugs]
+        removed = [kw for kw in self.slugs if kw not in current]
+        for kw in removed:
+            slug = self.slugs.pop(kw)
+            self.articles.pop(slug, None)
+            self.metas.pop(slug, None)
+            self.manifest.discard(f"posts/{slug}")
+            self.related.discard(slug)
+            if self.search is not None:
+                self.search.discard(slug)
+            for node in (f"keyword:{kw}", f"post:{slug}", f"llm:{slug}"):
+                self.graph.remove(node)
+            output_store.remove(os.path.join(cfg.OUTPUT_DIR, "posts", slug))
+        for kw in added:
+            slug = self.slugs[kw] = slugify(kw)
+            self.graph.add(f"keyword:{kw}", f"post:{slug}")
+            self.graph.add(f"llm:{slug}", f"keyword:{kw}")
+            self.graph.add("posts", f"post:{slug}")
+            # Só conteúdo novo muda as listagens; re-renderizar o post (article.html) não
+            self.graph.add(f"keyword:{kw}", "listings")
+            self.graph.add(f"keyword:{kw}", "sitemap")
+        return added, removed
+
+    def _refresh_legacy(self, slug: str) -> None:
+        """Corpo editado em cache/llm/<slug>.md substitui a resposta em cache do prompt."""
+        article = self.articles.get(slug)
+        body = read_text(os.path.join(cfg.CACHE_DIR, "llm", f"{slug}.md"))
+        if article and body:
+            system, prompt = article_body_prompt(article["keyword"], outline_from_keyword(article["keyword"]))
+            llm_cache.put(cfg.OPENROUTER_MODEL, system, prompt, DEFAULT_TEMPERATURE, body, replace=True)
+
+    def _generate(self, keywords: list[str]) -> set[str]:
+        limits = {"count": cfg.LLM_MAX_CALLS_PER_RUN, "img": cfg.IMG_MAX_CALLS_PER_RUN} if self.allow_llm else {"count": 0, "img": 0}
+        slugs = set()
+        for article in generate_articles(keywords, CallBudget(limits)):
+            self.articles[article["slug"]] = article
+            self.related.add(article)
+            if self.search is not None:
+                self.search.add(article)
+            slugs.add(article["slug"])
+        return slugs
+
+    def _update_related(self, regenerated: set[str]) -> set[str]:
+        """Atualiza os relacionados; devolve os posts cuja lista (ou um dos links) mudou."""
+        old, self.related_map = self.related_map, self.related.update()
+        self.related.save()
+        return {
+            slug for slug, rel in self.related_map.items()
+            if rel != old.get(slug) or regenerated.intersection(rel)
+        }
+
+    def _render_posts(self, slugs: Iterable[str]) -> int:
+        def items():
+            for slug in slugs:
+                article = self.articles.get(slug)
+                if article is not None:
+                    links = [self.articles[s] for s in self.related_map.get(slug, ()) if s in self.articles]
+                    yield {**article, "related": [{"title": a["title"], "url": a["url"]} for a in links]}
+
+        metas: list[PostMeta] = []
+        stats = {"skipped": 0}
+        rendered = sum(1 for _ in render_articles_parallel(plan_renders(items(), self.manifest, metas, stats), workers=self.render_workers))
+        self.metas.update((m.slug, m) for m in metas)
+        return rendered
+
+    def rebuild(self, nodes: set[str]) -> None:
+        start = time.perf_counter()
+        nodes = set(nodes)
+        if self.renderer is None or "css" in nodes or any(n.startswith("template:") for n in nodes):
+            self._reload_templates(nodes)
+        if "cta_rules" in nodes:
+            cta_matcher.cache_clear()
+            for article in self.articles.values():
+                article["ctas"] = render_cta_links(article["keyword"])
+        removed: list[str] = []
+        if "keywords" in nodes:
+            added, removed = self._sync_keywords()
+            nodes |= {f"keyword:{kw}" for kw in added}
+            if removed:
+                nodes |= {"listings", "sitemap"}
+        for node in nodes:
+            if node.startswith("llm:"):
+                self._refresh_legacy(node[4:])
+
+        affected = self.graph.affected(nodes)
+        regenerate = [n[8:] for n in affected if n.startswith("keyword:") and n[8:] in self.slugs]
+        regenerated = self._generate(regenerate) if regenerate else set()
+        if regenerated or removed:
+            affected = self.graph.affected(affected | {f"post:{s}" for s in self._update_related(regenerated)})
+            if self.search is not None:
+                self.search.update()
+                self.search_writer.write([self.search])
+
+        posts = [n[5:] for n in affected if n.startswith("post:")]
+        lastmods = {slug: meta.lastmod for slug, meta in self.metas.items()}
+        rendered = self._render_posts(posts) if posts else 0
+        # Post regravado muda o lastmod dele no sitemap
+        if any(lastmods.get(s) != m.lastmod for s, m in self.metas.items()):
+            affected.add("sitemap")
+        metas = sorted(self.metas.values(), key=lambda m: m.slug)
+        if "listings" in affected:
+            self.listing_urls = build_listings(self.renderer, self.manifest, metas)
+        if "pages" in affected:
+            self.page_urls = build_pages(self.renderer, self.manifest)
+        if "sitemap" in affected:
+            build_sitemap(self.renderer, self.listing_urls, metas, self.page_urls)
+        if "robots" in affected:
+            self.renderer.render_robots(cfg.OUTPUT_DIR)
+        output_store.commit()
+        self.manifest.save()
+        llm_cache.flush()
+        if self.search_writer:
+            self.search_writer.save()
+
+        done = [f"{rendered}/{len(posts)} posts"] if posts else []
+        done += [n for n in ("listings", "pages", "sitemap", "robots") if n in affected]
+        if regenerated:
+            done.insert(0, f"{len(regenerated)} gerados")
+        if removed:
+            done.insert(0, f"{len(removed)} removidos")
+        print(f"↻ {', '.join(done)} em {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+def _handler(directory: str, base_path: str):
+    class Handler(SimpleHTTPRequestHandler):
+        """Arquivos de `directory`; aceita URLs com o subcaminho do SITE_URL (ex.: GitHub Pages)."""
+
+        def translate_path(self, path: str) -> str:
+            if base_path != "/" and path.startswith(base_path):
+                path = "/" + path[len(base_path):]
+            return super().translate_path(path)
+
+    return partial(Handler, directory=directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local do site, com rebuild parcial (--watch)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--watch", action="store_true", help="Observa templates/, data/ e cache/llm/ e refaz só o que mudou")
+    parser.add_argument("--allow-llm", action="store_true", help="Permite chamadas de LLM/imagem (até LLM_MAX_CALLS_PER_RUN / IMG_MAX_CALLS_PER_RUN por rebuild)")
+    parser.add_argument("--max-posts", type=int, default=None, help="Limitar total de posts")
+    parser.add_argument("--render-workers", type=int, default=1, help="Processos de renderização (1 = serial, o mais rápido para poucos posts)")
+    parser.add_argument("--interval", type=float, default=0.25, help="Intervalo do polling, em segundos")
+    parser.add_argument("--check", action="store_true", help="Confere se edições em data/ e templates/ caem nos nós certos e sai (código 1 se não)")
+    args = parser.parse_args()
+    if args.check:
+        try:
+            sys.exit(0 if check() else 1)
+        except FileNotFoundError as exc:
+            print(f"serve: {exc}", file=sys.stderr)
+            sys.exit(1)
+
+    dev = None
+    if args.watch:
+        dev = DevBuild(args.max_posts, args.allow_llm, args.render_workers)
+        try:
+            watched = watched_paths()
+        except FileNotFoundError as exc:
+            print(f"serve: {exc}", file=sys.stderr)
+            sys.exit(1)
+        dev.rebuild({"css", "keywords", "pages", "robots"})
+
+    base_path = dev.renderer.site_globals["BASE_PATH"] if dev else "/"
+    os.makedirs(cfg.OUTPUT_DIR, exist_ok=True)
+    server = ThreadingHTTPServer((args.host, args.port), _handler(os.path.abspath(cfg.OUTPUT_DIR), base_path))
+    print(f"Servindo {cfg.OUTPUT_DIR} em http://{args.host}:{args.port}{base_path}")
+    if not dev:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        for changed in watch(watched, args.interval):
+            nodes = nodes_for(changed)
+            if not nodes:
+                continue
+            try:
+                dev.rebuild(nodes)
+            except Exception:
+                # Erro de template ou de dados: mostra e continua servindo a última versão boa
+                traceback.print_exc()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()